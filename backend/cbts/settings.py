@@ -24,6 +24,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.postgres',
     'django_filters',
 
     # Third-party apps
@@ -78,17 +79,73 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'cbts.wsgi.application'
 
-# Database (PostgreSQL for Docker/Production)
+# Database (PostgreSQL for Docker/Production; every value can be overridden from the environment)
+def env_flag(name, default):
+    return os.environ.get(name, str(default)).strip().lower() in ('1', 'true', 'yes', 'on')
+
+DB_PORT = os.environ.get('DB_PORT', '6543')
+
+# Supabase's transaction-mode pooler listens on 6543 and its session mode on 5432.
+# Behind a transaction pooler consecutive queries may land on different server
+# connections, so named (server-side) cursors cannot be used.
+DB_POOLER_MODE = os.environ.get('DB_POOLER_MODE', 'transaction' if DB_PORT == '6543' else 'none')
+
+# 'wsgi' (gunicorn sync workers) or 'asgi' (uvicorn workers); see gunicorn.conf.py
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+
+# DB_POOL=true uses Django's built-in psycopg (v3) pool; DB_POOL_MIN_SIZE/MAX_SIZE size it.
+# Under ASGI each request may run its ORM calls on a different thread, which
+# strands persistent connections, so the pool is the default there.
+DB_POOL = env_flag('DB_POOL', SERVER_MODE == 'asgi')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'postgres',
-        'USER': 'postgres.lhstorhrkgcfeiiidjze',
-        'PASSWORD': 'Lulumall@1234',
-        'HOST': 'aws-0-ap-south-1.pooler.supabase.com',
-        'PORT': '6543',
+        'NAME': os.environ.get('DB_NAME', 'postgres'),
+        'USER': os.environ.get('DB_USER', 'postgres.lhstorhrkgcfeiiidjze'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'Lulumall@1234'),
+        'HOST': os.environ.get('DB_HOST', 'aws-0-ap-south-1.pooler.supabase.com'),
+        'PORT': DB_PORT,
+        # Keep connections open across requests instead of paying TCP+TLS setup each time.
+        # The pool manages its own connections, and Django refuses both at once.
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        # Ping a reused connection before the request's first query so a pooler restart costs one retry, not a 500
+        'CONN_HEALTH_CHECKS': env_flag('DB_CONN_HEALTH_CHECKS', True),
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOLER_MODE == 'transaction',
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 10)),
+        },
     }
 }
+if DB_POOL:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+
+# Cache (local memory by default, which only suits a single dev process). Token claim
+# invalidations and visibility sets live here, so every server process must share it: gunicorn refuses
+# to start on a per-process backend (tracker.E001). Point CACHE_BACKEND/CACHE_LOCATION
+# at e.g. django.core.cache.backends.redis.RedisCache / redis://host:6379/0.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'cbts'),
+    }
+}
+if CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 10000}
+
+# Seconds a user's cached visible team/project ids live (tracker.visibility). Signals
+# recompute them on every tracked write; the expiry catches writes that skip signals.
+VISIBILITY_CACHE_TIMEOUT = int(os.environ.get('VISIBILITY_CACHE_TIMEOUT', 300))
+
+# Serialized payloads for /auth/user/ and bug lists, and the scope versions behind every
+# ETag; invalidated by tracker.signals. Must be shared by all processes (tracker.E001).
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
 
 # Custom User Model
 AUTH_USER_MODEL = 'tracker.User'
@@ -138,7 +195,8 @@ DJREST_AUTH = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication that reads role/team from token claims instead of the DB
+        'tracker.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -146,6 +204,27 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
 }
 
+# POST /bugs/bulk/ insert batch size (overridable per request with ?batch_size=)
+BUG_BULK_BATCH_SIZE = 500
+BUG_BULK_MAX_BATCH_SIZE = 5000
+
+# Rows fetched per server-side cursor round trip by GET /bugs/export/
+BUG_EXPORT_CHUNK_SIZE = 2000
+
+# Duplicate detection (GET /bugs/similar/ and the create response warning).
+# Keep the threshold >= pg_trgm.similarity_threshold (0.3) so the % index probe applies.
+BUG_SIMILAR_THRESHOLD = 0.3
+BUG_SIMILAR_LIMIT = 5
+BUG_DUPLICATE_WARNINGS = True
+
+# GET /bugs/stream/ (Server-Sent Events). LISTEN needs a session of its own, which a
+# transaction pooler cannot give, so the per-worker listener connects to Postgres directly.
+BUG_STREAM_DB_HOST = os.environ.get('BUG_STREAM_DB_HOST', DATABASES['default']['HOST'])
+BUG_STREAM_DB_PORT = os.environ.get('BUG_STREAM_DB_PORT', '5432' if DB_POOLER_MODE == 'transaction' else DB_PORT)
+BUG_STREAM_HEARTBEAT = 15  # seconds between keep-alive comments on an idle stream
+BUG_STREAM_QUEUE_SIZE = 256  # events buffered per client before it is told to resync
+BUG_STREAM_REPLAY_LIMIT = 500  # bugs replayed for Last-Event-ID before a reset instead
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -168,6 +247,12 @@ REST_AUTH_REGISTER_SERIALIZERS = {
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'no-reply@yourdomain.com'
 
+# Outbox drained by `manage.py send_queued_mail`; retries back off exponentially
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BACKOFF = 60  # seconds before the first retry
+OUTBOX_CLAIM_TIMEOUT = 300  # seconds a worker holds claimed rows; keep above a batch's send time
+
 # React frontend
 FRONTEND_URL = 'http://localhost:3000'
 
@@ -177,6 +262,7 @@ CORS_ALLOW_HEADERS = [
     "authorization",
     "content-type",
     "dnt",
+    "last-event-id",
     "origin",
     "user-agent",
     "x-csrftoken",
@@ -0,0 +1,37 @@
+# Gunicorn settings shared by both serving modes: `gunicorn -c gunicorn.conf.py`
+#
+# SERVER_MODE=wsgi  sync workers, one request per worker process at a time
+# SERVER_MODE=asgi  uvicorn workers; the async bug list/detail and /auth/user/
+#                   views serve many concurrent pollers per process, and
+#                   /bugs/stream/ holds thousands of idle SSE clients
+import os
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')  # e.g. '-' for stdout
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'cbts.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    # Idle dashboard pollers hold their connection open between requests
+    keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 30))
+else:
+    wsgi_app = 'cbts.wsgi:application'
+
+
+def on_starting(server):
+    # Fail before forking when the workers could not share invalidations (tracker.E001)
+    import django
+    from django.core import checks
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cbts.settings')
+    django.setup()
+    errors = [
+        message for message in checks.run_checks(tags=[checks.Tags.caches], include_deployment_checks=True)
+        if message.is_serious()
+    ]
+    if errors:
+        raise SystemExit('\n'.join(str(error) for error in errors))
@@ -0,0 +1,154 @@
+"""
+Dashboard poller load test (stdlib only).
+
+Each simulated poller does what the frontend dashboard does: GET /api/bugs/
+and /api/auth/user/ in a loop, replaying the ETag it was given so most polls
+end in a 304. Concurrency is stepped up until p99 latency or the error rate
+breaks the SLO; the last passing step is how many pollers the server sustains.
+
+Run it once per serving mode against a single worker and compare:
+
+    SERVER_MODE=wsgi WEB_CONCURRENCY=1 gunicorn -c gunicorn.conf.py
+    SERVER_MODE=asgi WEB_CONCURRENCY=1 gunicorn -c gunicorn.conf.py
+    python scripts/loadtest_pollers.py --username pm_john --password pm1234
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+PATHS = ['/api/bugs/', '/api/auth/user/']
+
+
+def obtain_token(base_url, username, password):
+    request = urllib.request.Request(
+        f'{base_url}/api/token/',
+        data=json.dumps({'username': username, 'password': password}).encode(),
+        headers={'Content-Type': 'application/json'},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)['access']
+
+
+class Poller:
+    """
+    One dashboard tab: a keep-alive connection and an ETag per path.
+    """
+
+    def __init__(self, host, port, token):
+        self.host, self.port, self.token = host, port, token
+        self.etags = {}
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def get(self, path):
+        if self.writer is None:
+            await self.connect()
+
+        lines = [
+            f'GET {path} HTTP/1.1', f'Host: {self.host}', f'Authorization: Bearer {self.token}',
+            'Accept: application/json', 'Connection: keep-alive',
+        ]
+        if path in self.etags:
+            lines.append(f'If-None-Match: {self.etags[path]}')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) not in (b'\r\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'content-length' in headers:
+            await self.reader.readexactly(int(headers['content-length']))
+        elif status != 304:
+            await self.reader.read()  # no length: body runs to connection close
+            headers['connection'] = 'close'
+
+        if 'etag' in headers:
+            self.etags[path] = headers['etag']
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status
+
+
+async def run_step(host, port, token, pollers, duration, interval):
+    timings, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def poll_forever(poller):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            for path in PATHS:
+                started = time.perf_counter()
+                try:
+                    status = await poller.get(path)
+                except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+                    status = None
+                    await poller.close()
+                if status in (200, 304):
+                    timings.append((time.perf_counter() - started) * 1000)
+                else:
+                    errors += 1
+            await asyncio.sleep(interval)
+        await poller.close()
+
+    await asyncio.gather(*(poll_forever(Poller(host, port, token)) for _ in range(pollers)))
+    return timings, errors
+
+
+def summarize(timings, errors, duration):
+    total = len(timings) + errors
+    p99 = statistics.quantiles(timings, n=100)[98] if len(timings) > 1 else float('inf')
+    return {
+        'rps': len(timings) / duration,
+        'p50': statistics.median(timings) if timings else float('inf'),
+        'p99': p99,
+        'error_rate': errors / total if total else 1.0,
+    }
+
+
+async def main(options):
+    url = urlsplit(options.base_url)
+    token = obtain_token(options.base_url, options.username, options.password)
+
+    sustained = 0
+    for pollers in options.steps:
+        timings, errors = await run_step(
+            url.hostname, url.port or 80, token, pollers, options.duration, options.interval
+        )
+        result = summarize(timings, errors, options.duration)
+        ok = result['p99'] <= options.slo_p99 and result['error_rate'] <= options.max_error_rate
+        print(
+            f"{pollers:>5} pollers: {result['rps']:8.1f} req/s, p50 {result['p50']:8.1f} ms, "
+            f"p99 {result['p99']:8.1f} ms, errors {result['error_rate']:6.2%} {'ok' if ok else 'SLO missed'}"
+        )
+        if not ok:
+            break
+        sustained = pollers
+
+    print(f'Sustained {sustained} concurrent pollers within p99 <= {options.slo_p99} ms.')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--steps', type=int, nargs='+', default=[10, 25, 50, 100, 200, 400, 800])
+    parser.add_argument('--duration', type=float, default=20, help='Seconds per concurrency step.')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds each poller waits between rounds.')
+    parser.add_argument('--slo-p99', type=float, default=500, help='p99 latency budget in ms.')
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    asyncio.run(main(parser.parse_args()))
@@ -1,56 +1,79 @@
 import os
 import sys
+from pathlib import Path
+
 import django
 
-# Setup Django
-sys.path.append('/app')  # Django project root
+# Setup Django: the project root is this script's parent directory (/app in Docker)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cbts.settings')
 django.setup()
 
 from django.contrib.auth import get_user_model
-from tracker.models import Project, Team, Bug
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
 from django.utils.timezone import now
+from tracker import analytics, stats
+from tracker.models import Project, Team, Bug, BugEvent
 
 User = get_user_model()
 
+# For a large synthetic dataset use `python manage.py generate_data` instead.
+
 # --- Wipe old data ---
-Bug.objects.all().delete()
-Team.objects.all().delete()
-Project.objects.all().delete()
-User.objects.all().delete()
+# One TRUNCATE/DELETE per table, no per-row signals
+call_command('flush', interactive=False, verbosity=0)
 
 # --- Create Users by Role ---
-Durga      = User.objects.create_user('Durga',      'durga@gmai.com',      'lulumall1234',     role='admin',      is_staff=True)
-pm_john      = User.objects.create_user('pm_john',      'pm_john@example.com',      'pm1234',     role='product_manager',      is_staff=True)
-eng_susan    = User.objects.create_user('eng_susan',    'eng_susan@example.com',    'eng1234',    role='engineering_manager', is_staff=True)
+# Each distinct password is hashed once; every user is inserted in one bulk_create
+hashes = {}
+users = []
+
+
+def create_user(username, email, password, **fields):
+    if password not in hashes:
+        hashes[password] = make_password(password)
+    user = User(username=username, email=email, password=hashes[password], **fields)
+    users.append(user)
+    return user
+
+
+Durga      = create_user('Durga',      'durga@gmai.com',      'lulumall1234',     role='engineering_manager', is_staff=True, is_superuser=True)
+pm_john      = create_user('pm_john',      'pm_john@example.com',      'pm1234',     role='product_manager',      is_staff=True)
+eng_susan    = create_user('eng_susan',    'eng_susan@example.com',    'eng1234',    role='engineering_manager', is_staff=True)
 
 # Team Managers
-tm_alice     = User.objects.create_user('tm_alice',     'tm_alice@example.com',     'team1234',  role='team_manager')
-tm_bob       = User.objects.create_user('tm_bob',       'tm_bob@example.com',       'team1234',  role='team_manager')
+tm_alice     = create_user('tm_alice',     'tm_alice@example.com',     'team1234',  role='team_manager')
+tm_bob       = create_user('tm_bob',       'tm_bob@example.com',       'team1234',  role='team_manager')
 
 # Team Leads
-lead_amy     = User.objects.create_user('lead_amy',     'lead_amy@example.com',     'lead1234',  role='team_lead')
-lead_brian   = User.objects.create_user('lead_brian',   'lead_brian@example.com',   'lead1234',  role='team_lead')
-lead_chris   = User.objects.create_user('lead_chris',   'lead_chris@example.com',   'lead1234',  role='team_lead')
+lead_amy     = create_user('lead_amy',     'lead_amy@example.com',     'lead1234',  role='team_lead')
+lead_brian   = create_user('lead_brian',   'lead_brian@example.com',   'lead1234',  role='team_lead')
+lead_chris   = create_user('lead_chris',   'lead_chris@example.com',   'lead1234',  role='team_lead')
 
 # Developers
-dev_sara     = User.objects.create_user('dev_sara',     'dev_sara@example.com',     'dev1234',   role='developer')
-dev_james    = User.objects.create_user('dev_james',    'dev_james@example.com',    'dev1234',   role='developer')
-dev_lisa     = User.objects.create_user('dev_lisa',     'dev_lisa@example.com',     'dev1234',   role='developer')
-dev_paul     = User.objects.create_user('dev_paul',     'dev_paul@example.com',     'dev1234',   role='developer')
-dev_karen    = User.objects.create_user('dev_karen',    'dev_karen@example.com',    'dev1234',   role='developer')
-dev_tom      = User.objects.create_user('dev_tom',      'dev_tom@example.com',      'dev1234',   role='developer')
-dev_linda    = User.objects.create_user('dev_linda',    'dev_linda@example.com',    'dev1234',   role='developer')
+dev_mike     = create_user('dev_mike',     'dev_mike@example.com',     'dev1234',   role='developer')
+dev_sara     = create_user('dev_sara',     'dev_sara@example.com',     'dev1234',   role='developer')
+dev_james    = create_user('dev_james',    'dev_james@example.com',    'dev1234',   role='developer')
+dev_lisa     = create_user('dev_lisa',     'dev_lisa@example.com',     'dev1234',   role='developer')
+dev_paul     = create_user('dev_paul',     'dev_paul@example.com',     'dev1234',   role='developer')
+dev_karen    = create_user('dev_karen',    'dev_karen@example.com',    'dev1234',   role='developer')
+dev_tom      = create_user('dev_tom',      'dev_tom@example.com',      'dev1234',   role='developer')
+dev_linda    = create_user('dev_linda',    'dev_linda@example.com',    'dev1234',   role='developer')
 
 # Testers
-tester_emma  = User.objects.create_user('tester_emma',  'tester_emma@example.com',  'test1234',  role='tester')
-tester_raj   = User.objects.create_user('tester_raj',   'tester_raj@example.com',   'test1234',  role='tester')
-tester_aly   = User.objects.create_user('tester_aly',   'tester_aly@example.com',   'test1234',  role='tester')
-tester_mia   = User.objects.create_user('tester_mia',   'tester_mia@example.com',   'test1234',  role='tester')
+tester_emma  = create_user('tester_emma',  'tester_emma@example.com',  'test1234',  role='tester')
+tester_raj   = create_user('tester_raj',   'tester_raj@example.com',   'test1234',  role='tester')
+tester_aly   = create_user('tester_aly',   'tester_aly@example.com',   'test1234',  role='tester')
+tester_mia   = create_user('tester_mia',   'tester_mia@example.com',   'test1234',  role='tester')
 
 # Customers
-cust_bob     = User.objects.create_user('cust_bob',     'cust_bob@example.com',     'cust1234',  role='customer')
-cust_anna    = User.objects.create_user('cust_anna',    'cust_anna@example.com',    'cust1234',  role='customer')
+cust_bob     = create_user('cust_bob',     'cust_bob@example.com',     'cust1234',  role='customer')
+cust_anna    = create_user('cust_anna',    'cust_anna@example.com',    'cust1234',  role='customer')
+
+User.objects.bulk_create(users)
 
 # --- Create Projects ---
 project_alpha = Project.objects.create(
@@ -92,8 +115,15 @@ assignments = [
     (team_gamma_2, [tm_bob,   lead_brian, dev_linda, tester_emma]),
     (team_gamma_3, [lead_chris, dev_paul, tester_raj]),
 ]
-for team, members in assignments:
-    team.members.set(members)
+# Team managers are attached as managers, everyone else as members
+Team.managers.through.objects.bulk_create([
+    Team.managers.through(team=team, user=user)
+    for team, members in assignments for user in members if user.role == 'team_manager'
+])
+Team.members.through.objects.bulk_create([
+    Team.members.through(team=team, user=user)
+    for team, members in assignments for user in members if user.role != 'team_manager'
+])
 
 # --- Create Bugs ---
 bugs = [
@@ -114,17 +144,28 @@ bugs = [
     ("Data export CSV broken",         "Exported CSV files are empty.", "open",        "critical", tester_aly,   dev_tom,   project_gamma, team_gamma_1),
     ("Login rate limit not working",    "Too many login attempts allowed.", "resolved",     "medium",   tester_raj,   dev_linda, project_gamma, team_gamma_2),
 ]
-for title, desc, status, priority, rep, assignee, proj, team in bugs:
-    Bug.objects.create(
-        title=title,
-        description=desc,
-        status=status,
-        priority=priority,
-        reported_by=rep,
-        assigned_to=assignee,
-        project=proj,
-        team=team,
-        created_at=now()
-    )
+created_at = now()
+with transaction.atomic():
+    created = Bug.objects.bulk_create([
+        Bug(
+            title=title,
+            description=desc,
+            status=status,
+            priority=priority,
+            reported_by=rep,
+            assigned_to=assignee,
+            project=proj,
+            team=team,
+            created_at=created_at
+        )
+        for title, desc, status, priority, rep, assignee, proj, team in bugs
+    ])
+    # bulk_create skips the signals, so log the creations and rebuild the counters here
+    BugEvent.objects.bulk_create([
+        BugEvent(bug=bug, actor=bug.reported_by, field='created', created_at=created_at) for bug in created
+    ])
+stats.rebuild()
+analytics.sync(full=True)
+cache.clear()
 
 print("✅ Seed data successfully inserted!")
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Team, Project, Bug
+from .models import User, Team, Project, Bug, OutboundEmail
+from .search import search_bugs
 
 # Custom UserAdmin with role and team fields shown in admin
 class CustomUserAdmin(UserAdmin):
@@ -27,6 +28,10 @@ class BugAdmin(admin.ModelAdmin):
     search_fields = ('title', 'description')
     raw_id_fields = ('reported_by', 'assigned_to')
 
+    def get_search_results(self, request, queryset, search_term):
+        # Same full-text index as the API's ?q= instead of icontains scans
+        return search_bugs(queryset, search_term), False
+
 # Team admin
 class TeamAdmin(admin.ModelAdmin):
     list_display = ('name', 'lead', 'project')
@@ -37,8 +42,15 @@ class ProjectAdmin(admin.ModelAdmin):
     list_display = ('name', 'manager', 'created_at')
     list_filter = ('manager',)
 
+# Outbox admin to inspect queued and failed mail
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'recipient', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('recipient',)
+
 # Register all models
 admin.site.register(User, CustomUserAdmin)
 admin.site.register(Team, TeamAdmin)
 admin.site.register(Project, ProjectAdmin)
 admin.site.register(Bug, BugAdmin)
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
@@ -0,0 +1,235 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F, Max, Sum, Window
+from django.db.models.functions import Coalesce, TruncWeek
+from django.utils import timezone
+
+from .models import Bug, BugDailyRollup, BugEvent, BugLifecycle
+from .response_cache import bump
+from .visibility import filter_visible, visible_project_ids, visible_team_ids
+
+DONE_STATUSES = ['resolved', 'closed']
+
+# Re-read bugs updated shortly before the watermark: a transaction that
+# committed late may carry an older updated_at. Re-syncing is a no-op diff.
+SYNC_OVERLAP = timedelta(minutes=5)
+
+
+# ----------------------------
+# Lifecycle Facts
+# ----------------------------
+def resolved_times(bug_ids):
+    """
+    {bug_id: when it last moved into a done status}, from the history log.
+    """
+    rows = (
+        BugEvent.objects.filter(bug_id__in=bug_ids, field='status', new__in=DONE_STATUSES)
+        .exclude(old__in=DONE_STATUSES)
+        .order_by().values('bug_id').annotate(at=Max('created_at'))
+    )
+    return {row['bug_id']: row['at'] for row in rows}
+
+
+def lifecycle(bug, resolved_at):
+    """
+    Unsaved BugLifecycle for a bug row (a dict from Bug.objects.values()).
+    Bugs resolved before history was logged fall back to their updated_at.
+    """
+    facts = BugLifecycle(
+        bug_id=bug['id'], project_id=bug['project_id'], team_id=bug['team_id'],
+        created_on=timezone.localdate(bug['created_at']), synced_at=bug['updated_at'],
+    )
+    if bug['status'] in DONE_STATUSES:
+        resolved_at = resolved_at or bug['updated_at']
+        facts.resolved_on = timezone.localdate(resolved_at)
+        facts.resolution_seconds = max(0, int((resolved_at - bug['created_at']).total_seconds()))
+    return facts
+
+
+def contributions(facts):
+    """
+    {(day, project_id, team_id, metric): amount} that one bug adds to the rollups.
+    """
+    if facts is None:
+        return Counter()
+    result = Counter({(facts.created_on, facts.project_id, facts.team_id, 'created'): 1})
+    if facts.resolved_on is not None:
+        key = (facts.resolved_on, facts.project_id, facts.team_id)
+        result[(*key, 'resolved')] += 1
+        result[(*key, 'resolution_seconds')] += facts.resolution_seconds
+    return result
+
+
+def apply_deltas(deltas):
+    """
+    Apply {(day, project_id, team_id, metric): delta} to BugDailyRollup with
+    one UPDATE ... SET col = col + delta per existing row and one INSERT for
+    the rest.
+    """
+    rows = defaultdict(dict)
+    for (day, project_id, team_id, metric), delta in deltas.items():
+        if delta:
+            rows[(day, project_id, team_id)][metric] = delta
+
+    existing = set(
+        BugDailyRollup.objects.filter(day__in={day for day, _, _ in rows})
+        .values_list('day', 'project_id', 'team_id')
+    )
+    missing = []
+    for (day, project_id, team_id), changes in rows.items():
+        filters = {'day': day, 'project_id': project_id, 'team_id': team_id}
+        if (day, project_id, team_id) not in existing:
+            # A backfill creates most of its rows; one INSERT covers them
+            missing.append(BugDailyRollup(**filters, **changes))
+            continue
+        BugDailyRollup.objects.filter(**filters).update(
+            **{metric: F(metric) + delta for metric, delta in changes.items()}
+        )
+    BugDailyRollup.objects.bulk_create(missing, batch_size=1000)
+
+
+# ----------------------------
+# Incremental Sync
+# ----------------------------
+def sync(batch_size=1000, full=False):
+    """
+    Fold bugs changed since the last run into BugDailyRollup. Returns the
+    number of bugs looked at. `full` drops everything and starts over,
+    e.g. after bulk SQL that did not touch updated_at.
+    """
+    if full:
+        with transaction.atomic():
+            BugDailyRollup.objects.all().delete()
+            BugLifecycle.objects.all().delete()
+
+    watermark = BugLifecycle.objects.aggregate(latest=Max('synced_at'))['latest']
+    changed = Bug.objects.order_by('id').values('id', 'project_id', 'team_id', 'status', 'created_at', 'updated_at')
+    if watermark is not None:
+        changed = changed.filter(updated_at__gte=watermark - SYNC_OVERLAP)
+
+    seen = 0
+    rows = changed.iterator(chunk_size=batch_size)
+    while batch := list(islice(rows, batch_size)):
+        sync_batch(batch)
+        seen += len(batch)
+
+    if watermark is not None:
+        forget_deleted(watermark - SYNC_OVERLAP)
+    bump('analytics')
+    return seen
+
+
+def sync_batch(bugs):
+    ids = [bug['id'] for bug in bugs]
+    with transaction.atomic():
+        old = BugLifecycle.objects.in_bulk(ids)
+        resolved = resolved_times(ids)
+        new = [lifecycle(bug, resolved.get(bug['id'])) for bug in bugs]
+
+        deltas = Counter()
+        for facts in new:
+            deltas.update(contributions(facts))
+            deltas.subtract(contributions(old.get(facts.bug_id)))
+        apply_deltas(deltas)
+
+        BugLifecycle.objects.bulk_create(
+            new, update_conflicts=True, unique_fields=['bug'],
+            update_fields=['project', 'team', 'created_on', 'resolved_on', 'resolution_seconds', 'synced_at'],
+        )
+
+
+def forget_deleted(since):
+    bug_ids = BugEvent.objects.filter(field='deleted', created_at__gte=since).values_list('bug_id', flat=True)
+    with transaction.atomic():
+        gone = list(BugLifecycle.objects.filter(bug_id__in=list(bug_ids)).exclude(bug_id__in=Bug.objects.values('id')))
+        deltas = Counter()
+        for facts in gone:
+            deltas.subtract(contributions(facts))
+        apply_deltas(deltas)
+        BugLifecycle.objects.filter(pk__in=[facts.pk for facts in gone]).delete()
+
+
+# ----------------------------
+# Queries
+# ----------------------------
+def rollups_for(user):
+    """
+    The rollup rows a manager may chart, mirroring project/team visibility.
+    """
+    role = user.role
+    rollups = BugDailyRollup.objects.all()
+    if role in ['engineering_manager', 'product_manager']:
+        return filter_visible(rollups, visible_project_ids(user), 'project_id')
+    elif role in ['team_manager', 'team_lead']:
+        return filter_visible(rollups, visible_team_ids(user), 'team_id')
+    return rollups.none()
+
+
+def burndown(rollups, since, until):
+    """
+    Open bugs at the end of each day in [since, until], with that day's
+    created and resolved counts. A running SUM() OVER (ORDER BY day) walks
+    the window; everything before `since` collapses into one opening total.
+    """
+    opening = rollups.filter(day__lt=since).aggregate(
+        open=Coalesce(Sum(F('created') - F('resolved')), 0)
+    )['open']
+    daily = (
+        rollups.filter(day__gte=since, day__lte=until)
+        .annotate(
+            # RANGE frame: every rollup row of a day sees the whole day's total
+            open=Window(Sum(F('created') - F('resolved')), order_by=F('day').asc()),
+            day_created=Window(Sum('created'), partition_by=[F('day')]),
+            day_resolved=Window(Sum('resolved'), partition_by=[F('day')]),
+        )
+        .values_list('day', 'open', 'day_created', 'day_resolved')
+    )
+    rows = {day: (open_count, created, resolved) for day, open_count, created, resolved in daily}
+
+    series, open_count, day = [], 0, since
+    while day <= until:
+        open_count, created, resolved = rows.get(day, (open_count, 0, 0))
+        series.append({'day': day, 'open': opening + open_count, 'created': created, 'resolved': resolved})
+        day += timedelta(days=1)
+    return series
+
+
+def throughput(rollups, since, until):
+    """
+    Bugs created and resolved per ISO week (date_trunc('week')).
+    """
+    rows = (
+        rollups.filter(day__gte=since, day__lte=until).order_by()
+        .annotate(week=TruncWeek('day')).values('week')
+        .annotate(created=Sum('created'), resolved=Sum('resolved'))
+        .order_by('week')
+    )
+    return [{'week': row['week'], 'created': row['created'], 'resolved': row['resolved']} for row in rows]
+
+
+def mean_time_to_resolve(rollups, since, until):
+    """
+    Mean hours from report to resolution for bugs resolved in [since, until],
+    overall and per team.
+    """
+    rows = (
+        rollups.filter(day__gte=since, day__lte=until, resolved__gt=0).order_by()
+        .values('team_id').annotate(resolved_total=Sum('resolved'), seconds=Sum('resolution_seconds'))
+    )
+
+    def hours(seconds, count):
+        return round(seconds / count / 3600, 2) if count else None
+
+    teams = sorted(rows, key=lambda row: (row['team_id'] is None, row['team_id']))
+    resolved = sum(row['resolved_total'] for row in teams)
+    return {
+        'resolved': resolved,
+        'mttr_hours': hours(sum(row['seconds'] for row in teams), resolved),
+        'teams': [
+            {'team': row['team_id'], 'resolved': row['resolved_total'], 'mttr_hours': hours(row['seconds'], row['resolved_total'])}
+            for row in teams
+        ],
+    }
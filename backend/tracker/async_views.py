@@ -0,0 +1,121 @@
+from functools import update_wrapper
+from inspect import isawaitable, iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+
+
+async def aauthenticate(request):
+    """
+    Request._authenticate() for async views. Authenticators with an
+    `aauthenticate` coroutine run on the event loop; others in a thread.
+    """
+    for authenticator in request.authenticators:
+        authenticate = getattr(authenticator, 'aauthenticate', None) or sync_to_async(authenticator.authenticate)
+        try:
+            user_auth_tuple = await authenticate(request)
+        except exceptions.APIException:
+            request._not_authenticated()
+            raise
+
+        if user_auth_tuple is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth_tuple
+            return
+
+    request._not_authenticated()
+
+
+# ----------------------------
+# Async Dispatch
+# ----------------------------
+class AsyncViewMixin:
+    """
+    APIView/ViewSet mixin serving `async def` handlers on the event loop.
+
+    DRF's dispatch is synchronous, so requests for async handlers go through
+    adispatch() instead: authentication is awaited up front, and the rest of
+    initial() (permissions, throttles, negotiation) then runs on the loop as
+    plain CPU work. Sync actions of a viewset keep the regular dispatch and
+    run in a worker thread, exactly as Django runs any sync view under ASGI.
+    """
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs) if actions is not None else super().as_view(**initkwargs)
+        if actions is None:
+            # Plain APIViews: Django already marks the view async when every handler is
+            return view
+
+        async_methods = {
+            method for method, action in actions.items()
+            if iscoroutinefunction(getattr(cls, action, None))
+        }
+        if not async_methods:
+            return view
+        if 'get' in async_methods and 'head' not in actions:
+            # ViewSet.as_view answers HEAD with the GET handler
+            async_methods.add('head')
+
+        async def async_view(request, *args, **kwargs):
+            if request.method.lower() in async_methods:
+                return await view(request, *args, **kwargs)
+            return await sync_to_async(view)(request, *args, **kwargs)
+
+        # Keep .cls/.initkwargs/.actions for the router and schema generation
+        update_wrapper(async_view, view)
+        return csrf_exempt(async_view)
+
+    def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if self.view_is_async or iscoroutinefunction(handler):
+            return self.adispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await aauthenticate(request)
+            self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    # ----------------------------
+    # Async GenericAPIView helpers
+    # ----------------------------
+    async def afilter_queryset(self, queryset):
+        # Filter backends may validate params against the DB (e.g. ModelChoiceFilter)
+        return await sync_to_async(self.filter_queryset)(queryset)
+
+    async def aget_object(self, queryset=None):
+        queryset = await self.afilter_queryset(queryset if queryset is not None else self.get_queryset())
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+        self.check_object_permissions(self.request, obj)
+        return obj
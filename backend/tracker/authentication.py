@@ -0,0 +1,100 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+# Claims copied from the user row into every access token, keyed by field attname
+CLAIM_FIELDS = ['username', 'role', 'team_id', 'is_superuser']
+
+STALE_CLAIMS_KEY = 'auth:claims-stale:{}'
+
+
+def add_user_claims(token, user):
+    """
+    Embed the fields get_queryset and the permission matrix read into `token`.
+    """
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    # Claims are only trusted while the user's marker exists; 0 means nothing is stale yet
+    cache.add(STALE_CLAIMS_KEY.format(user.pk), 0, timeout=api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    return token
+
+
+def invalidate_user_claims(user_id):
+    """
+    Mark tokens issued for `user_id` until now as stale. The marker only has to
+    outlive the access tokens it covers; refreshed tokens carry fresh claims.
+    """
+    lifetime = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    cache.set(STALE_CLAIMS_KEY.format(user_id), time.time(), timeout=lifetime)
+
+
+def is_stale(token, stale_since):
+    # No marker: flushed or evicted, so a deactivation or role change may have been lost
+    return stale_since is None or token['iat'] <= stale_since
+
+
+def claims_are_stale(token):
+    return is_stale(token, cache.get(STALE_CLAIMS_KEY.format(token[api_settings.USER_ID_CLAIM])))
+
+
+async def aclaims_are_stale(token):
+    return is_stale(token, await cache.aget(STALE_CLAIMS_KEY.format(token[api_settings.USER_ID_CLAIM])))
+
+
+def user_from_claims(token):
+    """
+    Build a `User` from token claims without touching the database.
+
+    Every other field is deferred, so reading one loads it on demand and
+    `save()` only writes the fields that were actually loaded or set.
+    """
+    User = get_user_model()
+    claims = {
+        'id': int(token[api_settings.USER_ID_CLAIM]),
+        'is_active': True,
+        **{field: token[field] for field in CLAIM_FIELDS},
+    }
+    field_names = [f.attname for f in User._meta.concrete_fields if f.attname in claims]
+    return User.from_db(DEFAULT_DB_ALIAS, field_names, [claims[name] for name in field_names])
+
+
+# ----------------------------
+# Stateless JWT Authentication
+# ----------------------------
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that trusts role/team claims instead of loading the
+    user row on every request. Tokens without claims, whose claims were
+    invalidated by a role/team/active change, or whose marker was lost from
+    the cache, fall back to the database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if self.needs_database(validated_token) or claims_are_stale(validated_token):
+            return super().get_user(validated_token)
+        return user_from_claims(validated_token)
+
+    def needs_database(self, validated_token):
+        return any(field not in validated_token for field in CLAIM_FIELDS)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views: only the database fallback leaves the event loop.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if self.needs_database(validated_token) or await aclaims_are_stale(validated_token):
+            return await sync_to_async(super().get_user)(validated_token), validated_token
+        return user_from_claims(validated_token), validated_token
@@ -0,0 +1,240 @@
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
+
+from . import history, realtime, stats
+from .models import Bug, Project, Team, User
+from .response_cache import bug_change_scopes, bump
+
+
+# ----------------------------
+# Bulk Import
+# ----------------------------
+class BugImportRowSerializer(serializers.Serializer):
+    """
+    Shape checks for one imported bug. Foreign keys are plain ids here and are
+    resolved per batch by BugImporter, so validating a row costs no queries.
+    """
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField()
+    status = serializers.ChoiceField(choices=Bug.STATUS_CHOICES, default='open')
+    priority = serializers.ChoiceField(choices=Bug.PRIORITY_CHOICES, default='medium')
+    project = serializers.IntegerField()
+    team = serializers.IntegerField(required=False, allow_null=True)
+    assigned_to = serializers.IntegerField(required=False, allow_null=True)
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+class BugImporter:
+    """
+    Validates and inserts imported bugs for `user` in batches: one query per
+    referenced model to resolve ids, then a single bulk_create per batch.
+    Rows that fail validation are reported and skipped.
+    """
+
+    def __init__(self, user, batch_size):
+        self.user = user
+        self.batch_size = batch_size
+        self.created_ids = []
+        self.errors = []
+
+    def run(self, rows):
+        offset = 0
+        for batch in batched(rows, self.batch_size):
+            self.import_batch(batch, offset)
+            offset += len(batch)
+        self.errors.sort(key=lambda error: error['row'])
+        return {'created': len(self.created_ids), 'ids': self.created_ids, 'errors': self.errors}
+
+    def import_batch(self, batch, offset):
+        valid = []
+        for index, row in enumerate(batch, start=offset):
+            if isinstance(row, Exception):
+                self.errors.append({'row': index, 'errors': {'non_field_errors': [str(row)]}})
+                continue
+            if not isinstance(row, dict):
+                self.errors.append({'row': index, 'errors': {'non_field_errors': ['Expected a JSON object.']}})
+                continue
+            serializer = BugImportRowSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                self.errors.append({'row': index, 'errors': serializer.errors})
+
+        if not valid:
+            return
+
+        references = self.load_references([data for _, data in valid])
+        bugs = []
+        for index, data in valid:
+            errors = self.check_references(data, references)
+            if errors:
+                self.errors.append({'row': index, 'errors': errors})
+                continue
+            bugs.append(Bug(
+                title=data['title'],
+                description=data['description'],
+                status=data['status'],
+                priority=data['priority'],
+                project_id=data['project'],
+                team_id=data.get('team'),
+                assigned_to_id=data.get('assigned_to'),
+                reported_by=self.user,
+            ))
+
+        if bugs:
+            self.insert(bugs)
+
+    def load_references(self, rows):
+        project_ids = {row['project'] for row in rows}
+        team_ids = {row['team'] for row in rows if row.get('team') is not None}
+        assignee_ids = {row['assigned_to'] for row in rows if row.get('assigned_to') is not None}
+        return {
+            'projects': set(Project.objects.filter(id__in=project_ids).values_list('id', flat=True)),
+            'teams': set(Team.objects.filter(id__in=team_ids).values_list('id', flat=True)) if team_ids else set(),
+            # developer id -> team id, for the "assign within your team" rule
+            'developers': dict(
+                User.objects.filter(id__in=assignee_ids, role='developer').values_list('id', 'team_id')
+            ) if assignee_ids else {},
+        }
+
+    def check_references(self, row, references):
+        # Same messages and rules as BugSerializer fields and BugViewSet.perform_create
+        errors = {}
+        if row['project'] not in references['projects']:
+            errors['project'] = [f'Invalid pk "{row["project"]}" - object does not exist.']
+        team = row.get('team')
+        if team is not None and team not in references['teams']:
+            errors['team'] = [f'Invalid pk "{team}" - object does not exist.']
+
+        assigned_to = row.get('assigned_to')
+        if assigned_to is not None:
+            role = self.user.role
+            if assigned_to not in references['developers']:
+                errors['assigned_to'] = [f'Invalid pk "{assigned_to}" - object does not exist.']
+            elif role == 'customer':
+                errors['assigned_to'] = ['Customers cannot assign bugs.']
+            elif role in ['team_lead', 'team_manager'] and references['developers'][assigned_to] != self.user.team_id:
+                errors['assigned_to'] = ['Can only assign within your team.']
+        return errors
+
+    def insert(self, bugs):
+        # bulk_create sends no signals, so counters, history and caches are updated here
+        with transaction.atomic():
+            created = Bug.objects.bulk_create(bugs, batch_size=self.batch_size)
+            states = [bug.tracked_values() for bug in created]
+            stats.apply_deltas(Counter(stats.bucket(state) for state in states))
+            events = [history.change_events(bug.pk, {}, state) for bug, state in zip(created, states)]
+            history.record([event for bug_events in events for event in bug_events], batch_size=self.batch_size)
+            realtime.publish([
+                realtime.change_message(bug.pk, {}, state, bug_events)
+                for bug, state, bug_events in zip(created, states, events)
+            ])
+        bump(*bug_change_scopes(*states))
+        self.created_ids.extend(bug.pk for bug in created)
+
+
+# ----------------------------
+# Bulk Update
+# ----------------------------
+class BugBulkFilterSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Bug.STATUS_CHOICES, required=False)
+    priority = serializers.ChoiceField(choices=Bug.PRIORITY_CHOICES, required=False)
+    project = serializers.IntegerField(required=False)
+    team = serializers.IntegerField(required=False, allow_null=True)
+    assigned_to = serializers.IntegerField(required=False, allow_null=True)
+
+
+class BugBulkChangesSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Bug.STATUS_CHOICES, required=False)
+    priority = serializers.ChoiceField(choices=Bug.PRIORITY_CHOICES, required=False)
+    assigned_to = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(role='developer'), required=False, allow_null=True
+    )
+    team = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all(), required=False, allow_null=True)
+
+
+class BugBulkUpdateSerializer(serializers.Serializer):
+    """
+    {"ids": [...]} or {"filter": {...}}, plus the {"changes": {...}} to apply.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    filter = BugBulkFilterSerializer(required=False)
+    changes = BugBulkChangesSerializer()
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Provide exactly one of 'ids' or 'filter'.")
+        if not attrs['changes']:
+            raise serializers.ValidationError({'changes': ['No changes given.']})
+        return attrs
+
+
+def permitted_changes(user, changes):
+    """
+    Apply the field restrictions of BugSerializer.update / BugViewSet.perform_update.
+    """
+    if user.role == 'developer':
+        if set(changes) - {'status'}:
+            raise PermissionDenied("Developers can only update bug status.")
+    elif user.role in ['team_lead', 'team_manager']:
+        changes = {k: v for k, v in changes.items() if k in ['status', 'priority']}
+    return changes
+
+
+def bulk_update_bugs(queryset, changes):
+    """
+    Apply `changes` to every bug in `queryset` with one UPDATE ... WHERE id IN (...)
+    and keep BugStats and the response cache consistent. Returns (matched, updated).
+    """
+    values = {
+        f'{field}_id' if field in ['assigned_to', 'team'] else field: getattr(value, 'pk', value)
+        for field, value in changes.items()
+    }
+    group_fields = stats.BUCKET_FIELDS + ['assigned_to_id', 'reported_by_id']
+
+    with transaction.atomic():
+        # Old values of the changed fields, per bug, for the history log and change feed
+        rows = list(queryset.select_for_update().values('id', *dict.fromkeys([*realtime.SCOPE_FIELDS, *values])))
+        if not rows:
+            return 0, 0
+        ids = [row['id'] for row in rows]
+        # One grouped read gives the old counter buckets and cache scopes
+        groups = list(
+            Bug.objects.filter(id__in=ids).order_by().values(*group_fields).annotate(total=Count('id'))
+        )
+        updated = Bug.objects.filter(id__in=ids).update(updated_at=timezone.now(), **values)
+
+        deltas = Counter()
+        states = []
+        for group in groups:
+            total = group.pop('total')
+            after = {**group, **values}
+            deltas[stats.bucket(group)] -= total
+            deltas[stats.bucket(after)] += total
+            states += [group, after]
+        stats.apply_deltas(deltas)
+
+        now = timezone.now()
+        events = [
+            history.change_events(row['id'], {field: row[field] for field in values}, values, at=now) for row in rows
+        ]
+        history.record([event for bug_events in events for event in bug_events], batch_size=settings.BUG_BULK_BATCH_SIZE)
+        realtime.publish([
+            realtime.change_message(row.pop('id'), row, {**row, **values}, bug_events)
+            for row, bug_events in zip(rows, events)
+        ])
+
+    bump(*bug_change_scopes(*states))
+    return len(ids), updated
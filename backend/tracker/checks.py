@@ -0,0 +1,40 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries no other process can see (or that keep nothing at all)
+PROCESS_LOCAL_CACHES = [
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+]
+
+
+def shared_state_caches():
+    """
+    {cache alias: what it carries} for the state every process must see:
+    a write handled by one worker (or by admin, or a management command)
+    has to reach all the others.
+    """
+    purposes = defaultdict(list)
+    purposes['default'] += ['stale token claim markers', 'visibility sets']
+    purposes[settings.RESPONSE_CACHE_ALIAS].append('response cache versions (ETags)')
+    return {alias: ', '.join(items) for alias, items in purposes.items()}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Deployment check, also run by gunicorn before it forks workers.
+    """
+    errors = []
+    for alias, purpose in shared_state_caches().items():
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in PROCESS_LOCAL_CACHES:
+            errors.append(Error(
+                f"CACHES['{alias}'] uses {backend}, so {purpose} written by one process "
+                f"never reach the others.",
+                hint='Set CACHE_BACKEND/CACHE_LOCATION to a shared cache such as Redis.',
+                id='tracker.E001',
+            ))
+    return errors
@@ -0,0 +1,77 @@
+def parse_fieldset(query_params):
+    """
+    Read ?fields=, ?omit= and ?expand= (comma-separated field names) into
+    serializer kwargs. `fields` stays None when absent, meaning "all".
+    """
+    def names(param):
+        value = query_params.get(param)
+        if value is None:
+            return None
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    return {'fields': names('fields'), 'omit': names('omit') or [], 'expand': names('expand') or []}
+
+
+# ----------------------------
+# Dynamic Fields Serializer Mixin
+# ----------------------------
+class DynamicFieldsMixin:
+    """
+    Serializer mixin accepting `fields`, `omit` and `expand` kwargs.
+
+    Meta.expandable maps a field name to a factory for the richer field it
+    becomes when expanded (e.g. an id becoming a nested object).
+    Meta.deferrable lists model columns to leave out of the query when
+    their field is not selected. Each serializer's setup_eager_loading()
+    takes the selected names so it only joins and prefetches what renders.
+    """
+
+    def __init__(self, *args, fields=None, omit=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.selected_fields(fields, omit)
+        for name in set(self.fields) - selected:
+            self.fields.pop(name)
+
+        expandable = getattr(self.Meta, 'expandable', {})
+        for name in expand or []:
+            if name in expandable and name in self.fields:
+                self.fields[name] = expandable[name]()
+
+    @classmethod
+    def selected_fields(cls, fields=None, omit=None):
+        names = set(cls.Meta.fields)
+        if fields is not None:
+            names &= set(fields)
+        return names - set(omit or [])
+
+    @classmethod
+    def defer_unselected(cls, queryset, fields):
+        deferred = [name for name in getattr(cls.Meta, 'deferrable', []) if name not in fields]
+        return queryset.defer(*deferred) if deferred else queryset
+
+
+class DynamicFieldsViewMixin:
+    """
+    Viewset mixin passing ?fields=/?omit=/?expand= to the serializer on
+    read actions. get_queryset can hand `selected_fields` and
+    `fieldset['expand']` to setup_eager_loading().
+    """
+    fieldset_actions = ['list', 'retrieve']
+
+    @property
+    def fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            if self.action in self.fieldset_actions:
+                self._fieldset = parse_fieldset(self.request.query_params)
+            else:
+                self._fieldset = {'fields': None, 'omit': [], 'expand': []}
+        return self._fieldset
+
+    @property
+    def selected_fields(self):
+        return self.get_serializer_class().selected_fields(self.fieldset['fields'], self.fieldset['omit'])
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.fieldset_actions:
+            kwargs = {**self.fieldset, **kwargs}
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,120 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import BugEvent
+
+# Bug fields whose changes are logged, by attname; events name them without `_id`
+AUDITED_FIELDS = ['status', 'priority', 'assigned_to_id', 'team_id', 'project_id']
+
+PARTITION_PREFIX = 'tracker_bugevent_p'
+
+_actor_id = ContextVar('bug_event_actor_id', default=None)
+
+
+@contextmanager
+def acting_as(user):
+    """
+    Attribute bug events written inside the block to `user`.
+    """
+    token = _actor_id.set(getattr(user, 'pk', user))
+    try:
+        yield
+    finally:
+        _actor_id.reset(token)
+
+
+def as_text(value):
+    return None if value is None else str(value)
+
+
+def change_events(bug_id, previous, current, at=None):
+    """
+    BugEvents for a bug moving from `previous` to `current` ({attname: value});
+    either may be empty for a create or delete. Only fields present in both
+    are compared, so partial states (e.g. a bulk delta) work too.
+    """
+    at = at or timezone.now()
+    actor_id = _actor_id.get()
+    if not previous or not current:
+        field = 'created' if current else 'deleted'
+        return [BugEvent(bug_id=bug_id, actor_id=actor_id, field=field, created_at=at)]
+
+    return [
+        BugEvent(
+            bug_id=bug_id, actor_id=actor_id, field=field.removesuffix('_id'),
+            old=as_text(previous[field]), new=as_text(current[field]), created_at=at,
+        )
+        for field in AUDITED_FIELDS
+        if field in previous and field in current and previous[field] != current[field]
+    ]
+
+
+def record(events, batch_size=None):
+    # One INSERT for all the fields a write touched; the events come back with their ids
+    if events:
+        BugEvent.objects.bulk_create(events, batch_size=batch_size)
+    return events
+
+
+def record_change(bug_id, previous, current):
+    return record(change_events(bug_id, previous, current))
+
+
+# ----------------------------
+# Monthly Partitions (PostgreSQL)
+# ----------------------------
+def add_months(year, month, count):
+    index = year * 12 + (month - 1) + count
+    return index // 12, index % 12 + 1
+
+
+def partition_name(year, month):
+    return f'{PARTITION_PREFIX}{year:04d}_{month:02d}'
+
+
+def month_bounds(year, month):
+    next_year, next_month = add_months(year, month, 1)
+    return (
+        datetime(year, month, 1, tzinfo=dt_timezone.utc),
+        datetime(next_year, next_month, 1, tzinfo=dt_timezone.utc),
+    )
+
+
+def existing_partitions():
+    """
+    {(year, month): table name} for the monthly partitions attached to tracker_bugevent.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = 'tracker_bugevent'::regclass"
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        suffix = name.removeprefix(PARTITION_PREFIX)
+        if name.startswith(PARTITION_PREFIX) and len(suffix) == 7:
+            partitions[int(suffix[:4]), int(suffix[5:])] = name
+    return partitions
+
+
+def create_partition(year, month):
+    start, end = month_bounds(year, month)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {partition_name(year, month)} PARTITION OF tracker_bugevent '
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+
+
+def drop_partition(name):
+    # Detach-then-drop is a catalog change: no row scan, however large the month
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE tracker_bugevent DETACH PARTITION {name}')
+        cursor.execute(f'DROP TABLE {name}')
@@ -0,0 +1,152 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import OutboundEmail
+
+COMPOSERS = {}
+
+
+def composer(kind):
+    """
+    Register a function turning an OutboundEmail of `kind` into an
+    EmailMessage, or None when there is nothing to send.
+    """
+    def register(func):
+        COMPOSERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, recipient, **payload):
+    if kind not in COMPOSERS:
+        raise ValueError(f'No composer registered for {kind!r}.')
+    return OutboundEmail.objects.create(kind=kind, recipient=recipient, payload=payload)
+
+
+# ----------------------------
+# Composers
+# ----------------------------
+@composer('message')
+def compose_message(outbound):
+    # Pre-rendered mail, e.g. bug assignment notifications
+    return EmailMessage(
+        outbound.payload['subject'], outbound.payload['body'],
+        settings.DEFAULT_FROM_EMAIL, [outbound.recipient],
+    )
+
+
+@composer('password_reset')
+def compose_password_reset(outbound):
+    # The account lookup happens here rather than in the request, so the
+    # endpoint's timing does not reveal whether the address is registered
+    user = get_user_model().objects.filter(email=outbound.recipient).first()
+    if user is None:
+        return None
+
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    token = default_token_generator.make_token(user)
+    reset_url = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}/"
+
+    subject = "Password Reset Requested"
+    message = (
+        f"Hi {user.get_full_name() or user.email},\n\n"
+        f"Click the link below to reset your password:\n\n{reset_url}\n\n"
+        "If you didn’t request this, just ignore this email."
+    )
+    return EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [outbound.recipient])
+
+
+# ----------------------------
+# Delivery
+# ----------------------------
+def retry_delay(attempts):
+    return timedelta(seconds=settings.OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1))
+
+
+def deliver_batch(batch_size, connection=None):
+    """
+    Send up to `batch_size` due emails over one SMTP connection. Rows are
+    claimed first and sent after that transaction commits, so no row lock
+    is held during SMTP I/O. Returns {status: count} for the batch.
+    """
+    connection = connection or get_connection()
+    counts = {'sent': 0, 'skipped': 0, 'retry': 0, 'failed': 0}
+
+    batch = claim(batch_size)
+    if not batch:
+        return counts
+
+    try:
+        connection.open()
+    except Exception as exc:
+        # SMTP is unreachable: every claimed email backs off as a failed attempt
+        for outbound in batch:
+            counts[fail(outbound, exc)] += 1
+        return counts
+
+    try:
+        for outbound in batch:
+            counts[deliver(outbound, connection)] += 1
+    finally:
+        connection.close()
+    return counts
+
+
+def claim(batch_size):
+    """
+    Lock due rows with SKIP LOCKED and lease them by pushing next_attempt_at
+    past OUTBOX_CLAIM_TIMEOUT, so other workers pass over them once this
+    commits. A worker that dies mid-batch leaves them due again later.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        OutboundEmail.objects.filter(pk__in=[outbound.pk for outbound in batch]).update(
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT),
+        )
+    return batch
+
+
+def deliver(outbound, connection):
+    try:
+        message = COMPOSERS[outbound.kind](outbound)
+        if message is not None:
+            message.connection = connection
+            message.send()
+    except Exception as exc:
+        return fail(outbound, exc)
+
+    outbound.attempts += 1
+    if message is None:
+        outbound.status = 'skipped'
+    else:
+        outbound.status = 'sent'
+        outbound.sent_at = timezone.now()
+    outbound.save(update_fields=['status', 'attempts', 'sent_at'])
+    return outbound.status
+
+
+def fail(outbound, exc):
+    outbound.attempts += 1
+    outbound.last_error = f'{type(exc).__name__}: {exc}'
+    if outbound.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        outbound.status = outcome = 'failed'
+    else:
+        outbound.next_attempt_at = timezone.now() + retry_delay(outbound.attempts)
+        outcome = 'retry'
+
+    outbound.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error'])
+    return outcome
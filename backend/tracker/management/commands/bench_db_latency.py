@@ -0,0 +1,65 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+from tracker.models import Bug
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request database latency (connect + first queries) with a "
+        "fresh connection per request versus the configured persistent/pooled setup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Simulated requests per mode.')
+        parser.add_argument('--query', choices=['ping', 'bugs'], default='bugs',
+                            help="'ping' runs SELECT 1; 'bugs' reads one page of bugs.")
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        configured_max_age = settings_dict['CONN_MAX_AGE']
+        pooled = bool(settings_dict['OPTIONS'].get('pool'))
+        self.stdout.write(
+            f"{connection.vendor} at {settings_dict['HOST'] or 'local'}:{settings_dict['PORT'] or '-'}; "
+            f"CONN_MAX_AGE={configured_max_age}, CONN_HEALTH_CHECKS={settings_dict['CONN_HEALTH_CHECKS']}, "
+            f"pool={'on' if pooled else 'off'}, "
+            f"server-side cursors={'off' if settings_dict.get('DISABLE_SERVER_SIDE_CURSORS') else 'on'}"
+        )
+
+        modes = [('per-request', 0), ('configured', configured_max_age)]
+        try:
+            for name, max_age in modes:
+                settings_dict['CONN_MAX_AGE'] = max_age
+                connection.close()
+                timings = self.run(options['requests'], options['query'])
+                self.report(name, timings)
+        finally:
+            settings_dict['CONN_MAX_AGE'] = configured_max_age
+
+    def run(self, requests, query):
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            # The same hooks Django runs around every request: close_old_connections
+            # decides from CONN_MAX_AGE whether the connection survives.
+            request_started.send(sender=self.__class__)
+            if query == 'ping':
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            else:
+                list(Bug.objects.order_by('-created_at', '-id').values_list('id', 'title')[:50])
+            request_finished.send(sender=self.__class__)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def report(self, name, timings):
+        percentiles = statistics.quantiles(timings, n=100)
+        self.stdout.write(
+            f'{name:>11}: p50 {statistics.median(timings):8.2f} ms, '
+            f'p99 {percentiles[98]:8.2f} ms, mean {statistics.fmean(timings):8.2f} ms '
+            f'over {len(timings)} requests'
+        )
@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from tracker.models import Bug, User
+from tracker.visibility import visible_team_ids
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the legacy OR-of-querysets developer bug query with the UNION "
+        "formulation used by Bug.objects.visible_to(). Seed a large dataset first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Developer username to benchmark (defaults to the first developer).')
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per formulation.')
+        parser.add_argument('--explain', action='store_true', help='Also print both query plans.')
+
+    def handle(self, *args, **options):
+        developers = User.objects.filter(role='developer')
+        if options['user']:
+            developers = developers.filter(username=options['user'])
+        user = developers.order_by('id').first()
+        if user is None:
+            raise CommandError('No matching developer found.')
+
+        page_size = options['page_size']
+        plans = {
+            'or': self.legacy_queryset(user),
+            'union': Bug.objects.visible_to(user),
+        }
+
+        total = Bug.objects.count()
+        self.stdout.write(f'Bugs in table: {total}; developer: {user.username} (team_id={user.team_id})')
+
+        results = {}
+        for name, queryset in plans.items():
+            page = queryset.order_by('-created_at', '-id')[:page_size]
+            results[name] = [row.pk for row in page]
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                list(page.all())  # fresh queryset so nothing is served from the result cache
+                timings.append((time.perf_counter() - started) * 1000)
+
+            self.stdout.write(
+                f'{name:>5}: median {statistics.median(timings):8.2f} ms, '
+                f'max {max(timings):8.2f} ms over {len(timings)} runs'
+            )
+            if options['explain']:
+                analyze = connection.vendor == 'postgresql'
+                self.stdout.write(page.explain(analyze=True) if analyze else page.explain())
+
+        if results['or'] != results['union']:
+            raise CommandError('The two formulations returned different pages.')
+        self.stdout.write(self.style.SUCCESS('Both formulations returned identical pages.'))
+
+    def legacy_queryset(self, user):
+        # Same rule as visible_to(), built from the same team set, so the two
+        # formulations differ only in query shape. (The pre-visibility-set
+        # filter was team=user.team, which also matched team IS NULL bugs
+        # for a developer without a team.)
+        queryset = Bug.objects.all()
+        return queryset.filter(assigned_to=user) | queryset.filter(team_id__in=visible_team_ids(user))
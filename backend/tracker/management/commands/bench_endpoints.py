@@ -0,0 +1,270 @@
+import asyncio
+import json
+import statistics
+import time
+from contextlib import nullcontext
+from itertools import islice
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Exists, OuterRef
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, reverse
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from tracker import urls
+from tracker.authentication import add_user_claims
+from tracker.models import Bug, Team, User
+
+# One spec per named route in tracker.urls: who calls it, with what. `as` is
+# a role resolved by benchmark_context() (None for anonymous), `args` name
+# context objects for the URL kwargs, and `write` endpoints only run with
+# --writes, each call rolled back. A streamed body is read to the end, or
+# for only `max_chunks` chunks, giving up after STREAM_TIMEOUT seconds.
+ENDPOINTS = {
+    'api-root': {'as': 'developer'},
+    'current_user': {'as': 'developer'},
+    'bugs-list': {'as': 'developer'},
+    'bugs-detail': {'as': 'developer', 'args': ['bug']},
+    'bugs-history': {'as': 'developer', 'args': ['bug']},
+    # Live and endless under ASGI: time it up to the `retry:` and `ready` frames
+    'bugs-stream': {'as': 'developer', 'headers': {'HTTP_ACCEPT': 'text/event-stream'}, 'max_chunks': 2},
+    'bugs-export': {'as': 'team_lead', 'query': {'output': 'csv'}},
+    'bugs-similar': {'as': 'team_lead', 'query': {'title': 'Login crashes on mobile'}},
+    'bugs-bulk': {
+        'as': 'tester', 'method': 'post', 'write': True,
+        'body': lambda context: [
+            {'title': f'Imported bug {n}', 'description': 'Benchmark import.', 'priority': 'low',
+             'project': context['project'].pk, 'team': context['team'].pk}
+            for n in range(100)
+        ],
+    },
+    'bugs-bulk-update': {
+        'as': 'team_lead', 'method': 'post', 'write': True,
+        'body': lambda context: {'ids': context['bug_ids'], 'changes': {'priority': 'high'}},
+    },
+    'projects-list': {'as': 'team_manager'},
+    'projects-detail': {'as': 'team_manager', 'args': ['project']},
+    'projects-bugs': {'as': 'team_manager', 'args': ['project']},
+    'projects-stats': {'as': 'team_manager', 'args': ['project']},
+    'teams-list': {'as': 'team_lead'},
+    'teams-detail': {'as': 'team_lead', 'args': ['team']},
+    'teams-stats': {'as': 'team_lead', 'args': ['team']},
+    'users-list': {'as': 'product_manager'},
+    'users-detail': {'as': 'product_manager', 'args': ['team_lead']},
+    'analytics-burndown': {'as': 'product_manager'},
+    'analytics-throughput': {'as': 'product_manager'},
+    'analytics-mttr': {'as': 'product_manager'},
+    'token_obtain_pair': {
+        'as': None, 'method': 'post',
+        'body': lambda context: {'username': context['team_lead'].username, 'password': context['password']},
+    },
+    'token_refresh': {'as': None, 'method': 'post', 'body': lambda context: {'refresh': context['refresh']}},
+    'password_reset': {
+        'as': None, 'method': 'post', 'write': True,
+        'body': lambda context: {'email': context['team_lead'].email},
+    },
+}
+
+
+STREAM_TIMEOUT = 10
+
+
+def read_stream(response, max_chunks=None):
+    """
+    Read a streamed body as a client would, stopping after `max_chunks`
+    chunks. ASGI responses stream from an async iterator, read on an event
+    loop; raises TimeoutError if the body stalls for STREAM_TIMEOUT seconds.
+    """
+    if not response.is_async:
+        for _ in islice(response.streaming_content, max_chunks):
+            pass
+        response.close()
+        return
+
+    async def consume():
+        chunks = response.streaming_content
+        read = 0
+        try:
+            while max_chunks is None or read < max_chunks:
+                await asyncio.wait_for(anext(chunks), STREAM_TIMEOUT)
+                read += 1
+        except StopAsyncIteration:
+            pass
+        finally:
+            await chunks.aclose()
+
+    async_to_sync(consume)()
+
+
+def url_names(patterns=None):
+    """
+    Every named route under tracker.urls, format-suffix variants folded in.
+    """
+    names = set()
+    for pattern in urls.urlpatterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            names |= url_names(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def benchmark_context(password):
+    """
+    The objects the specs act on, picked from the busiest team so every
+    caller sees plenty of bugs: its lead, a team manager and a developer
+    on it, a tester who reported into it and its project's manager.
+    """
+    teams = Team.objects.annotate(bug_count=Count('bugs')).filter(bug_count__gt=0).order_by('-bug_count', 'id')
+    staffed = teams.filter(
+        *[Exists(User.objects.filter(team=OuterRef('pk'), role=role)) for role in ['team_manager', 'developer']],
+        lead__isnull=False,
+    )
+    team = staffed.first()
+    if team is None:
+        raise CommandError('No team with bugs, a lead, a team manager and a developer; run generate_data first.')
+
+    developer = (
+        User.objects.filter(role='developer', team=team).annotate(assigned=Count('assigned_bugs'))
+        .order_by('-assigned', 'id').first()
+    )
+    bugs = Bug.objects.filter(team=team).order_by('-id')
+    tester = User.objects.filter(role='tester', reported_bugs__team=team).first()
+    context = {
+        'team': team,
+        'project': team.project,
+        'bug': bugs.filter(assigned_to=developer).first() or bugs.first(),
+        'bug_ids': list(bugs.values_list('id', flat=True)[:100]),
+        'product_manager': team.project.manager or User.objects.filter(role='product_manager').first(),
+        'team_manager': team.user_set.filter(role='team_manager').first(),
+        'team_lead': team.lead,
+        'developer': developer,
+        'tester': tester or User.objects.filter(role='tester').first(),
+        'password': password,
+    }
+    context['refresh'] = str(RefreshToken.for_user(context['team_lead']))
+    return context
+
+
+class Command(BaseCommand):
+    help = (
+        'Time every tracker.urls endpoint with real JWT auth through the full middleware stack, '
+        'reporting p50/p95/p99 latency and queries per request. With --scales, regenerates the '
+        'dataset at each size first (this wipes tracker data).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests first (fills caches).')
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request.')
+        parser.add_argument('--writes', action='store_true', help='Include write endpoints (rolled back).')
+        parser.add_argument('--endpoints', nargs='+', choices=sorted(ENDPOINTS), help='Only these URL names.')
+        parser.add_argument('--scales', type=int, nargs='+', metavar='BUGS',
+                            help='Bug counts to generate and measure in turn, e.g. 10000 100000 1000000.')
+        parser.add_argument('--flush', action='store_true', help='Confirm --scales may delete existing data.')
+        parser.add_argument('--password', default='cbts1234', help='Password of the generated users.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--json', metavar='PATH', help='Also write the results to PATH, for comparing runs.')
+
+    def handle(self, *args, **options):
+        missing = url_names() - set(ENDPOINTS)
+        if missing:
+            raise CommandError(f"No benchmark spec for: {', '.join(sorted(missing))}")
+        if options['iterations'] < 2:
+            raise CommandError('Need at least 2 iterations for percentiles.')
+        if options['scales'] and not options['flush']:
+            raise CommandError('--scales regenerates the dataset; pass --flush to confirm.')
+
+        runs = []
+        for scale in options['scales'] or [None]:
+            if scale is not None:
+                self.stdout.write(f'Generating {scale} bugs...')
+                call_command(
+                    'generate_data', bugs=scale, users=max(200, scale // 50), projects=max(5, scale // 20_000),
+                    seed=options['seed'], password=options['password'], flush=True, stdout=self.stdout,
+                )
+            runs.append(self.run(options))
+
+        if options['json']:
+            with open(options['json'], 'w') as output:
+                json.dump(runs, output, indent=2)
+            self.stdout.write(f"Wrote {options['json']}")
+
+    def run(self, options):
+        context = benchmark_context(options['password'])
+        bug_count = Bug.objects.count()
+        self.stdout.write(
+            f"\n{connection.vendor}, {bug_count} bugs, {User.objects.count()} users, "
+            f"{'cold' if options['cold'] else 'warm'} cache, {options['iterations']} requests each"
+        )
+        self.stdout.write(f"{'endpoint':<22} {'as':<20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}  status")
+
+        results = []
+        for name in options['endpoints'] or ENDPOINTS:
+            spec = ENDPOINTS[name]
+            if spec.get('write') and not options['writes']:
+                continue
+            result = self.measure(name, spec, context, options)
+            results.append(result)
+            self.stdout.write(
+                f"{name:<22} {result['as'] or 'anonymous':<20} {result['p50']:8.2f} {result['p95']:8.2f} "
+                f"{result['p99']:8.2f} {result['queries']:8}  {'/'.join(map(str, result['status']))}"
+            )
+        return {'vendor': connection.vendor, 'bugs': bug_count, 'cold': options['cold'], 'results': results}
+
+    def measure(self, name, spec, context, options):
+        host = next((host for host in settings.ALLOWED_HOSTS if '*' not in host), 'localhost').lstrip('.')
+        headers = {'HTTP_HOST': host, **spec.get('headers', {})}
+        role = spec['as']
+        if role is not None:
+            user = context[role]
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {add_user_claims(AccessToken.for_user(user), user)}'
+
+        client = Client()
+        path = reverse(name, kwargs={'pk': context[arg].pk for arg in spec.get('args', [])})
+        method = spec.get('method', 'get')
+        body = spec['body'](context) if 'body' in spec else None
+
+        timings, queries, statuses = [], [], set()
+        for n in range(options['warmup'] + options['iterations']):
+            if options['cold']:
+                cache.clear()
+            with transaction.atomic() if spec.get('write') else nullcontext():
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    if method == 'get':
+                        response = client.get(path, spec.get('query', {}), **headers)
+                    else:
+                        response = client.post(path, json.dumps(body), content_type='application/json', **headers)
+                    if response.streaming:
+                        # Exports and streams do their work while the body is read
+                        try:
+                            read_stream(response, spec.get('max_chunks'))
+                        except TimeoutError:
+                            raise CommandError(f'{name}: no data for {STREAM_TIMEOUT}s; set max_chunks in its spec.')
+                    elapsed = (time.perf_counter() - started) * 1000
+                if spec.get('write'):
+                    transaction.set_rollback(True)
+
+            if n >= options['warmup']:
+                timings.append(elapsed)
+                queries.append(len(captured))
+                statuses.add(response.status_code)
+
+        percentiles = statistics.quantiles(timings, n=100)
+        return {
+            'endpoint': name,
+            'as': role,
+            'p50': statistics.median(timings),
+            'p95': percentiles[94],
+            'p99': percentiles[98],
+            'mean': statistics.fmean(timings),
+            'queries': max(queries),
+            'status': sorted(statuses),
+        }
@@ -0,0 +1,43 @@
+import timeit
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from tracker.models import User
+from tracker.permissions import (
+    IsProductManager, IsEngineeringManager, IsTeamLead, IsTeamManager,
+    IsDeveloper, IsTester, CombinedPermission, RolePermissionMixin,
+)
+
+
+class Command(BaseCommand):
+    help = 'Microbenchmark per-request permission overhead: CombinedPermission vs the compiled role matrix.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=200_000, help='Checks per measurement.')
+        parser.add_argument('--role', default='tester', choices=[role for role, _ in User.ROLE_CHOICES],
+                            help='Role of the simulated user; later roles in the old chains cost more.')
+
+    def handle(self, *args, **options):
+        user = User(username='bench', role=options['role'])
+        request = SimpleNamespace(user=user)
+        view = SimpleNamespace(action='retrieve', permission_scope='bugs')
+
+        def combined():
+            # What BugViewSet.get_permissions + check_object_permissions used to do
+            for permission in [CombinedPermission(
+                IsProductManager, IsEngineeringManager,
+                IsTeamManager, IsTeamLead, IsDeveloper, IsTester
+            )]:
+                permission.has_permission(request, view)
+                permission.has_object_permission(request, view, None)
+
+        def matrix():
+            for permission in RolePermissionMixin.get_permissions(view):
+                permission.has_permission(request, view)
+                permission.has_object_permission(request, view, None)
+
+        number = options['number']
+        for name, check in [('CombinedPermission', combined), ('role matrix', matrix)]:
+            best = min(timeit.repeat(check, number=number, repeat=5))
+            self.stdout.write(f'{name:>18}: {best / number * 1e9:8.0f} ns per request')
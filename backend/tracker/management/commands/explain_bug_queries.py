@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tracker.models import Bug, User
+
+
+ROLES = [role for role, _ in User.ROLE_CHOICES]
+
+
+class Command(BaseCommand):
+    help = "Print the query plan of each role's first bug list page (EXPLAIN ANALYZE on PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--role', action='append', choices=ROLES,
+                            help='Only explain these roles (repeatable). Defaults to all roles.')
+        parser.add_argument('--page-size', type=int, default=50,
+                            help='Rows fetched per page, matching the API page size.')
+
+    def handle(self, *args, **options):
+        analyze = connection.vendor == 'postgresql'
+        if not analyze:
+            self.stdout.write(self.style.WARNING(
+                f'{connection.vendor} does not support EXPLAIN ANALYZE; printing plans only.'
+            ))
+
+        for role in options['role'] or ROLES:
+            # The first account of each role stands in for the whole role
+            user = User.objects.filter(role=role).order_by('id').first()
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {role} =='))
+            if user is None:
+                self.stdout.write('No user with this role; skipped.')
+                continue
+
+            self.stdout.write(f'User: {user.username} (id={user.pk}, team_id={user.team_id})')
+            queryset = self.page_queryset(user, options['page_size'])
+            if analyze:
+                plan = queryset.explain(analyze=True, buffers=True)
+            else:
+                plan = queryset.explain()
+            self.stdout.write(plan)
+
+    def page_queryset(self, user, page_size):
+        return Bug.objects.visible_to(user).order_by('-created_at', '-id')[:page_size]
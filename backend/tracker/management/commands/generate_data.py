@@ -0,0 +1,341 @@
+import math
+import random
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from tracker import analytics, history, stats
+from tracker.models import Bug, BugDailyRollup, BugEvent, BugLifecycle, BugStats, Project, Team, User
+
+# Share of each role among generated users; team leads are added per team
+ROLE_MIX = [
+    ('product_manager', 0.01),
+    ('engineering_manager', 0.005),
+    ('team_manager', 0.02),
+    ('developer', 0.45),
+    ('tester', 0.15),
+    ('customer', 0.365),
+]
+ROLE_PREFIXES = {
+    'product_manager': 'pm', 'engineering_manager': 'eng', 'team_manager': 'tm',
+    'team_lead': 'lead', 'developer': 'dev', 'tester': 'tester', 'customer': 'cust',
+}
+
+PRIORITY_WEIGHTS = {'low': 25, 'medium': 45, 'high': 22, 'critical': 8}
+# Mean days to resolve by priority; also drives how likely an old bug is done
+MEAN_DAYS_TO_RESOLVE = {'critical': 2, 'high': 7, 'medium': 20, 'low': 45}
+TEAMS_PER_PROJECT = {2: 20, 3: 30, 4: 25, 5: 12, 6: 8, 8: 5}
+
+COMPONENTS = [
+    'Login', 'Signup', 'Dashboard', 'Search', 'Export', 'Report', 'Notification', 'Sidebar', 'Settings',
+    'Profile', 'Checkout', 'Invoice', 'Upload', 'Password reset', 'Session', 'API', 'Chart', 'Calendar',
+]
+SYMPTOMS = [
+    'crashes', 'hangs', 'returns 500', 'shows stale data', 'is slow', 'loses input', 'renders blank',
+    'times out', 'ignores permissions', 'sends duplicate emails', 'overlaps content', 'rejects valid input',
+]
+CONTEXTS = [
+    'on mobile', 'after logout', 'for new users', 'with special characters', 'on Safari', 'under load',
+    'after an update', 'with large files', 'in dark mode', 'on slow networks', 'for team leads', 'at midnight UTC',
+]
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def zipf_weights(count, exponent=1.0):
+    # A few hot projects/teams and a long tail, like real trackers
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def copy_rows(model, columns, rows):
+    """
+    Write raw rows into `model`'s table: COPY on PostgreSQL, batched
+    executemany elsewhere. Bypasses save() and signals on purpose.
+    """
+    table = model._meta.db_table
+    column_list = ', '.join(connection.ops.quote_name(column) for column in columns)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            with cursor.copy(f'COPY {table} ({column_list}) FROM STDIN') as copy:
+                for row in rows:
+                    copy.write_row(row)
+            return
+
+        adapt = connection.ops.adapt_datetimefield_value
+        placeholders = ', '.join(['%s'] * len(columns))
+        cursor.executemany(
+            f'INSERT INTO {table} ({column_list}) VALUES ({placeholders})',
+            [[adapt(value) if isinstance(value, datetime) else value for value in row] for row in rows],
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a realistic synthetic dataset: users across every role, projects, '
+        'skewed team sizes and a year of bug history with per-priority resolution times.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--bugs', type=int, default=10_000)
+        parser.add_argument('--projects', type=int, default=20)
+        parser.add_argument('--days', type=int, default=365, help='How far back bug history reaches.')
+        parser.add_argument('--seed', type=int, default=42, help='Same seed, same dataset.')
+        parser.add_argument('--password', default='cbts1234', help='Password of every generated user.')
+        parser.add_argument('--batch-size', type=int, default=20_000)
+        parser.add_argument('--flush', action='store_true',
+                            help='Delete all tracker data (superusers excepted) first.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 10 or options['projects'] < 1 or options['bugs'] < 0:
+            raise CommandError('Need at least 10 users and 1 project.')
+        self.random = random.Random(options['seed'])
+        self.now = timezone.now().replace(microsecond=0)
+        self.options = options
+
+        with transaction.atomic():
+            if options['flush']:
+                self.flush()
+            users = self.create_users_and_teams()
+            self.create_bugs(users)
+            self.reset_sequences()
+
+        # Derived tables are rebuilt from what was written, not maintained row by row
+        stats.rebuild()
+        analytics.sync(batch_size=options['batch_size'], full=True)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Bug._meta.db_table}, {BugEvent._meta.db_table}, {User._meta.db_table}')
+        cache.clear()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {sum(len(ids) for ids in users.values())} users, {options['projects']} projects, "
+            f"{len(self.teams)} teams and {options['bugs']} bugs. Every user's password is {options['password']!r}."
+        ))
+
+    # ----------------------------
+    # Setup
+    # ----------------------------
+    def flush(self):
+        tables = [
+            BugDailyRollup, BugLifecycle, BugStats, BugEvent, Bug,
+            Team.members.through, Team.managers.through, Project.team_managers.through,
+        ]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                names = ', '.join(model._meta.db_table for model in tables)
+                cursor.execute(f'TRUNCATE {names}')
+            else:
+                for model in tables:
+                    cursor.execute(f'DELETE FROM {model._meta.db_table}')
+        User.objects.update(team=None)
+        Team.objects.all().delete()
+        Project.objects.all().delete()
+        User.objects.filter(is_superuser=False).delete()
+
+    def create_users_and_teams(self):
+        """
+        Returns {role: [user ids]}. Also sets self.teams: one dict per team
+        with its project, lead, developers and testers.
+        """
+        rnd, options = self.random, self.options
+        password = make_password(options['password'])  # hashed once, shared by every row
+        start = (User.objects.aggregate(latest=Max('id'))['latest'] or 0) + 1
+        counter = iter(range(start, start + 10 ** 9))
+
+        def make_users(role, count):
+            prefix = ROLE_PREFIXES[role]
+            users = [
+                User(username=f'{prefix}_{n}', email=f'{prefix}_{n}@example.com', password=password, role=role,
+                     first_name=prefix.title(), last_name=str(n), date_joined=self.now)
+                for n in islice(counter, count)
+            ]
+            return User.objects.bulk_create(users, batch_size=options['batch_size'])
+
+        # Projects and their teams first: team leads are one per team
+        team_counts = rnd.choices(list(TEAMS_PER_PROJECT), weights=TEAMS_PER_PROJECT.values(), k=options['projects'])
+        team_total = sum(team_counts)
+        remaining = max(options['users'] - team_total, len(ROLE_MIX))
+        created = {
+            role: make_users(role, max(1, round(remaining * share))) for role, share in ROLE_MIX
+        }
+        created['team_lead'] = make_users('team_lead', team_total)
+
+        pms = created['product_manager']
+        projects = Project.objects.bulk_create([
+            Project(name=f'Project {i + 1}', description=f'Synthetic project {i + 1}.', manager=rnd.choice(pms))
+            for i in range(options['projects'])
+        ])
+        teams = Team.objects.bulk_create([
+            Team(name=f'{project.name} / Team {j + 1}', project=project)
+            for project, count in zip(projects, team_counts) for j in range(count)
+        ])
+        for team, lead in zip(teams, created['team_lead']):
+            team.lead = lead
+            lead.team = team
+        Team.objects.bulk_update(teams, ['lead'], batch_size=options['batch_size'])
+
+        # Skewed team sizes: a few large teams, many small ones
+        weights = zipf_weights(len(teams), 0.8)
+        rnd.shuffle(weights)
+        developers = {team.id: [] for team in teams}
+        testers = {team.id: [] for team in teams}
+        for developer in created['developer']:
+            developer.team = rnd.choices(teams, weights=weights)[0]
+            developers[developer.team.id].append(developer.id)
+        for tester in created['tester']:
+            if rnd.random() < 0.7:
+                tester.team = rnd.choices(teams, weights=weights)[0]
+                testers[tester.team.id].append(tester.id)
+
+        managed = []
+        for manager in created['team_manager']:
+            their_teams = rnd.sample(teams, min(len(teams), rnd.randint(2, 5)))
+            # Their own team is the biggest of those they manage
+            manager.team = max(their_teams, key=lambda team: len(developers[team.id]))
+            managed += [Team.managers.through(team_id=team.id, user_id=manager.id) for team in their_teams]
+
+        for role in ['team_lead', 'developer', 'tester', 'team_manager']:
+            User.objects.bulk_update(
+                [user for user in created[role] if user.team_id], ['team'], batch_size=options['batch_size']
+            )
+        Team.managers.through.objects.bulk_create(managed, batch_size=options['batch_size'])
+        Team.members.through.objects.bulk_create([
+            Team.members.through(team_id=team_id, user_id=user_id)
+            for team_id, user_ids in developers.items() for user_id in user_ids
+        ], batch_size=options['batch_size'])
+
+        project_weights = zipf_weights(len(projects), 1.1)
+        rnd.shuffle(project_weights)
+        project_of = {project.id: weight for project, weight in zip(projects, project_weights)}
+        self.teams = [
+            {
+                'id': team.id, 'project': team.project_id, 'lead': team.lead_id,
+                'weight': project_of[team.project_id] * weight / sum(
+                    w for t, w in zip(teams, weights) if t.project_id == team.project_id
+                ),
+                'developers': developers[team.id], 'testers': testers[team.id],
+            }
+            for team, weight in zip(teams, weights)
+        ]
+        return {role: [user.id for user in users] for role, users in created.items()}
+
+    # ----------------------------
+    # Bugs and their history
+    # ----------------------------
+    def create_bugs(self, users):
+        options = self.options
+        start = (Bug.objects.aggregate(latest=Max('id'))['latest'] or 0) + 1
+        bug_columns = [
+            'id', 'title', 'description', 'status', 'priority', 'created_at', 'updated_at',
+            'reported_by_id', 'assigned_to_id', 'project_id', 'team_id',
+        ]
+        event_columns = ['bug_id', 'actor_id', 'field', 'old', 'new', 'created_at']
+
+        if connection.vendor == 'postgresql':
+            self.ensure_event_partitions()
+
+        bugs = (self.make_bug(bug_id, users) for bug_id in range(start, start + options['bugs']))
+        written = 0
+        for batch in batched(bugs, options['batch_size']):
+            copy_rows(Bug, bug_columns, [bug for bug, _ in batch])
+            copy_rows(BugEvent, event_columns, [event for _, events in batch for event in events])
+            written += len(batch)
+            self.stdout.write(f'  {written} bugs written', ending='\r')
+        self.stdout.write('')
+
+    def make_bug(self, bug_id, users):
+        """
+        One bug row plus the BugEvent rows its lifecycle would have logged.
+        Older and more urgent bugs are more likely done; newer bugs dominate,
+        as backlogs grow over time.
+        """
+        rnd, now = self.random, self.now
+        team = rnd.choices(self.teams, weights=[team['weight'] for team in self.teams])[0]
+        team_id = team['id'] if rnd.random() > 0.05 else None
+
+        age_days = self.options['days'] * (1 - math.sqrt(rnd.random()))
+        created_at = now - timedelta(days=age_days)
+        if created_at.weekday() >= 5 and rnd.random() < 0.7:
+            created_at -= timedelta(days=created_at.weekday() - 4)  # most reports land on weekdays
+
+        priority = rnd.choices(list(PRIORITY_WEIGHTS), weights=PRIORITY_WEIGHTS.values())[0]
+        roll = rnd.random()
+        if roll < 0.8 and team['developers']:
+            assigned_to = rnd.choice(team['developers'])
+        elif roll < 0.85:
+            assigned_to = rnd.choice(users['developer'])
+        else:
+            assigned_to = None
+
+        roll = rnd.random()
+        if roll < 0.5 and team['testers']:
+            reported_by = rnd.choice(team['testers'])
+        elif roll < 0.7:
+            reported_by = rnd.choice(users['tester'])
+        elif roll < 0.95:
+            reported_by = rnd.choice(users['customer'])
+        else:
+            reported_by = team['lead']
+
+        mean_days = MEAN_DAYS_TO_RESOLVE[priority]
+        events = [(bug_id, reported_by, 'created', None, None, created_at)]
+        age = now - created_at
+        done = assigned_to is not None and rnd.random() < 1 - math.exp(-age.days / mean_days)
+        if done:
+            worked = timedelta(days=min(age.days, rnd.lognormvariate(math.log(mean_days), 0.8)))
+            started_at = created_at + worked * rnd.uniform(0.05, 0.4)
+            resolved_at = created_at + worked
+            events += [
+                (bug_id, assigned_to, 'status', 'open', 'in_progress', started_at),
+                (bug_id, assigned_to, 'status', 'in_progress', 'resolved', resolved_at),
+            ]
+            status, updated_at = 'resolved', resolved_at
+            if now - resolved_at > timedelta(days=7) and rnd.random() < 0.85:
+                closed_at = resolved_at + timedelta(days=rnd.uniform(1, 7))
+                events.append((bug_id, team['lead'], 'status', 'resolved', 'closed', closed_at))
+                status, updated_at = 'closed', closed_at
+        elif assigned_to is not None and rnd.random() < 0.45:
+            started_at = created_at + age * rnd.uniform(0.1, 0.9)
+            events.append((bug_id, assigned_to, 'status', 'open', 'in_progress', started_at))
+            status, updated_at = 'in_progress', started_at
+        else:
+            status, updated_at = 'open', created_at
+
+        title = f'{rnd.choice(COMPONENTS)} {rnd.choice(SYMPTOMS)} {rnd.choice(CONTEXTS)}'
+        description = (
+            f'{title}. Steps: open the {rnd.choice(COMPONENTS).lower()} page and retry '
+            f'{rnd.randint(2, 9)} times. Seen by {rnd.randint(1, 500)} users.'
+        )
+        bug = (
+            bug_id, title, description, status, priority, created_at, updated_at,
+            reported_by, assigned_to, team['project'], team_id,
+        )
+        return bug, events
+
+    def ensure_event_partitions(self):
+        # A month's partition cannot be attached once the default partition holds its rows
+        existing = history.existing_partitions()
+        earliest = self.now - timedelta(days=self.options['days'] + 7)
+        months = (self.now.year - earliest.year) * 12 + self.now.month - earliest.month
+        for offset in range(months + 4):
+            year, month = history.add_months(earliest.year, earliest.month, offset)
+            if (year, month) not in existing:
+                history.create_partition(year, month)
+
+    def reset_sequences(self):
+        # Bug ids were assigned here, so move the sequence past them
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Bug]):
+                cursor.execute(sql)
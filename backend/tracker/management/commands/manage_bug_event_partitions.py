@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from tracker import history
+from tracker.models import BugEvent
+
+
+class Command(BaseCommand):
+    help = (
+        'Create upcoming monthly BugEvent partitions and drop the ones past retention. '
+        'Run daily from cron; on databases without partitioning, old rows are deleted instead.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3,
+                            help='Keep partitions this many months past the current one.')
+        parser.add_argument('--retain-months', type=int, default=None,
+                            help='Drop months older than this many months before the current one.')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        today = timezone.now()
+        current = (today.year, today.month)
+        cutoff = history.add_months(*current, -options['retain_months']) if options['retain_months'] is not None else None
+
+        if connection.vendor != 'postgresql':
+            if cutoff is not None:
+                start, _ = history.month_bounds(*cutoff)
+                expired = BugEvent.objects.filter(created_at__lt=start)
+                count = expired.count() if options['dry_run'] else expired.delete()[0]
+                self.stdout.write(f'Deleted {count} event(s) before {start:%Y-%m}.')
+            return
+
+        existing = history.existing_partitions()
+        with transaction.atomic():
+            for offset in range(options['months_ahead'] + 1):
+                month = history.add_months(*current, offset)
+                if month not in existing:
+                    self.stdout.write(f'Creating {history.partition_name(*month)}')
+                    if not options['dry_run']:
+                        history.create_partition(*month)
+
+            if cutoff is not None:
+                for month, name in sorted(existing.items()):
+                    if month < cutoff:
+                        self.stdout.write(f'Dropping {name}')
+                        if not options['dry_run']:
+                            history.drop_partition(name)
+
+        self.stdout.write(self.style.SUCCESS('Bug event partitions are up to date.'))
@@ -0,0 +1,43 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+
+from tracker import stats
+from tracker.models import Bug, BugStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the BugStats counters from the bug table, repairing any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report buckets that drifted; do not write.')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drifted = self.drift()
+            for key, (expected, stored) in sorted(drifted.items(), key=str):
+                self.stdout.write(f'{key}: expected {expected}, stored {stored}')
+            style = self.style.WARNING if drifted else self.style.SUCCESS
+            self.stdout.write(style(f'{len(drifted)} bucket(s) drifted.'))
+            return
+
+        buckets = stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {buckets} bug stats bucket(s).'))
+
+    def drift(self):
+        fields = stats.BUCKET_FIELDS
+        expected = Counter({
+            tuple(row[f] for f in fields): row['total']
+            for row in Bug.objects.order_by().values(*fields).annotate(total=Count('id'))
+        })
+        stored = Counter({
+            tuple(row[f] for f in fields): row['total']
+            for row in BugStats.objects.order_by().values(*fields).annotate(total=Sum('count'))
+        })
+        return {
+            key: (expected[key], stored[key])
+            for key in set(expected) | set(stored)
+            if expected[key] != stored[key]
+        }
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from tracker import analytics
+
+
+class Command(BaseCommand):
+    help = 'Fold bugs changed since the last run into the daily analytics rollups.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--full', action='store_true',
+                            help='Drop the rollups and rebuild them from every bug.')
+
+    def handle(self, *args, **options):
+        seen = analytics.sync(batch_size=options['batch_size'], full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Synced {seen} bug(s) into the analytics rollups.'))
@@ -0,0 +1,27 @@
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from tracker.mail import deliver_batch
+
+
+class Command(BaseCommand):
+    help = 'Drain the outbound email queue in batches over a single SMTP connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when the queue is empty.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls with --loop.')
+
+    def handle(self, *args, **options):
+        connection = get_connection()
+        while True:
+            counts = deliver_batch(options['batch_size'], connection)
+            if any(counts.values()):
+                self.stdout.write(', '.join(f'{name}: {count}' for name, count in counts.items()))
+                continue
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_bug_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['team', 'created_at', 'id'], name='bug_team_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['team', 'status', 'created_at'], name='bug_team_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['assigned_to', 'status'], name='bug_assignee_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(fields=['reported_by', 'created_at', 'id'], name='bug_reporter_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bug',
+            index=models.Index(condition=models.Q(('status', 'closed'), _negated=True), fields=['team', 'priority'], name='bug_active_team_priority_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_bug_stats(apps, schema_editor):
+    Bug = apps.get_model('tracker', 'Bug')
+    BugStats = apps.get_model('tracker', 'BugStats')
+    rows = (
+        Bug.objects.order_by()
+        .values('project_id', 'team_id', 'status', 'priority')
+        .annotate(total=models.Count('id'))
+    )
+    BugStats.objects.bulk_create(
+        [BugStats(count=row.pop('total'), **row) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0006_bug_role_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BugStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('resolved', 'Resolved'), ('closed', 'Closed')], max_length=20)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('critical', 'Critical')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bug_stats', to='tracker.project')),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='bug_stats', to='tracker.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'team', 'status', 'priority'], name='bugstats_bucket_idx'), models.Index(fields=['team'], name='bugstats_team_idx')],
+            },
+        ),
+        migrations.RunPython(populate_bug_stats, migrations.RunPython.noop),
+    ]
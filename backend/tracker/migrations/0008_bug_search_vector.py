@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:27
+
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce({row}title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({row}description, '')), 'B')"
+)
+BACKFILL_BATCH_SIZE = 10_000
+
+
+def add_search_vector(apps, schema_editor):
+    # tsvector columns and GIN indexes are PostgreSQL-only; other databases
+    # use the icontains fallback in tracker.search.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # A GENERATED ... STORED column would rewrite the table under an ACCESS
+    # EXCLUSIVE lock. A plain nullable column is a catalog-only change: a
+    # trigger keeps new writes current, existing rows are filled in short
+    # batches, and the index is built without blocking writes.
+    schema_editor.execute('ALTER TABLE tracker_bug ADD COLUMN search_vector tsvector')
+    schema_editor.execute(f"""
+        CREATE FUNCTION tracker_bug_search_vector() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    schema_editor.execute(
+        'CREATE TRIGGER bug_search_vector_trigger BEFORE INSERT OR UPDATE OF title, description '
+        'ON tracker_bug FOR EACH ROW EXECUTE FUNCTION tracker_bug_search_vector()'
+    )
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT min(id), max(id) FROM tracker_bug')
+        first, last = cursor.fetchone()
+        # Not atomic, so each batch commits on its own and holds its row locks briefly
+        for start in range(first or 0, (last or -1) + 1, BACKFILL_BATCH_SIZE):
+            cursor.execute(
+                f'UPDATE tracker_bug SET search_vector = {SEARCH_VECTOR_SQL.format(row="")} '
+                'WHERE id >= %s AND id < %s AND search_vector IS NULL',
+                [start, start + BACKFILL_BATCH_SIZE],
+            )
+
+    schema_editor.execute(
+        'CREATE INDEX CONCURRENTLY bug_search_vector_idx ON tracker_bug USING gin (search_vector)'
+    )
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX CONCURRENTLY IF EXISTS bug_search_vector_idx')
+    schema_editor.execute('DROP TRIGGER IF EXISTS bug_search_vector_trigger ON tracker_bug')
+    schema_editor.execute('DROP FUNCTION IF EXISTS tracker_bug_search_vector()')
+    schema_editor.execute('ALTER TABLE tracker_bug DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('tracker', '0007_bugstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
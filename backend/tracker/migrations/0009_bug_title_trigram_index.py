@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:33
+
+from django.db import migrations
+
+
+def add_trigram_index(apps, schema_editor):
+    # pg_trgm is PostgreSQL-only; other databases use the MinHash fallback in tracker.similarity
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Concurrently, so the GIN build does not block writes to the bug table
+    schema_editor.execute('CREATE INDEX CONCURRENTLY bug_title_trgm_idx ON tracker_bug USING gin (title gin_trgm_ops)')
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX CONCURRENTLY IF EXISTS bug_title_trgm_idx')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('tracker', '0008_bug_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+# The parent table is range partitioned by month on created_at. Its primary
+# key must include the partition key; Django still addresses rows by id alone.
+CREATE_PARTITIONED_TABLE = """
+CREATE TABLE tracker_bugevent (
+    id bigserial NOT NULL,
+    bug_id bigint NOT NULL,
+    actor_id bigint NULL,
+    field varchar(30) NOT NULL,
+    old varchar(255) NULL,
+    new varchar(255) NULL,
+    created_at timestamp with time zone NOT NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at)
+"""
+
+
+def month_start(year, month):
+    return f'{year:04d}-{month:02d}-01 00:00:00+00'
+
+
+def create_event_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(apps.get_model('tracker', 'BugEvent'))
+        return
+
+    schema_editor.execute(CREATE_PARTITIONED_TABLE)
+    schema_editor.execute(
+        'CREATE INDEX bugevent_bug_created_idx ON tracker_bugevent (bug_id, created_at, id)'
+    )
+    # Catches rows if the partition job ever falls behind
+    schema_editor.execute('CREATE TABLE tracker_bugevent_default PARTITION OF tracker_bugevent DEFAULT')
+
+    # This month and the next three; `manage_bug_event_partitions` keeps ahead from here
+    today = django.utils.timezone.now()
+    year, month = today.year, today.month
+    for _ in range(4):
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        schema_editor.execute(
+            f'CREATE TABLE tracker_bugevent_p{year:04d}_{month:02d} PARTITION OF tracker_bugevent '
+            f"FOR VALUES FROM ('{month_start(year, month)}') TO ('{month_start(next_year, next_month)}')"
+        )
+        year, month = next_year, next_month
+
+
+def drop_event_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.delete_model(apps.get_model('tracker', 'BugEvent'))
+        return
+    # Dropping the parent drops every partition with it
+    schema_editor.execute('DROP TABLE IF EXISTS tracker_bugevent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0010_outboundemail'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='BugEvent',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('field', models.CharField(max_length=30)),
+                        ('old', models.CharField(blank=True, max_length=255, null=True)),
+                        ('new', models.CharField(blank=True, max_length=255, null=True)),
+                        ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('actor', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                        ('bug', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='events', to='tracker.bug')),
+                    ],
+                    options={
+                        'indexes': [models.Index(fields=['bug', 'created_at', 'id'], name='bugevent_bug_created_idx')],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_event_table, drop_event_table),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0011_bugevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BugDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('created', models.IntegerField(default=0)),
+                ('resolved', models.IntegerField(default=0)),
+                ('resolution_seconds', models.BigIntegerField(default=0)),
+                ('project', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tracker.project')),
+                ('team', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tracker.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'team', 'day'], name='bugrollup_project_team_day_idx'), models.Index(fields=['team', 'day'], name='bugrollup_team_day_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BugLifecycle',
+            fields=[
+                ('bug', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='+', serialize=False, to='tracker.bug')),
+                ('created_on', models.DateField()),
+                ('resolved_on', models.DateField(null=True)),
+                ('resolution_seconds', models.BigIntegerField(null=True)),
+                ('synced_at', models.DateTimeField()),
+                ('project', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tracker.project')),
+                ('team', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tracker.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['synced_at'], name='buglifecycle_synced_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+def merge_duplicate_buckets(apps, schema_editor):
+    BugStats = apps.get_model('tracker', 'BugStats')
+    duplicates = (
+        BugStats.objects.order_by()
+        .values('project_id', 'team_id', 'status', 'priority')
+        .annotate(rows=models.Count('id'), total=models.Sum('count'), keep=models.Min('id'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        buckets = BugStats.objects.filter(
+            project_id=row['project_id'], team_id=row['team_id'], status=row['status'], priority=row['priority'],
+        )
+        buckets.exclude(id=row['keep']).delete()
+        buckets.filter(id=row['keep']).update(count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0012_bug_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bugstats',
+            constraint=models.UniqueConstraint(condition=models.Q(('team__isnull', False)), fields=('project', 'team', 'status', 'priority'), name='bugstats_bucket_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='bugstats',
+            constraint=models.UniqueConstraint(condition=models.Q(('team__isnull', True)), fields=('project', 'status', 'priority'), name='bugstats_no_team_bucket_uniq'),
+        ),
+    ]
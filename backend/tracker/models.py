@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 # ---------------------------
 # Custom User Model
@@ -20,6 +21,19 @@ class User(AbstractUser):
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
 
+    # What bug payloads show of their reporter or assignee
+    DISPLAY_FIELDS = ['username', 'first_name', 'last_name', 'role']
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_display = instance.display_values()
+        return instance
+
+    def display_values(self):
+        # Deferred fields are skipped rather than loaded
+        return {field: self.__dict__[field] for field in self.DISPLAY_FIELDS if field in self.__dict__}
+
     def __str__(self):
         return f"{self.username} ({self.role})"
 
@@ -88,6 +102,31 @@ class Project(models.Model):
 # ---------------------------
 # models.py
 
+class BugQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Role-based visibility rules shared by the bug endpoints and tooling.
+        Team sets come precomputed from tracker.visibility.
+        """
+        from .visibility import visible_team_ids
+
+        role = getattr(user, 'role', None)
+
+        if role in ['product_manager', 'engineering_manager']:
+            return self
+        elif role in ['team_manager', 'team_lead']:
+            return self.filter(team_id__in=visible_team_ids(user))
+        elif role == 'developer':
+            # UNION of two index scans; an OR across both FKs falls back to a seq scan
+            assigned = self.filter(assigned_to=user).order_by().values('id')
+            on_team = self.filter(team_id__in=visible_team_ids(user)).order_by().values('id')
+            return self.filter(id__in=assigned.union(on_team))
+        elif role in ['tester', 'customer']:
+            return self.filter(reported_by=user)
+
+        return self.none()
+
+
 class Bug(models.Model):
     STATUS_CHOICES = [
         ('open', 'Open'),
@@ -134,5 +173,194 @@ class Bug(models.Model):
     # 🔗 Optional team this bug is related to (useful for team leads or filtering)
     team = models.ForeignKey(Team, related_name='bugs', on_delete=models.SET_NULL, null=True, blank=True)
 
+    objects = BugQuerySet.as_manager()
+
+    # Fields whose previous values signal handlers need when a bug changes
+    TRACKED_FIELDS = ['status', 'priority', 'reported_by_id', 'assigned_to_id', 'project_id', 'team_id']
+
+    class Meta:
+        indexes = [
+            # Keyset pagination walks bugs newest-first on (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='bug_created_id_idx'),
+            # Team-scoped lists (team managers, leads, developers' team bugs)
+            models.Index(fields=['team', 'created_at', 'id'], name='bug_team_created_idx'),
+            models.Index(fields=['team', 'status', 'created_at'], name='bug_team_status_created_idx'),
+            # Developer queue and ?assigned_to= filter
+            models.Index(fields=['assigned_to', 'status'], name='bug_assignee_status_idx'),
+            # Testers and customers only see what they reported
+            models.Index(fields=['reported_by', 'created_at', 'id'], name='bug_reporter_created_idx'),
+            # Dashboards group the active backlog by priority; closed bugs are the bulk of the table
+            models.Index(
+                fields=['team', 'priority'],
+                condition=~models.Q(status='closed'),
+                name='bug_active_team_priority_idx',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # post_save handlers (BugStats counters) commit or roll back with the row
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance.tracked_values()
+        return instance
+
+    def tracked_values(self):
+        # Deferred fields are skipped rather than loaded
+        return {field: self.__dict__[field] for field in self.TRACKED_FIELDS if field in self.__dict__}
+
     def __str__(self):
         return f"{self.title} - {self.status}"
+
+
+# ---------------------------
+# Bug Stats (denormalized counters)
+# ---------------------------
+class BugStats(models.Model):
+    """
+    Bug counts per (project, team, status, priority), kept current by
+    tracker.stats on every bug write. `rebuild_bug_stats` repairs drift.
+    """
+    project = models.ForeignKey(Project, related_name='bug_stats', on_delete=models.CASCADE)
+    team = models.ForeignKey(Team, related_name='bug_stats', on_delete=models.CASCADE, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Bug.STATUS_CHOICES)
+    priority = models.CharField(max_length=20, choices=Bug.PRIORITY_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'team', 'status', 'priority'], name='bugstats_bucket_idx'),
+            models.Index(fields=['team'], name='bugstats_team_idx'),
+        ]
+        # One row per bucket. Split on team IS NULL because NULLs never clash
+        # in a plain unique index, and NULLS NOT DISTINCT needs PostgreSQL 15.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'team', 'status', 'priority'],
+                condition=models.Q(team__isnull=False), name='bugstats_bucket_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['project', 'status', 'priority'],
+                condition=models.Q(team__isnull=True), name='bugstats_no_team_bucket_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id}/{self.team_id} {self.status}/{self.priority}: {self.count}"
+
+
+# ---------------------------
+# Bug Events (append-only audit log)
+# ---------------------------
+class BugEvent(models.Model):
+    """
+    One changed field of one bug: who, what, old -> new, when. Written by
+    tracker.history; never updated. On PostgreSQL the table is range
+    partitioned by month on created_at (see `manage_bug_event_partitions`),
+    and history outlives the bug, so neither FK is a database constraint.
+    """
+    bug = models.ForeignKey(Bug, related_name='events', on_delete=models.DO_NOTHING, db_constraint=False)
+    actor = models.ForeignKey(
+        User, related_name='+', on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True
+    )
+    field = models.CharField(max_length=30)
+    old = models.CharField(max_length=255, null=True, blank=True)
+    new = models.CharField(max_length=255, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # /bugs/{id}/history/ pages newest-first within one bug
+            models.Index(fields=['bug', 'created_at', 'id'], name='bugevent_bug_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.bug_id} {self.field}: {self.old} -> {self.new}"
+
+
+# ---------------------------
+# Analytics Rollups
+# ---------------------------
+class BugLifecycle(models.Model):
+    """
+    The facts about one bug that feed BugDailyRollup, as of the last
+    `rollup_bug_analytics` run. Diffing against them is what lets each run
+    touch only the bugs changed since the previous one.
+    """
+    bug = models.OneToOneField(Bug, primary_key=True, related_name='+', on_delete=models.DO_NOTHING, db_constraint=False)
+    project = models.ForeignKey(Project, related_name='+', on_delete=models.DO_NOTHING, db_constraint=False)
+    team = models.ForeignKey(Team, related_name='+', on_delete=models.DO_NOTHING, db_constraint=False, null=True)
+    created_on = models.DateField()
+    resolved_on = models.DateField(null=True)
+    resolution_seconds = models.BigIntegerField(null=True)
+    synced_at = models.DateTimeField()  # the bug's updated_at when these facts were taken
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['synced_at'], name='buglifecycle_synced_idx'),
+        ]
+
+
+class BugDailyRollup(models.Model):
+    """
+    Bugs created and resolved per (day, project, team), plus the summed
+    time-to-resolve of those resolved. Open counts over time are a running
+    sum of created - resolved.
+    """
+    day = models.DateField()
+    project = models.ForeignKey(Project, related_name='+', on_delete=models.DO_NOTHING, db_constraint=False)
+    team = models.ForeignKey(Team, related_name='+', on_delete=models.DO_NOTHING, db_constraint=False, null=True)
+    created = models.IntegerField(default=0)
+    resolved = models.IntegerField(default=0)
+    resolution_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'team', 'day'], name='bugrollup_project_team_day_idx'),
+            models.Index(fields=['team', 'day'], name='bugrollup_team_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.project_id}/{self.team_id}: +{self.created} -{self.resolved}"
+
+
+# ---------------------------
+# Outbound Email (outbox)
+# ---------------------------
+class OutboundEmail(models.Model):
+    """
+    Queued email, composed and sent by the `send_queued_mail` worker so
+    request handlers never wait on SMTP.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    recipient = models.EmailField()
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker only ever scans due, pending rows
+            models.Index(
+                fields=['next_attempt_at', 'id'],
+                condition=models.Q(status='pending'),
+                name='outbox_due_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} to {self.recipient} ({self.status})"
@@ -0,0 +1,147 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# ----------------------------
+# Keyset (cursor) Pagination
+# ----------------------------
+class KeysetCursorPagination(BasePagination):
+    """
+    Newest-first keyset pagination over a stable (created_at, id) ordering.
+
+    The cursor carries the (created_at, id) of the row at the page edge, so
+    every page is a bounded range scan on the composite index instead of an
+    OFFSET that grows with page depth.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, cursor, reverse = self.page_queryset(queryset, request)
+        # One extra row tells us whether another page exists in this direction
+        return self.set_page(list(queryset[:self.page_size + 1]), cursor, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset, cursor, reverse = self.page_queryset(queryset, request)
+        return self.set_page([row async for row in queryset[:self.page_size + 1]], cursor, reverse)
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            return queryset.order_by('-created_at', '-id'), None, False
+
+        created_at, pk, reverse = cursor
+        if reverse:
+            # Walking back towards newer rows
+            queryset = queryset.filter(
+                Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(id__gt=pk))
+            ).order_by('created_at', 'id')
+        else:
+            queryset = queryset.filter(
+                Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(id__lt=pk))
+            ).order_by('-created_at', '-id')
+        return queryset, cursor, reverse
+
+    def set_page(self, rows, cursor, reverse):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = cursor is not None, has_more
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            return datetime.fromisoformat(payload['c']), int(payload['i']), bool(payload['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        payload = json.dumps({'c': obj.created_at.isoformat(), 'i': obj.pk, 'r': int(reverse)})
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class SearchResultsPagination(LimitOffsetPagination):
+    """
+    Relevance-ordered search results. Only the first few pages of a ranked
+    result set are ever read, so plain limit/offset is fine here.
+    """
+    default_limit = 50
+    max_limit = 500
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # LimitOffsetPagination.paginate_queryset with the count and slice awaited
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [row async for row in queryset[self.offset:self.offset + self.limit]]
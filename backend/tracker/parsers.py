@@ -0,0 +1,31 @@
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON lazily, one value per line, so large imports
+    are consumed row by row instead of being loaded as one document.
+
+    Lines that are not valid JSON are yielded as `ValueError` instances so the
+    caller can report them against their row instead of rejecting the body.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return self.iter_rows(codecs.getreader(encoding)(stream))
+
+    def iter_rows(self, lines):
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield ValueError(f'Invalid JSON: {exc}')
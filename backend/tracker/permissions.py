@@ -57,3 +57,99 @@ class CombinedPermission(BasePermission):
             hasattr(perm(), 'has_object_permission') and perm().has_object_permission(request, view, obj)
             for perm in self.perms
         )
+
+
+# ✅ Declarative role → action permission table
+# Every action a viewset registers needs an entry; unlisted actions are denied.
+ROLE_PERMISSIONS = {
+    'bugs': {
+        ('list', 'export', 'stream', 'bulk_update'): [
+            'product_manager', 'engineering_manager', 'team_manager', 'team_lead', 'developer'
+        ],
+        ('retrieve', 'history', 'update', 'partial_update'): [
+            'product_manager', 'engineering_manager', 'team_manager', 'team_lead', 'developer', 'tester'
+        ],
+        ('create', 'bulk'): ['product_manager', 'engineering_manager', 'team_manager', 'tester', 'customer'],
+        # Duplicate check before filing, over the caller's own visible bugs
+        'similar': [
+            'product_manager', 'engineering_manager', 'team_manager', 'team_lead', 'developer', 'tester', 'customer'
+        ],
+        # As before the table: any role, limited to the bugs get_queryset shows it
+        'destroy': [
+            'product_manager', 'engineering_manager', 'team_manager', 'team_lead', 'developer', 'tester', 'customer'
+        ],
+    },
+    'users': {
+        'create': ['product_manager'],
+        'list': ['product_manager', 'engineering_manager', 'team_manager'],
+        # Narrowed by UserViewSet.get_queryset; most roles reach only themselves
+        ('retrieve', 'update', 'partial_update', 'destroy'): [
+            'product_manager', 'engineering_manager', 'team_manager', 'team_lead', 'developer', 'tester', 'customer'
+        ],
+    },
+    'projects': {
+        ('create', 'update', 'partial_update', 'destroy'): ['product_manager', 'engineering_manager'],
+        ('list', 'retrieve', 'stats', 'bugs'): ['product_manager', 'engineering_manager', 'team_manager'],
+    },
+    'teams': {
+        'create': ['engineering_manager'],
+        ('list', 'retrieve', 'update', 'partial_update', 'destroy', 'stats'): [
+            'engineering_manager', 'team_manager', 'team_lead'
+        ],
+    },
+    'analytics': {
+        ('burndown', 'throughput', 'mttr'): ['product_manager', 'engineering_manager', 'team_manager', 'team_lead'],
+    },
+}
+
+
+def compile_permission_matrix(table):
+    """
+    Flatten the declarative table into {scope: {action: frozenset(roles)}}.
+    """
+    matrix = {}
+    for scope, rules in table.items():
+        compiled = {}
+        for actions, roles in rules.items():
+            if isinstance(actions, str):
+                actions = (actions,)
+            for action in actions:
+                compiled[action] = frozenset(roles)
+        matrix[scope] = compiled
+    return matrix
+
+
+PERMISSION_MATRIX = compile_permission_matrix(ROLE_PERMISSIONS)
+
+
+class RolePermission(BasePermission):
+    """
+    Looks up the view's `permission_scope` and current action in
+    PERMISSION_MATRIX. Stateless, so one shared instance serves every request.
+    """
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not user.is_authenticated:
+            return False
+        if view.action is None or view.action == 'metadata':
+            # No handler for the method (the view answers 405), or OPTIONS
+            return True
+        return user.role in PERMISSION_MATRIX[view.permission_scope].get(view.action, ())
+
+    def has_object_permission(self, request, view, obj):
+        # Object access is narrowed by each viewset's get_queryset
+        return request.user.is_authenticated
+
+
+ROLE_PERMISSION_CLASSES = (RolePermission(),)
+
+
+class RolePermissionMixin:
+    """
+    Viewset mixin: set `permission_scope` to a key of ROLE_PERMISSIONS.
+    """
+    permission_scope = None
+
+    def get_permissions(self):
+        return ROLE_PERMISSION_CLASSES
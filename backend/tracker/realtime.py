@@ -0,0 +1,287 @@
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Count, Max, Q
+from rest_framework.renderers import BaseRenderer
+
+from .models import Bug, BugEvent
+from .visibility import aload_visibility, visible_team_ids
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'bug_changes'
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+NOTIFY_PAYLOAD_LIMIT = 7900
+
+# Columns BugQuerySet.visible_to decides on
+SCOPE_FIELDS = ['team_id', 'assigned_to_id', 'reported_by_id']
+
+RESET = {'type': 'reset'}
+
+
+# ----------------------------
+# Change Messages
+# ----------------------------
+def change_message(bug_id, previous, current, events=()):
+    """
+    The feed message for one bug moving from `previous` to `current`
+    ({attname: value}, either empty for a create or delete). Its id is the
+    newest BugEvent the write logged, which clients echo as Last-Event-ID.
+    """
+    if not previous:
+        kind, changes = 'created', current
+    elif not current:
+        kind, changes = 'deleted', {}
+    else:
+        kind = 'updated'
+        changes = {field: value for field, value in current.items() if field in previous and previous[field] != value}
+
+    states = [state for state in (previous, current) if state]
+    return {
+        'id': max((event.pk for event in events if event.pk is not None), default=None),
+        'type': kind,
+        'bug': bug_id,
+        'changes': {field.removesuffix('_id'): value for field, value in changes.items()},
+        # Who may see it, before and after: a bug leaving a team must reach that team too
+        'teams': sorted({state['team_id'] for state in states if 'team_id' in state}, key=str),
+        'assignees': sorted({state['assigned_to_id'] for state in states if state.get('assigned_to_id')}),
+        'reporters': sorted({state['reported_by_id'] for state in states if state.get('reported_by_id')}),
+    }
+
+
+def visible(user, message):
+    """
+    BugQuerySet.visible_to evaluated against a message, without a query.
+    The user's visibility sets must already be loaded (see event_stream).
+    """
+    role = user.role
+    on_team = role in ['team_manager', 'team_lead', 'developer'] and not set(visible_team_ids(user)).isdisjoint(message['teams'])
+    if role in ['product_manager', 'engineering_manager']:
+        return True
+    elif role in ['team_manager', 'team_lead']:
+        return on_team
+    elif role == 'developer':
+        return on_team or user.pk in message['assignees']
+    elif role in ['tester', 'customer']:
+        return user.pk in message['reporters']
+    return False
+
+
+def notify_payloads(messages):
+    """
+    Pack messages into JSON arrays that each fit one NOTIFY.
+    """
+    payloads, batch, size = [], [], 2
+    for message in messages:
+        encoded = json.dumps(message, separators=(',', ':'), default=str)
+        if batch and size + len(encoded) + 1 > NOTIFY_PAYLOAD_LIMIT:
+            payloads.append(f"[{','.join(batch)}]")
+            batch, size = [], 2
+        batch.append(encoded)
+        size += len(encoded) + 1
+    if batch:
+        payloads.append(f"[{','.join(batch)}]")
+    return payloads
+
+
+def publish(messages):
+    """
+    Announce bug changes to every worker's stream listeners once the
+    surrounding transaction commits. NOTIFY is itself transactional; other
+    databases (dev, tests) only reach streams in this process.
+    """
+    messages = [message for message in messages if message is not None]
+    if not messages:
+        return
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            # One round trip however many payloads a bulk write needs
+            cursor.execute(
+                'SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload',
+                [CHANNEL, notify_payloads(messages)],
+            )
+    else:
+        transaction.on_commit(lambda: broker.publish(messages))
+
+
+# ----------------------------
+# Per-Process Fan-Out
+# ----------------------------
+class Subscription:
+    def __init__(self, user):
+        self.user = user
+        self.queue = asyncio.Queue(maxsize=settings.BUG_STREAM_QUEUE_SIZE)
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too far behind to catch up event by event: drop the backlog, resync once
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET)
+
+
+class BugChangeBroker:
+    """
+    One per worker process: a single LISTEN connection feeding every open
+    stream in the process. Each stream costs a bounded queue on the event
+    loop, not a thread or a database connection.
+    """
+
+    def __init__(self):
+        self.subscriptions = set()
+        self.loop = None
+        self.listener = None
+
+    def subscribe(self, user):
+        self.loop = asyncio.get_running_loop()
+        subscription = Subscription(user)
+        self.subscriptions.add(subscription)
+        if connection.vendor == 'postgresql' and (self.listener is None or self.listener.done()):
+            self.listener = self.loop.create_task(self.listen())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscriptions.discard(subscription)
+
+    def dispatch(self, messages):
+        for subscription in list(self.subscriptions):
+            for message in messages:
+                if message['type'] == 'reset' or visible(subscription.user, message):
+                    subscription.put(message)
+
+    def publish(self, messages):
+        # Called from request threads; the queues belong to the event loop
+        if self.subscriptions and self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.dispatch, messages)
+
+    async def listen(self):
+        import psycopg
+
+        database = settings.DATABASES['default']
+        params = {
+            'dbname': database['NAME'], 'user': database['USER'], 'password': database['PASSWORD'],
+            'host': settings.BUG_STREAM_DB_HOST, 'port': settings.BUG_STREAM_DB_PORT,
+            'connect_timeout': database['OPTIONS'].get('connect_timeout', 10),
+        }
+        delay, reconnecting = 1, False
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(autocommit=True, **params) as listener:
+                    await listener.execute(f'LISTEN {CHANNEL}')
+                    if reconnecting:
+                        # Changes committed while we were away were never delivered
+                        self.dispatch([RESET])
+                    delay, reconnecting = 1, True
+                    async for notify in listener.notifies():
+                        self.dispatch(json.loads(notify.payload))
+            except (psycopg.Error, OSError) as exc:
+                logger.warning('Bug change listener lost its connection (%s); retrying in %ss', exc, delay)
+                reconnecting = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+broker = BugChangeBroker()
+
+
+# ----------------------------
+# Server-Sent Events
+# ----------------------------
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets `Accept: text/event-stream` through content negotiation; the
+    stream itself bypasses rendering, so this only formats errors.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return f'event: error\ndata: {json.dumps(data, default=str)}\n\n'.encode()
+
+
+def frame(message):
+    lines = [] if message.get('id') is None else [f"id: {message['id']}"]
+    lines.append(f"event: {message['type']}")
+    data = {} if message['type'] in ['reset', 'ready'] else {'bug': message['bug'], 'changes': message['changes']}
+    lines.append(f'data: {json.dumps(data, default=str)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def backlog(user, last_event_id):
+    """
+    Frames a client reconnecting with Last-Event-ID missed: the current
+    state of each visible bug changed since. If any change may have taken
+    a bug out of the client's view (a delete, or a team or assignee move on
+    a bug it can no longer see), or there are too many, a single `reset`
+    asks it to refetch instead.
+    """
+    if last_event_id is None:
+        latest = BugEvent.objects.aggregate(latest=Max('id'))['latest']
+        return [frame({'id': latest or 0, 'type': 'ready'})]
+
+    limit = settings.BUG_STREAM_REPLAY_LIMIT
+    changed = list(
+        BugEvent.objects.filter(id__gt=last_event_id).order_by().values('bug_id').annotate(
+            last=Max('id'),
+            created=Count('id', filter=Q(field='created')),
+            removed=Count('id', filter=Q(field__in=['deleted', 'team', 'assigned_to'])),
+        ).order_by('last')[:limit + 1]
+    )
+    if not changed:
+        return []
+    latest = changed[-1]['last']
+    if len(changed) > limit:
+        return [frame({**RESET, 'id': latest})]
+
+    current = {
+        row['id']: row for row in
+        Bug.objects.visible_to(user).filter(id__in=[row['bug_id'] for row in changed]).values('id', *Bug.TRACKED_FIELDS)
+    }
+    if any(row['removed'] and row['bug_id'] not in current for row in changed):
+        return [frame({**RESET, 'id': latest})]
+
+    frames = []
+    for row in changed:
+        if row['bug_id'] in current:
+            state = current[row['bug_id']]
+            frames.append(frame({
+                'id': row['last'],
+                'type': 'created' if row['created'] else 'updated',
+                'bug': row['bug_id'],
+                'changes': {field.removesuffix('_id'): state[field] for field in Bug.TRACKED_FIELDS},
+            }))
+    return frames
+
+
+async def event_stream(user, last_event_id):
+    """
+    Live feed for one client: what it missed, then changes as they commit,
+    with a comment every BUG_STREAM_HEARTBEAT seconds to keep proxies open.
+    Visibility is read once here; a membership change applies on reconnect.
+    """
+    await aload_visibility(user)
+    subscription = broker.subscribe(user)
+    try:
+        yield f'retry: {settings.BUG_STREAM_HEARTBEAT * 1000}\n\n'
+        # Subscribed first, so nothing committed during the replay is lost (repeats are harmless)
+        for chunk in await sync_to_async(backlog)(user, last_event_id):
+            yield chunk
+        # An idle stream must not pin a database connection for hours
+        await sync_to_async(connections.close_all)()
+
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), settings.BUG_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield frame(message)
+    finally:
+        broker.unsubscribe(subscription)
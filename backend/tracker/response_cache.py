@@ -0,0 +1,233 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'rc:version:{}'
+PAYLOAD_KEY = 'rc:payload:{}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+# ----------------------------
+# Version Scopes
+# ----------------------------
+# A scope names one slice of data a payload depends on ('user:7', 'bugs:team:3').
+# Its version is the time it last changed, so a set of versions gives both the
+# ETag (hash of the versions) and Last-Modified (the newest one).
+
+def get_versions(scopes):
+    cache = get_cache()
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    now = time.time()
+    for key in keys:
+        if key not in found:
+            # Unknown or evicted scope: start it now, which only costs a miss
+            cache.add(key, now, timeout=None)
+            found[key] = cache.get(key, now)
+    return [found[key] for key in keys]
+
+
+async def aget_versions(scopes):
+    cache = get_cache()
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    found = await cache.aget_many(keys)
+    now = time.time()
+    for key in keys:
+        if key not in found:
+            await cache.aadd(key, now, timeout=None)
+            found[key] = await cache.aget(key, now)
+    return [found[key] for key in keys]
+
+
+def _set_versions(scopes):
+    now = time.time()
+    get_cache().set_many({VERSION_KEY.format(scope): now for scope in scopes}, timeout=None)
+
+
+def bump(*scopes):
+    scopes = {scope for scope in scopes if scope is not None}
+    if not scopes:
+        return
+    _set_versions(scopes)
+    if connection.in_atomic_block:
+        # A reader may re-cache the old rows before we commit; bump again afterwards
+        transaction.on_commit(lambda: _set_versions(scopes))
+
+
+def user_scopes(user):
+    return [f'user:{user.pk}', f'team:{user.team_id}']
+
+
+def bug_list_scopes(user):
+    """
+    Scopes whose changes can alter what BugQuerySet.visible_to returns for `user`.
+    A change to the user's visibility sets bumps their `user:` scope.
+    """
+    from .visibility import visible_team_ids
+
+    role = user.role
+    scopes = [f'user:{user.pk}']
+    if role in ['product_manager', 'engineering_manager']:
+        scopes.append('bugs:all')
+    elif role in ['team_manager', 'team_lead']:
+        scopes += [f'bugs:team:{team_id}' for team_id in visible_team_ids(user)]
+    elif role == 'developer':
+        scopes += [f'bugs:team:{team_id}' for team_id in visible_team_ids(user)]
+        scopes.append(f'bugs:assignee:{user.pk}')
+    elif role in ['tester', 'customer']:
+        scopes.append(f'bugs:reporter:{user.pk}')
+    return scopes
+
+
+def bug_expand_scopes(expand, bug=None):
+    """
+    Scopes of the relations ?expand= embeds in bug payloads: the related
+    rows of one `bug`, or their whole tables for a list. The reporter is
+    always rendered, so its scopes are covered without an expand.
+    """
+    scopes = []
+    if 'team' in expand:
+        scopes.append('table:team' if bug is None else f'team:{bug.team_id}')
+    if 'project' in expand:
+        scopes.append('table:project')
+    if 'assigned_to' in expand:
+        scopes.append('table:user' if bug is None else f'user:{bug.assigned_to_id}')
+    return scopes
+
+
+def bug_change_scopes(*states):
+    """
+    Scopes touched by a bug moving between `states` ({field attname: value}).
+    """
+    scopes = {'table:bug', 'bugs:all'}
+    for state in states:
+        scopes.add(f"bugs:team:{state.get('team_id')}")
+        scopes.add(f"bugs:assignee:{state.get('assigned_to_id')}")
+        scopes.add(f"bugs:reporter:{state.get('reported_by_id')}")
+        # Assigned and reported bugs are embedded in the user payload
+        scopes.add(f"user:{state.get('assigned_to_id')}")
+        scopes.add(f"user:{state.get('reported_by_id')}")
+    return scopes
+
+
+# ----------------------------
+# Conditional Cached Responses
+# ----------------------------
+def not_modified(request, etag, last_modified):
+    """
+    The ETag decides whenever the client sent one. If-Modified-Since alone
+    only has whole seconds, so it is compared with the exact version time:
+    a change later in the same second must not pass for unmodified.
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def _fingerprint(key, versions):
+    digest = hashlib.md5(f'{key}|{versions}'.encode()).hexdigest()
+    return quote_etag(digest), max(versions)
+
+
+def fingerprint(key, scopes):
+    """
+    Return (etag, last_modified) for `key` given the current versions of `scopes`.
+    """
+    return _fingerprint(key, get_versions(scopes))
+
+
+async def afingerprint(key, scopes):
+    return _fingerprint(key, await aget_versions(scopes))
+
+
+def validator_headers(etag, last_modified):
+    return {'ETag': etag, 'Last-Modified': http_date(last_modified)}
+
+
+def cached_response(request, key, scopes, build):
+    """
+    Serve `build()` (a serializable payload) cached under `key` for as long as
+    none of `scopes` change. Matching If-None-Match / If-Modified-Since
+    headers get a 304 without building or even fetching the payload.
+    """
+    etag, last_modified = fingerprint(key, scopes)
+    headers = validator_headers(etag, last_modified)
+
+    if not_modified(request, etag, last_modified):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cache = get_cache()
+    payload_key = PAYLOAD_KEY.format(etag)
+    data = cache.get(payload_key)
+    if data is None:
+        data = build()
+        cache.set(payload_key, data, timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+
+    return Response(data, headers=headers)
+
+
+async def acached_response(request, key, scopes, build):
+    """
+    cached_response() for async views; `build` is a coroutine function.
+    """
+    etag, last_modified = await afingerprint(key, scopes)
+    headers = validator_headers(etag, last_modified)
+
+    if not_modified(request, etag, last_modified):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cache = get_cache()
+    payload_key = PAYLOAD_KEY.format(etag)
+    data = await cache.aget(payload_key)
+    if data is None:
+        data = await build()
+        await cache.aset(payload_key, data, timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+
+    return Response(data, headers=headers)
+
+
+class ConditionalGetMixin:
+    """
+    Viewset mixin answering list/retrieve with ETag and Last-Modified, and
+    with a 304 before any serialization when the client copy is current.
+
+    `conditional_scopes` lists the table scopes the payload is built from;
+    the requester's own user scope is always added since their role and
+    team decide what get_queryset returns.
+    """
+    conditional_scopes = []
+
+    def get_conditional_scopes(self, request):
+        return [f'user:{request.user.pk}', *self.conditional_scopes]
+
+    def conditional(self, request, respond):
+        key = f'{self.basename}:{request.user.pk}:{request.get_full_path()}'
+        etag, last_modified = fingerprint(key, self.get_conditional_scopes(request))
+        headers = validator_headers(etag, last_modified)
+
+        if not_modified(request, etag, last_modified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response = respond()
+        if response.status_code == status.HTTP_200_OK:
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,47 @@
+from functools import reduce
+from operator import and_
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+# Matches the stored, GIN-indexed tsvector column that migration 0008 adds on
+# PostgreSQL. It is not a model field, so SQLite databases keep working.
+SEARCH_CONFIG = 'english'
+
+
+def supports_full_text():
+    return connection.vendor == 'postgresql'
+
+
+def search_bugs(queryset, q):
+    """
+    Filter `queryset` to bugs matching `q` and order them best match first.
+
+    PostgreSQL uses the GIN-indexed search_vector column ranked by ts_rank;
+    other databases fall back to AND-ed icontains terms, title hits first.
+    """
+    q = q.strip()
+    if not q:
+        return queryset
+
+    if supports_full_text():
+        column = f'{connection.ops.quote_name(queryset.model._meta.db_table)}.search_vector'
+        vector = RawSQL(column, [], output_field=SearchVectorField())
+        query = SearchQuery(q, config=SEARCH_CONFIG, search_type='websearch')
+        return (
+            queryset.alias(search=vector)
+            .filter(search=query)
+            .annotate(rank=SearchRank(vector, query))
+            .order_by('-rank', '-id')
+        )
+
+    terms = q.split()
+    matches = reduce(and_, (Q(title__icontains=term) | Q(description__icontains=term) for term in terms))
+    title_hits = reduce(and_, (Q(title__icontains=term) for term in terms))
+    return (
+        queryset.filter(matches)
+        .annotate(rank=Case(When(title_hits, then=Value(1)), default=Value(0), output_field=IntegerField()))
+        .order_by('-rank', '-id')
+    )
@@ -1,6 +1,13 @@
+from django.db.models import OuterRef, Prefetch, Subquery, Sum
+from django.db.models.functions import Coalesce
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from .models import Bug, Project, Team
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from . import visibility
+from .authentication import add_user_claims
+from .fieldsets import DynamicFieldsMixin
+from .models import Bug, BugEvent, BugStats, Project, Team
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -14,9 +21,16 @@ class CustomLoginSerializer(TokenObtainPairSerializer):
     """
     username_field = 'username'
 
+    @classmethod
+    def get_token(cls, user):
+        # Claims are copied into the access token so requests skip the user lookup
+        return add_user_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         data = super().validate(attrs)
         user = self.user
+        # Precompute what the user may see while logging in, not on their first request
+        visibility.warm(user)
 
         # You can add any additional data you want returned on login
         data['user'] = {
@@ -26,6 +40,20 @@ class CustomLoginSerializer(TokenObtainPairSerializer):
         }
         return data
 
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Re-stamps role/team claims on refresh so a new access token never
+    carries claims older than the refresh that produced it.
+    """
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data['access'], verify=False)
+        user = User.objects.get(pk=access[jwt_settings.USER_ID_CLAIM])
+        data['access'] = str(add_user_claims(access, user))
+        return data
+
 # ----------------------------
 # Basic Nested Serializers
 # ----------------------------
@@ -39,16 +67,36 @@ class ProjectBasicSerializer(serializers.ModelSerializer):
         model = Project
         fields = ['id', 'name', 'description']
 
+class UserBasicSerializer(serializers.ModelSerializer):
+    name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'name', 'role']
+
+    def get_name(self, obj):
+        return obj.get_full_name() or obj.username
+
 class BugBasicSerializer(serializers.ModelSerializer):
     class Meta:
         model = Bug
         fields = ['id', 'title', 'status', 'priority']
 
 
+def similar_bug_data(matches):
+    """
+    Serialize (bug, similarity) pairs from tracker.similarity.similar_bugs.
+    """
+    return [
+        {**BugBasicSerializer(bug).data, 'similarity': round(similarity, 3)}
+        for bug, similarity in matches
+    ]
+
+
 # ----------------------------
 # User Serializer
 # ----------------------------
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     role = serializers.CharField(read_only=True)
     team = TeamBasicSerializer(read_only=True)
     related_projects = serializers.SerializerMethodField()
@@ -62,73 +110,143 @@ class UserSerializer(serializers.ModelSerializer):
             'related_projects', 'assigned_bugs', 'reported_bugs'
         ]
 
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, expand=()):
+        """
+        Prefetch plan shared with UserViewSet so the method fields below
+        read from the prefetch caches instead of querying once per user.
+        Fields outside `fields` skip their join or prefetch.
+        """
+        fields = cls.selected_fields() if fields is None else fields
+        bug_fields = ['id', 'title', 'status', 'priority']
+
+        if 'related_projects' in fields:
+            queryset = queryset.select_related('team__project').prefetch_related(
+                Prefetch('managed_projects', queryset=Project.objects.only('id', 'name', 'description', 'manager')),
+            )
+        elif 'team' in fields:
+            queryset = queryset.select_related('team')
+        if 'assigned_bugs' in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch('assigned_bugs', queryset=Bug.objects.only(*bug_fields, 'assigned_to')),
+            )
+        if 'reported_bugs' in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch('reported_bugs', queryset=Bug.objects.only(*bug_fields, 'reported_by')),
+            )
+        return queryset
+
     def get_related_projects(self, obj):
         if obj.role == 'product_manager':
-            projects = Project.objects.filter(manager=obj)
+            projects = obj.managed_projects.all()
         elif obj.role in ['team_manager', 'team_lead', 'developer', 'tester']:
-            if obj.team:
-                projects = Project.objects.filter(team=obj.team)
-            else:
-                projects = Project.objects.none()
+            # A team belongs to exactly one project
+            projects = [obj.team.project] if obj.team else []
         else:
-            projects = Project.objects.none()
+            projects = []
         return ProjectBasicSerializer(projects, many=True).data
 
     def get_assigned_bugs(self, obj):
         if obj.role == 'developer':
-            bugs = Bug.objects.filter(assigned_to=obj)
-            return BugBasicSerializer(bugs, many=True).data
+            return BugBasicSerializer(obj.assigned_bugs.all(), many=True).data
         return []
 
     def get_reported_bugs(self, obj):
-        bugs = Bug.objects.filter(reported_by=obj)
-        return BugBasicSerializer(bugs, many=True).data
+        return BugBasicSerializer(obj.reported_bugs.all(), many=True).data
 
 
 # ----------------------------
 # Project Serializer
 # ----------------------------
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     manager = serializers.StringRelatedField(read_only=True)
     teams = serializers.SerializerMethodField()
-    bugs = serializers.SerializerMethodField()
+    bug_count = serializers.IntegerField(read_only=True, default=0)
 
     class Meta:
         model = Project
         fields = [
             'id', 'name', 'description', 'manager',
-            'teams', 'bugs', 'created_at', 'updated_at'
+            'teams', 'bug_count', 'created_at'
         ]
+        expandable = {
+            'manager': lambda: UserBasicSerializer(read_only=True),
+            'teams': lambda: TeamBasicSerializer(source='team_set', many=True, read_only=True),
+        }
+        deferrable = ['description']
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, expand=()):
+        """
+        Teams come from one prefetch and bug counts from the BugStats buckets,
+        so a page of projects costs two queries however many bugs they hold.
+        The bugs themselves are paged at /projects/{id}/bugs/.
+        """
+        fields = cls.selected_fields() if fields is None else fields
+        if 'manager' in fields:
+            queryset = queryset.select_related('manager')
+        if 'teams' in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch('team_set', queryset=Team.objects.only('id', 'name', 'project').order_by('name'))
+            )
+        if 'bug_count' in fields:
+            bug_count = (
+                BugStats.objects.filter(project=OuterRef('pk')).order_by()
+                .values('project').annotate(total=Sum('count')).values('total')
+            )
+            queryset = queryset.annotate(bug_count=Coalesce(Subquery(bug_count), 0))
+        return cls.defer_unselected(queryset, fields)
 
     def get_teams(self, obj):
-        teams = Team.objects.filter(project=obj)
-        return [team.name for team in teams]
-
-    def get_bugs(self, obj):
-        bugs = Bug.objects.filter(project=obj)
-        return [bug.title for bug in bugs]
+        return [team.name for team in obj.team_set.all()]
 
 
 # ----------------------------
 # Team Serializer
 # ----------------------------
-class TeamSerializer(serializers.ModelSerializer):
-    lead = serializers.StringRelatedField(read_only=True)
+class TeamSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    lead = UserBasicSerializer(read_only=True)
     members = serializers.SerializerMethodField()
+    managers = UserBasicSerializer(many=True, read_only=True)
 
     class Meta:
         model = Team
-        fields = ['id', 'name', 'lead', 'members', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'project', 'lead', 'members', 'managers']
+        expandable = {
+            'project': lambda: ProjectBasicSerializer(read_only=True),
+        }
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, expand=()):
+        """
+        Memberships come from the User.team FK and the `members` M2M, one
+        prefetch each, plus one for `managers`. Fields left out of a sparse
+        fieldset skip their query entirely.
+        """
+        fields = cls.selected_fields() if fields is None else fields
+
+        people = User.objects.only('id', 'username', 'first_name', 'last_name', 'role', 'team').order_by('id')
+        if 'lead' in fields:
+            queryset = queryset.select_related('lead')
+        if 'project' in fields and 'project' in expand:
+            queryset = queryset.select_related('project')
+        if 'members' in fields:
+            queryset = queryset.prefetch_related(Prefetch('user_set', queryset=people), Prefetch('members', queryset=people))
+        if 'managers' in fields:
+            queryset = queryset.prefetch_related(Prefetch('managers', queryset=people))
+        return queryset
 
     def get_members(self, obj):
-        users = User.objects.filter(team=obj)
-        return [f"{user.first_name} {user.last_name} ({user.role})" for user in users]
+        members = {user.pk: user for user in obj.user_set.all()}
+        for user in obj.members.all():
+            members.setdefault(user.pk, user)
+        return UserBasicSerializer([members[pk] for pk in sorted(members)], many=True).data
 
 
 # ----------------------------
 # Bug Serializer
 # ----------------------------
-class BugSerializer(serializers.ModelSerializer):
+class BugSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     reported_by = serializers.StringRelatedField(read_only=True)
 
     assigned_to = serializers.PrimaryKeyRelatedField(
@@ -152,6 +270,29 @@ class BugSerializer(serializers.ModelSerializer):
             'reported_by', 'assigned_to', 'team', 'project',
             'created_at', 'updated_at'
         ]
+        expandable = {
+            'reported_by': lambda: UserBasicSerializer(read_only=True),
+            'assigned_to': lambda: UserBasicSerializer(read_only=True),
+            'team': lambda: TeamBasicSerializer(read_only=True),
+            'project': lambda: ProjectBasicSerializer(read_only=True),
+        }
+        # The description is most of a bug's bytes; list views rarely need it
+        deferrable = ['description']
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, expand=()):
+        """
+        Join what the selected fields render: the reporter's name, plus any
+        expanded relation. Nothing may load lazily, since the list and detail
+        views serialize inside the event loop.
+        """
+        fields = cls.selected_fields() if fields is None else fields
+        related = [name for name in cls.Meta.expandable if name in fields and name in expand]
+        if 'reported_by' in fields and 'reported_by' not in related:
+            related.append('reported_by')
+        if related:
+            queryset = queryset.select_related(*related)
+        return cls.defer_unselected(queryset, fields)
 
     def create(self, validated_data):
         user = self.context['request'].user
@@ -178,3 +319,12 @@ class BugSerializer(serializers.ModelSerializer):
             }
 
         return super().update(instance, validated_data)
+
+
+# ----------------------------
+# Bug Event Serializer
+# ----------------------------
+class BugEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BugEvent
+        fields = ['id', 'field', 'old', 'new', 'actor', 'created_at']
@@ -0,0 +1,134 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import history, realtime, stats, visibility
+from .authentication import invalidate_user_claims
+from .models import Bug, Project, Team, User
+from .response_cache import bug_change_scopes, bump
+
+
+# ----------------------------
+# Token Claim Invalidation
+# ----------------------------
+@receiver([post_save, post_delete], sender=User)
+def invalidate_claims_on_user_change(sender, instance, **kwargs):
+    # Role, team or active-flag changes must not wait for the access token to expire
+    invalidate_user_claims(instance.pk)
+
+
+# ----------------------------
+# Bug Writes: counters, history, response cache and the change feed
+# ----------------------------
+@receiver(post_save, sender=Bug)
+def bug_saved(sender, instance, created, **kwargs):
+    previous = {} if created else getattr(instance, '_loaded_values', {})
+    current = instance.tracked_values()
+    stats.record_change(previous, current)
+    if created or previous:
+        events = history.record_change(instance.pk, previous, current)
+        realtime.publish([realtime.change_message(instance.pk, previous, current, events)])
+    bump(*bug_change_scopes(previous, current))
+    # Later saves of the same instance compare against what was just written
+    instance._loaded_values = current
+
+
+@receiver(post_delete, sender=Bug)
+def bug_deleted(sender, instance, **kwargs):
+    previous = getattr(instance, '_loaded_values', None) or instance.tracked_values()
+    stats.record_change(previous, {})
+    events = history.record_change(instance.pk, previous, {})
+    realtime.publish([realtime.change_message(instance.pk, previous, {}, events)])
+    bump(*bug_change_scopes(previous))
+
+
+@receiver(pre_delete, sender=Team)
+def team_deleting(sender, instance, **kwargs):
+    # The team's bugs are moved to team=NULL by a bulk UPDATE that sends no signals
+    stats.fold_team_into_unassigned(instance)
+    bump('table:bug', 'bugs:all', f'bugs:team:{instance.pk}', 'bugs:team:None')
+
+
+@receiver([post_save, post_delete], sender=Team)
+def invalidate_team_payloads(sender, instance, **kwargs):
+    bump('table:team', f'team:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+@receiver(m2m_changed, sender=Team.managers.through)
+def invalidate_team_memberships(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    # From the User side (user.teams.add(...)) pk_set holds team ids
+    team_ids = (pk_set or []) if reverse else [instance.pk]
+    bump('table:team', *(f'team:{team_id}' for team_id in team_ids))
+
+
+@receiver([post_save, post_delete], sender=Project)
+def invalidate_project_payloads(sender, instance, **kwargs):
+    team_ids = Team.objects.filter(project=instance).values_list('id', flat=True)
+    bump('table:project', f'user:{instance.manager_id}', *(f'team:{team_id}' for team_id in team_ids))
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_payloads(sender, instance, created=False, update_fields=None, **kwargs):
+    bump('table:user', f'user:{instance.pk}')
+    if kwargs['signal'] is post_save and not display_changed(instance, created, update_fields):
+        return
+    # The user's name is rendered into every bug they reported
+    team_ids = Bug.objects.filter(reported_by=instance).values_list('team_id', flat=True).distinct()
+    bump(
+        f'bugs:reporter:{instance.pk}', 'bugs:all',
+        *(f'bugs:team:{team_id}' for team_id in team_ids),
+    )
+
+
+def display_changed(user, created, update_fields):
+    """
+    Whether a save changed what bug payloads show of `user`. A new user has
+    reported nothing yet; an instance not loaded from the database counts
+    as changed.
+    """
+    current = user.display_values()
+    previous = getattr(user, '_loaded_display', None)
+    user._loaded_display = {**(previous or {}), **current}
+    if created:
+        return False
+    if update_fields is not None and not set(update_fields) & set(User.DISPLAY_FIELDS):
+        return False
+    return previous is None or any(previous.get(field) != value for field, value in current.items())
+
+
+# ----------------------------
+# Visibility Sets
+# ----------------------------
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_visibility(sender, instance, **kwargs):
+    # Role or User.team changed
+    visibility.invalidate(instance.pk)
+
+
+@receiver(pre_save, sender=Team)
+@receiver(pre_save, sender=Project)
+def remember_previous_owner(sender, instance, **kwargs):
+    # A lead or manager replaced by this save loses the team/project it had
+    field = 'lead_id' if sender is Team else 'manager_id'
+    instance._previous_owner_id = (
+        sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Team)
+def invalidate_team_visibility(sender, instance, **kwargs):
+    visibility.invalidate(getattr(instance, '_previous_owner_id', None), *visibility.team_user_ids(instance.pk))
+
+
+@receiver(pre_delete, sender=Team)
+def invalidate_deleted_team_visibility(sender, instance, **kwargs):
+    # The membership rows go with the team, without m2m_changed
+    visibility.invalidate(*visibility.team_user_ids(instance.pk))
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_visibility(sender, instance, **kwargs):
+    visibility.invalidate(getattr(instance, '_previous_owner_id', None), instance.manager_id)
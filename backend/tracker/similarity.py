@@ -0,0 +1,75 @@
+import random
+import re
+import zlib
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+
+SHINGLE_SIZE = 3
+NUM_PERMUTATIONS = 64
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+# ----------------------------
+# MinHash fallback (non-PostgreSQL)
+# ----------------------------
+def shingles(text):
+    """
+    Padded character trigrams of the normalized text, like pg_trgm builds.
+    """
+    words = re.findall(r'\w+', text.lower())
+    grams = set()
+    for word in words:
+        padded = f'  {word} '
+        grams.update(padded[i:i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1))
+    return grams
+
+
+def minhash(grams):
+    hashes = [zlib.crc32(gram.encode()) for gram in grams] or [0]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(left, right):
+    return sum(x == y for x, y in zip(left, right)) / NUM_PERMUTATIONS
+
+
+# ----------------------------
+# Similar Bug Lookup
+# ----------------------------
+def similar_bugs(queryset, title, limit=None, threshold=None):
+    """
+    Up to `limit` bugs from `queryset` whose titles resemble `title`, best first,
+    as (bug, similarity) pairs.
+
+    PostgreSQL probes the pg_trgm GIN index on title with the % operator; other
+    databases compare MinHash signatures of trigram shingles in Python.
+    """
+    limit = limit or settings.BUG_SIMILAR_LIMIT
+    threshold = settings.BUG_SIMILAR_THRESHOLD if threshold is None else threshold
+    title = title.strip()
+    if not title:
+        return []
+
+    if connection.vendor == 'postgresql':
+        matches = (
+            queryset.filter(title__trigram_similar=title)
+            .annotate(similarity=TrigramSimilarity('title', title))
+            .filter(similarity__gte=threshold)
+            .order_by('-similarity', '-id')[:limit]
+        )
+        return [(bug, bug.similarity) for bug in matches]
+
+    target = minhash(shingles(title))
+    scored = []
+    for pk, other in queryset.values_list('id', 'title').iterator():
+        score = estimate_similarity(target, minhash(shingles(other)))
+        if score >= threshold:
+            scored.append((score, pk))
+    scored.sort(reverse=True)
+    scored = scored[:limit]
+    bugs = queryset.model.objects.in_bulk([pk for _, pk in scored])
+    return [(bugs[pk], score) for score, pk in scored]
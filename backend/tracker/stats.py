@@ -0,0 +1,125 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import Bug, BugStats
+
+BUCKET_FIELDS = ['project_id', 'team_id', 'status', 'priority']
+
+
+def bucket(state):
+    """
+    BugStats key for a bug state ({field attname: value}), or None if unknown.
+    """
+    if not all(field in state for field in BUCKET_FIELDS):
+        return None
+    return tuple(state[field] for field in BUCKET_FIELDS)
+
+
+def change_deltas(previous, current):
+    """
+    Counter deltas for a bug moving from `previous` to `current`; either may be
+    empty for a create or delete.
+    """
+    deltas = Counter()
+    old, new = bucket(previous), bucket(current)
+    if old != new:
+        if old is not None:
+            deltas[old] -= 1
+        if new is not None:
+            deltas[new] += 1
+    return deltas
+
+
+def apply_deltas(deltas):
+    """
+    Apply {bucket: delta} to BugStats in one transaction. Buckets are bumped
+    with UPDATE ... SET count = count + delta, in a fixed order so concurrent
+    writers cannot deadlock, and created on first use.
+    """
+    with transaction.atomic():
+        for key, delta in sorted(deltas.items(), key=lambda item: bucket_order(item[0])):
+            if delta:
+                bump(dict(zip(BUCKET_FIELDS, key)), delta)
+
+
+def bucket_order(key):
+    return tuple((value is not None, value) for value in key)
+
+
+def bump(filters, delta):
+    buckets = BugStats.objects.filter(**filters)
+    # A missing bucket on a decrement means its project/team is being deleted
+    if buckets.update(count=F('count') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            BugStats.objects.create(count=delta, **filters)
+    except IntegrityError:
+        # Another writer created the bucket since our UPDATE; the unique
+        # constraint blocked until it committed, so the row is there now.
+        buckets.update(count=F('count') + delta)
+
+
+def record_change(previous, current):
+    apply_deltas(change_deltas(previous, current))
+
+
+def fold_team_into_unassigned(team):
+    """
+    Bugs of a deleted team fall back to team=NULL, so move its counts there.
+    """
+    rows = BugStats.objects.filter(team=team).values_list('project_id', 'status', 'priority', 'count')
+    deltas = Counter()
+    for project_id, status, priority, count in rows:
+        deltas[(project_id, None, status, priority)] += count
+    apply_deltas(deltas)
+
+
+def rebuild():
+    """
+    Recompute every bucket from the bug table. Returns the number of buckets.
+    """
+    rows = Bug.objects.order_by().values(*BUCKET_FIELDS).annotate(total=Count('id'))
+    with transaction.atomic():
+        BugStats.objects.all().delete()
+        BugStats.objects.bulk_create(
+            [BugStats(count=row.pop('total'), **row) for row in rows],
+            batch_size=1000,
+        )
+    return BugStats.objects.count()
+
+
+def empty_summary():
+    return {
+        'total': 0,
+        'by_status': {status: 0 for status, _ in Bug.STATUS_CHOICES},
+        'by_priority': {priority: 0 for priority, _ in Bug.PRIORITY_CHOICES},
+    }
+
+
+def add_to_summary(summary, status, priority, total):
+    summary['total'] += total
+    summary['by_status'][status] += total
+    summary['by_priority'][priority] += total
+
+
+def summarize(stats):
+    """
+    Collapse a BugStats queryset into total / by_status / by_priority counts,
+    plus the same breakdown per team, in a single grouped query.
+    """
+    rows = (
+        stats.filter(count__gt=0).order_by()
+        .values_list('team_id', 'status', 'priority')
+        .annotate(total=Sum('count'))
+    )
+    summary = empty_summary()
+    teams = {}
+    for team_id, status, priority, total in rows:
+        add_to_summary(summary, status, priority, total)
+        add_to_summary(teams.setdefault(team_id, empty_summary()), status, priority, total)
+
+    summary['teams'] = [{'team': team_id, **teams[team_id]} for team_id in sorted(teams, key=lambda t: (t is None, t))]
+    return summary
@@ -1,3 +1,1365 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import json
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import QuerySet, Sum
+from django.test import AsyncClient, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.core.cache import cache, caches
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import realtime, stats, visibility
+from .checks import check_shared_cache
+from .export import aiterate
+from .mail import deliver_batch, enqueue
+from .models import Bug, BugDailyRollup, BugEvent, BugStats, OutboundEmail, Project, Team, User
+
+
+# A backend every process can read, unlike the LocMemCache the tests run on;
+# separate client instances over it stand in for separate workers
+SHARED_TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'tracker_test_cache'},
+}
+
+
+class TrackerTestCase(TestCase):
+    """
+    Small fixture shared by the API tests: one project with one team,
+    a manager for each layer and a developer/tester pair working on it.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pm = User.objects.create_user('pm', 'pm@example.com', 'pw', role='product_manager')
+        cls.eng = User.objects.create_user('eng', 'eng@example.com', 'pw', role='engineering_manager')
+        cls.project = Project.objects.create(name='Alpha', manager=cls.pm)
+        cls.lead = User.objects.create_user('lead', 'lead@example.com', 'pw', role='team_lead')
+        cls.team = Team.objects.create(name='Alpha 1', lead=cls.lead, project=cls.project)
+        cls.lead.team = cls.team
+        cls.lead.save()
+        cls.dev = User.objects.create_user('dev', 'dev@example.com', 'pw', role='developer', team=cls.team)
+        cls.tester = User.objects.create_user('tester', 'tester@example.com', 'pw', role='tester', team=cls.team)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, user):
+        # Token logins precompute the visibility sets; do the same here
+        visibility.warm(user)
+        self.client.force_authenticate(user=user)
+
+    def make_bug(self, **kwargs):
+        values = {
+            'title': 'Crash on save',
+            'description': 'Saving a form crashes the app.',
+            'reported_by': self.tester,
+            'assigned_to': self.dev,
+            'project': self.project,
+            'team': self.team,
+        }
+        values.update(kwargs)
+        return Bug.objects.create(**values)
+
+    def assertStatsMatchBugs(self):
+        out = StringIO()
+        call_command('rebuild_bug_stats', '--check', stdout=out)
+        self.assertIn('0 bucket(s) drifted', out.getvalue())
+
+
+# ----------------------------
+# User Endpoints
+# ----------------------------
+class UserListTests(TrackerTestCase):
+    def test_list_runs_constant_number_of_queries(self):
+        self.make_bug()
+        self.login(self.pm)
+
+        # users, managed projects, assigned bugs, reported bugs
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/users/')
+        self.assertEqual(response.status_code, 200)
+        small = len(response.data)
+
+        for i in range(10):
+            dev = User.objects.create_user(f'dev{i}', f'dev{i}@example.com', 'pw', role='developer', team=self.team)
+            self.make_bug(assigned_to=dev)
+
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/users/')
+        self.assertEqual(len(response.data), small + 10)
+
+    def test_list_reads_relations_from_prefetch(self):
+        bug = self.make_bug()
+        self.login(self.pm)
+
+        response = self.client.get('/api/users/')
+        by_id = {row['id']: row for row in response.data}
+
+        self.assertEqual([b['id'] for b in by_id[self.dev.id]['assigned_bugs']], [bug.id])
+        self.assertEqual([b['id'] for b in by_id[self.tester.id]['reported_bugs']], [bug.id])
+        self.assertEqual([p['id'] for p in by_id[self.dev.id]['related_projects']], [self.project.id])
+        self.assertEqual([p['id'] for p in by_id[self.pm.id]['related_projects']], [self.project.id])
+        self.assertEqual(by_id[self.tester.id]['assigned_bugs'], [])
+
+
+# ----------------------------
+# Bug Endpoints
+# ----------------------------
+class BugPaginationTests(TrackerTestCase):
+    def test_cursor_walks_every_bug_once_newest_first(self):
+        bugs = [self.make_bug(title=f'Bug {i}') for i in range(7)]
+        self.login(self.pm)
+
+        seen = []
+        url = '/api/bugs/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(seen, [bug.id for bug in reversed(bugs)])
+
+    def test_cursor_breaks_created_at_ties_by_id(self):
+        bugs = [self.make_bug(title=f'Bug {i}') for i in range(5)]
+        Bug.objects.update(created_at=bugs[0].created_at)
+        self.login(self.pm)
+
+        first = self.client.get('/api/bugs/?page_size=2').data
+        second = self.client.get(first['next']).data
+        third = self.client.get(second['next']).data
+
+        ids = [row['id'] for page in (first, second, third) for row in page['results']]
+        self.assertEqual(ids, sorted((bug.id for bug in bugs), reverse=True))
+        self.assertIsNone(third['next'])
+
+    def test_previous_cursor_returns_the_earlier_page(self):
+        for i in range(5):
+            self.make_bug(title=f'Bug {i}')
+        self.login(self.pm)
+
+        first = self.client.get('/api/bugs/?page_size=2').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+
+        self.assertIsNone(first['previous'])
+        self.assertEqual(back['results'], first['results'])
+
+    def test_invalid_cursor_is_rejected(self):
+        self.login(self.pm)
+        response = self.client.get('/api/bugs/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+class BugVisibilityTests(TrackerTestCase):
+    def test_developer_sees_assigned_and_team_bugs_once(self):
+        other_team = Team.objects.create(name='Alpha 2', project=self.project)
+        both = self.make_bug(title='Assigned on own team')
+        assigned_elsewhere = self.make_bug(title='Assigned elsewhere', team=other_team)
+        team_only = self.make_bug(title='Team only', assigned_to=None)
+        self.make_bug(title='Not visible', assigned_to=None, team=other_team)
+
+        visible = list(Bug.objects.visible_to(self.dev).order_by('id').values_list('id', flat=True))
+        self.assertEqual(visible, [both.id, assigned_elsewhere.id, team_only.id])
+
+
+# ----------------------------
+# Permissions
+# ----------------------------
+class RolePermissionTests(TrackerTestCase):
+    def test_matrix_allows_and_denies_by_role_and_action(self):
+        bug = self.make_bug()
+
+        self.login(self.tester)
+        self.assertEqual(self.client.get('/api/bugs/').status_code, 403)
+        self.assertEqual(self.client.get(f'/api/bugs/{bug.id}/').status_code, 200)
+
+        self.login(self.dev)
+        self.assertEqual(self.client.get('/api/bugs/').status_code, 200)
+        self.assertEqual(self.client.get('/api/projects/').status_code, 403)
+
+    def test_every_registered_action_has_an_entry(self):
+        from .permissions import PERMISSION_MATRIX
+        from .urls import router
+
+        for prefix, viewset, basename in router.registry:
+            actions = {action for action in ['list', 'create', 'retrieve', 'update', 'partial_update', 'destroy']
+                       if hasattr(viewset, action)}
+            actions |= {extra.__name__ for extra in viewset.get_extra_actions()}
+            self.assertEqual(actions - set(PERMISSION_MATRIX[viewset.permission_scope]), set(), prefix)
+
+    def test_unlisted_actions_are_denied(self):
+        bug = self.make_bug()
+        self.login(self.tester)
+
+        with mock.patch.dict('tracker.permissions.PERMISSION_MATRIX', {'bugs': {}}):
+            self.assertEqual(self.client.get(f'/api/bugs/{bug.id}/').status_code, 403)
+
+    def test_bug_actions_beyond_crud_have_their_own_roles(self):
+        bug = self.make_bug()
+        customer = User.objects.create_user('cust', 'cust@example.com', 'pw', role='customer')
+
+        self.login(customer)
+        self.assertEqual(self.client.get('/api/bugs/similar/', {'title': 'Crash'}).status_code, 200)
+        self.assertEqual(self.client.get(f'/api/bugs/{bug.id}/history/').status_code, 403)
+
+        self.login(self.tester)
+        self.assertEqual(self.client.get('/api/bugs/stream/').status_code, 403)
+        self.assertEqual(self.client.post('/api/bugs/bulk-update/', {
+            'ids': [bug.id], 'changes': {'status': 'closed'},
+        }, format='json').status_code, 403)
+
+        self.login(self.dev)
+        self.assertEqual(self.client.get(f'/api/users/{self.dev.id}/').status_code, 200)
+
+    def test_reporters_keep_deleting_their_own_bugs(self):
+        bug = self.make_bug()
+        customer = User.objects.create_user('cust', 'cust@example.com', 'pw', role='customer')
+
+        self.login(customer)
+        self.assertEqual(self.client.delete(f'/api/bugs/{bug.id}/').status_code, 404)
+        self.login(self.tester)
+        self.assertEqual(self.client.delete(f'/api/bugs/{bug.id}/').status_code, 204)
+
+
+# ----------------------------
+# Authentication
+# ----------------------------
+class ClaimsAuthenticationTests(TrackerTestCase):
+    def obtain_access(self, username):
+        response = self.client.post('/api/token/', {'username': username, 'password': 'pw'})
+        self.assertEqual(response.status_code, 200)
+        return response.data['access']
+
+    def test_token_requests_skip_the_user_lookup(self):
+        access = self.obtain_access('lead')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        # Only the bug page itself is queried
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/bugs/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_current_user_loads_the_full_row(self):
+        access = self.obtain_access('dev')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        response = self.client.get('/api/auth/user/')
+
+        self.assertEqual(response.data['email'], 'dev@example.com')
+        self.assertEqual(response.data['team']['id'], self.team.id)
+
+    def test_role_change_takes_effect_before_token_expiry(self):
+        access = self.obtain_access('tester')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.client.get('/api/bugs/').status_code, 403)
+
+        self.tester.role = 'team_lead'
+        self.tester.save()
+
+        self.assertEqual(self.client.get('/api/bugs/').status_code, 200)
+
+    def test_deactivation_survives_a_cache_flush(self):
+        access = self.obtain_access('dev')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        self.dev.is_active = False
+        self.dev.save()
+        cache.clear()
+
+        self.assertEqual(self.client.get('/api/bugs/').status_code, 401)
+
+    @override_settings(CACHES=SHARED_TEST_CACHES)
+    def test_invalidation_reaches_other_processes(self):
+        call_command('createcachetable', verbosity=0)
+        access = self.obtain_access('tester')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        # The save invalidates through this process's cache client...
+        self.tester.role = 'team_lead'
+        self.tester.save()
+
+        # ...and a worker with a client of its own sees the marker in the shared store
+        other_worker = caches.create_connection('default')
+        with mock.patch('tracker.authentication.cache', other_worker):
+            self.assertEqual(self.client.get('/api/bugs/').status_code, 200)
+
+    def test_refresh_stamps_current_claims(self):
+        refresh = self.client.post('/api/token/', {'username': 'dev', 'password': 'pw'}).data['refresh']
+        User.objects.filter(pk=self.dev.pk).update(role='tester')
+
+        response = self.client.post('/api/token/refresh/', {'refresh': refresh})
+
+        self.assertEqual(AccessToken(response.data['access'])['role'], 'tester')
+
+
+class SharedCacheCheckTests(TestCase):
+    def test_process_local_cache_fails_the_deploy_check(self):
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=local):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['tracker.E001'])
+        with override_settings(CACHES=SHARED_TEST_CACHES):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+# ----------------------------
+# Response Cache
+# ----------------------------
+class ResponseCacheTests(TrackerTestCase):
+    def test_unchanged_current_user_returns_304(self):
+        self.login(self.dev)
+        first = self.client.get('/api/auth/user/')
+
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/auth/user/', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(second.status_code, 304)
+        self.assertIn('Last-Modified', first)
+
+    def test_bug_changes_invalidate_affected_payloads(self):
+        self.login(self.dev)
+        before = self.client.get('/api/auth/user/')
+        self.assertEqual(before.data['assigned_bugs'], [])
+
+        bug = self.make_bug()
+        after = self.client.get('/api/auth/user/', HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual([b['id'] for b in after.data['assigned_bugs']], [bug.id])
+
+        other = User.objects.create_user('dev2', 'dev2@example.com', 'pw', role='developer', team=self.team)
+        bug.assigned_to = other
+        bug.save()
+        self.assertEqual(self.client.get('/api/auth/user/').data['assigned_bugs'], [])
+
+    def test_bug_list_is_served_from_cache_until_a_visible_bug_changes(self):
+        self.make_bug()
+        self.login(self.lead)
+        self.client.get('/api/bugs/')
+
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/bugs/')
+        self.assertEqual(len(cached.data['results']), 1)
+
+        other_team = Team.objects.create(name='Alpha 2', project=self.project)
+        self.make_bug(team=other_team)
+        with self.assertNumQueries(0):
+            self.client.get('/api/bugs/')
+
+        self.make_bug(title='Second on our team')
+        self.assertEqual(len(self.client.get('/api/bugs/').data['results']), 2)
+
+
+class ConditionalGetTests(TrackerTestCase):
+    def test_bug_detail_revalidates_on_updated_at(self):
+        bug = self.make_bug()
+        self.login(self.lead)
+        first = self.client.get(f'/api/bugs/{bug.id}/')
+
+        second = self.client.get(f'/api/bugs/{bug.id}/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+        bug.status = 'resolved'
+        bug.save()
+        third = self.client.get(f'/api/bugs/{bug.id}/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(third.data['status'], 'resolved')
+
+    def test_expanded_relations_revalidate_when_renamed(self):
+        bug = self.make_bug()
+        self.login(self.lead)
+        detail = self.client.get(f'/api/bugs/{bug.id}/', {'expand': 'team,assigned_to'})
+        listed = self.client.get('/api/bugs/', {'expand': 'team'})
+        teams = self.client.get('/api/teams/', {'expand': 'project'})
+
+        self.team.name = 'Alpha Core'
+        self.team.save()
+        self.project.name = 'Alpha Platform'
+        self.project.save()
+
+        response = self.client.get(f'/api/bugs/{bug.id}/', {'expand': 'team,assigned_to'},
+                                   HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['team']['name'], 'Alpha Core')
+        response = self.client.get('/api/bugs/', {'expand': 'team'}, HTTP_IF_NONE_MATCH=listed['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['team']['name'], 'Alpha Core')
+        response = self.client.get('/api/teams/', {'expand': 'project'}, HTTP_IF_NONE_MATCH=teams['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['project']['name'], 'Alpha Platform')
+
+        assigned = self.client.get(f'/api/bugs/{bug.id}/', {'expand': 'assigned_to'})
+        self.dev.first_name = 'Dana'
+        self.dev.save()
+        response = self.client.get(f'/api/bugs/{bug.id}/', {'expand': 'assigned_to'},
+                                   HTTP_IF_NONE_MATCH=assigned['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['assigned_to']['name'], 'Dana')
+
+    def test_user_list_is_not_modified_until_a_user_changes(self):
+        self.login(self.pm)
+        first = self.client.get('/api/users/')
+
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/users/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+        self.dev.first_name = 'Dana'
+        self.dev.save()
+        third = self.client.get('/api/users/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, 200)
+
+    def test_only_display_changes_of_a_reporter_invalidate_bug_lists(self):
+        self.make_bug()
+        self.login(self.pm)
+        first = self.client.get('/api/bugs/')
+
+        tester = User.objects.get(pk=self.tester.pk)
+        tester.email = 'qa@example.com'
+        with self.assertNumQueries(1):
+            tester.save()
+        second = self.client.get('/api/bugs/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+        tester.username = 'qa'
+        tester.save()
+        third = self.client.get('/api/bugs/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(third.data['results'][0]['reported_by'], 'qa (tester)')
+
+    def test_if_modified_since_sees_a_change_within_the_same_second(self):
+        self.login(self.pm)
+        with mock.patch('tracker.response_cache.time.time', return_value=1_700_000_000.2):
+            first = self.client.get('/api/users/')
+        with mock.patch('tracker.response_cache.time.time', return_value=1_700_000_000.7):
+            self.dev.first_name = 'Dana'
+            self.dev.save()
+
+        second = self.client.get('/api/users/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second['Last-Modified'], first['Last-Modified'])
+
+    @override_settings(CACHES=SHARED_TEST_CACHES)
+    def test_a_change_in_another_process_invalidates_the_etag(self):
+        call_command('createcachetable', verbosity=0)
+        self.login(self.pm)
+        first = self.client.get('/api/users/')
+
+        # Another worker saves the change through a cache client of its own
+        other_worker = caches.create_connection('default')
+        with mock.patch('tracker.response_cache.get_cache', return_value=other_worker):
+            self.dev.first_name = 'Dana'
+            self.dev.save()
+
+        second = self.client.get('/api/users/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+
+
+# ----------------------------
+# Bug Stats
+# ----------------------------
+class BugStatsTests(TrackerTestCase):
+    def test_counters_follow_creates_updates_and_deletes(self):
+        bug = self.make_bug(priority='high')
+        self.make_bug(status='closed')
+        self.assertStatsMatchBugs()
+
+        bug.status = 'in_progress'
+        bug.team = Team.objects.create(name='Alpha 2', project=self.project)
+        bug.save()
+        self.assertStatsMatchBugs()
+
+        bug.delete()
+        self.assertStatsMatchBugs()
+
+    def test_deleting_a_team_moves_its_counts_to_no_team(self):
+        other_team = Team.objects.create(name='Alpha 2', project=self.project)
+        self.make_bug(team=other_team)
+
+        other_team.delete()
+        self.assertStatsMatchBugs()
+
+    def test_one_row_per_bucket_even_without_a_team(self):
+        for team in [self.team, None]:
+            BugStats.objects.create(project=self.project, team=team, status='open', priority='low', count=1)
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                BugStats.objects.create(project=self.project, team=team, status='open', priority='low', count=1)
+
+    def test_a_bucket_created_concurrently_is_bumped_not_duplicated(self):
+        bucket = {'project_id': self.project.id, 'team_id': None, 'status': 'open', 'priority': 'low'}
+        BugStats.objects.create(count=1, **bucket)
+        update = QuerySet.update
+        updates = []
+
+        def racing_update(queryset, **kwargs):
+            # Our first UPDATE ran before the other writer's INSERT committed
+            updates.append(kwargs)
+            return 0 if len(updates) == 1 else update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=racing_update):
+            stats.apply_deltas({tuple(bucket.values()): 2})
+
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(list(BugStats.objects.values_list('count', flat=True)), [3])
+
+    def test_project_stats_endpoint(self):
+        self.make_bug(priority='high')
+        self.make_bug(status='closed', priority='high')
+        self.make_bug(team=None, priority='low')
+        self.login(self.pm)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/projects/{self.project.id}/stats/')
+
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(response.data['by_status']['open'], 2)
+        self.assertEqual(response.data['by_priority']['high'], 2)
+        self.assertEqual([row['team'] for row in response.data['teams']], [self.team.id, None])
+
+
+# ----------------------------
+# Bulk Endpoints
+# ----------------------------
+class BugBulkImportTests(TrackerTestCase):
+    def row(self, **kwargs):
+        values = {'title': 'Imported', 'description': 'From the old tracker.', 'project': self.project.id}
+        values.update(kwargs)
+        return values
+
+    def test_json_array_reports_row_errors_and_inserts_the_rest(self):
+        self.login(self.tester)
+        rows = [
+            self.row(team=self.team.id, assigned_to=self.dev.id),
+            self.row(project=9999),
+            self.row(status='bogus'),
+            self.row(assigned_to=self.tester.id),
+            self.row(priority='high'),
+        ]
+
+        response = self.client.post('/api/bugs/bulk/', rows, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [1, 2, 3])
+        self.assertEqual(set(Bug.objects.values_list('reported_by', flat=True)), {self.tester.id})
+        self.assertEqual(self.client.get('/api/bugs/bulk/').status_code, 405)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.login(self.tester)
+        rows = [self.row(team=self.team.id, assigned_to=self.dev.id)]
+
+        with CaptureQueriesContext(connection) as few:
+            self.client.post('/api/bugs/bulk/', rows * 2, format='json')
+        with CaptureQueriesContext(connection) as many:
+            self.client.post('/api/bugs/bulk/', rows * 50, format='json')
+
+        self.assertLessEqual(len(many), len(few))
+        self.assertEqual(Bug.objects.count(), 52)
+
+    def test_ndjson_stream_in_small_batches(self):
+        self.login(self.pm)
+        body = '\n'.join([
+            json.dumps(self.row(title='one')),
+            '{not json',
+            json.dumps(self.row(title='two')),
+            json.dumps(self.row(title='three')),
+        ])
+
+        response = self.client.post(
+            '/api/bugs/bulk/?batch_size=2', body, content_type='application/x-ndjson'
+        )
+
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(response.data['errors'][0]['row'], 1)
+        self.assertEqual(
+            sorted(Bug.objects.values_list('title', flat=True)), ['one', 'three', 'two']
+        )
+        self.assertStatsMatchBugs()
+
+    def test_customers_cannot_assign(self):
+        customer = User.objects.create_user('cust', 'cust@example.com', 'pw', role='customer')
+        self.login(customer)
+
+        response = self.client.post('/api/bugs/bulk/', [self.row(assigned_to=self.dev.id)], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['errors']['assigned_to'], ['Customers cannot assign bugs.'])
+
+
+class BugBulkUpdateTests(TrackerTestCase):
+    def test_updates_only_visible_bugs_in_one_statement(self):
+        other_team = Team.objects.create(name='Alpha 2', project=self.project)
+        mine = [self.make_bug(), self.make_bug()]
+        hidden = self.make_bug(team=other_team, assigned_to=None)
+        self.login(self.lead)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/bugs/bulk-update/', {
+                'ids': [bug.id for bug in mine] + [hidden.id],
+                'changes': {'status': 'in_progress', 'priority': 'critical'},
+            }, format='json')
+
+        self.assertEqual(response.data, {'matched': 2, 'updated': 2})
+        self.assertEqual(sum(q['sql'].startswith('UPDATE "tracker_bug"') for q in queries), 1)
+        self.assertEqual(Bug.objects.filter(status='in_progress', priority='critical').count(), 2)
+        self.assertEqual(Bug.objects.get(pk=hidden.pk).status, 'open')
+        self.assertStatsMatchBugs()
+
+    def test_role_restrictions_match_single_updates(self):
+        bug = self.make_bug()
+
+        self.login(self.dev)
+        response = self.client.post('/api/bugs/bulk-update/', {
+            'filter': {'status': 'open'}, 'changes': {'priority': 'low'},
+        }, format='json')
+        self.assertEqual(response.status_code, 403)
+
+        # Leads may not reassign; the assignee change is dropped like in BugSerializer.update
+        self.login(self.lead)
+        response = self.client.post('/api/bugs/bulk-update/', {
+            'filter': {'status': 'open'}, 'changes': {'assigned_to': None},
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Bug.objects.get(pk=bug.pk).assigned_to_id, self.dev.id)
+
+    def test_requires_exactly_one_selector(self):
+        self.login(self.pm)
+        response = self.client.post('/api/bugs/bulk-update/', {'changes': {'status': 'closed'}}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+# ----------------------------
+# Export
+# ----------------------------
+class BugExportTests(TrackerTestCase):
+    def read(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_csv_export_respects_visibility(self):
+        other_team = Team.objects.create(name='Alpha 2', project=self.project)
+        visible = self.make_bug(title='Comma, "quoted" title')
+        self.make_bug(team=other_team)
+        self.login(self.lead)
+
+        response = self.client.get('/api/bugs/export/')
+
+        rows = list(csv.reader(StringIO(self.read(response).decode())))
+        self.assertEqual(rows[0][:2], ['id', 'title'])
+        self.assertEqual([row[:2] for row in rows[1:]], [[str(visible.id), visible.title]])
+
+    def test_gzipped_ndjson_export(self):
+        bug = self.make_bug()
+        self.login(self.pm)
+
+        response = self.client.get('/api/bugs/export/?output=ndjson&gzip=1')
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        lines = gzip.decompress(self.read(response)).decode().splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [bug.id])
+
+    def test_testers_cannot_export(self):
+        self.login(self.tester)
+        self.assertEqual(self.client.get('/api/bugs/export/').status_code, 403)
+
+    def test_keyset_batches_without_server_side_cursors(self):
+        bugs = [self.make_bug(title=f'Bug {i}') for i in range(5)]
+        self.login(self.pm)
+
+        with mock.patch.dict(connection.settings_dict, {'DISABLE_SERVER_SIDE_CURSORS': True}), \
+                self.settings(BUG_EXPORT_CHUNK_SIZE=2):
+            response = self.client.get('/api/bugs/export/?output=ndjson')
+            with CaptureQueriesContext(connection) as queries:
+                lines = self.read(response).decode().splitlines()
+
+        self.assertEqual([json.loads(line)['id'] for line in lines], [bug.id for bug in bugs])
+        self.assertEqual(len(queries), 3)
+
+    async def test_asgi_export_streams_without_buffering(self):
+        bug = await Bug.objects.acreate(
+            title='Login fails', description='400 after submit.', reported_by=self.tester,
+            assigned_to=self.dev, project=self.project, team=self.team,
+        )
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.pm)}'}
+
+        with self.settings(SERVER_MODE='asgi'):
+            response = await AsyncClient().get('/api/bugs/export/?output=ndjson', headers=headers)
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual([json.loads(line)['id'] for line in body.decode().splitlines()], [bug.id])
+
+    async def test_aiterate_pulls_one_chunk_at_a_time(self):
+        produced = []
+
+        def chunks():
+            for n in range(3):
+                produced.append(n)
+                yield b'chunk'
+
+        stream = aiterate(chunks())
+        self.assertEqual(await anext(stream), b'chunk')
+        self.assertEqual(produced, [0])
+        await stream.aclose()
+
+
+# ----------------------------
+# Search
+# ----------------------------
+class BugSearchTests(TrackerTestCase):
+    def test_q_filters_and_ranks_title_matches_first(self):
+        in_description = self.make_bug(title='Blank page', description='Login button does nothing.')
+        in_title = self.make_bug(title='Login fails', description='Error 400 after submit.')
+        self.make_bug(title='Slow dashboard', description='Charts take ages.')
+        self.login(self.pm)
+
+        response = self.client.get('/api/bugs/?q=login')
+
+        self.assertEqual([row['id'] for row in response.data['results']], [in_title.id, in_description.id])
+
+    def test_all_terms_must_match(self):
+        bug = self.make_bug(title='Login fails', description='Error 400 after submit.')
+        self.make_bug(title='Login slow', description='Takes ten seconds.')
+        self.login(self.pm)
+
+        response = self.client.get('/api/bugs/?q=login 400')
+
+        self.assertEqual([row['id'] for row in response.data['results']], [bug.id])
+
+
+# ----------------------------
+# Duplicate Detection
+# ----------------------------
+class SimilarBugTests(TrackerTestCase):
+    def test_similar_endpoint_ranks_near_duplicates(self):
+        close = self.make_bug(title='Login page crashes on submit')
+        closer = self.make_bug(title='Login page crashes on submit button')
+        self.make_bug(title='Dashboard charts render slowly')
+        self.login(self.pm)
+
+        response = self.client.get('/api/bugs/similar/', {'title': 'Login page crashes on submit button'})
+
+        self.assertEqual([row['id'] for row in response.data], [closer.id, close.id])
+        self.assertEqual(response.data[0]['similarity'], 1.0)
+
+    def test_create_warns_about_visible_duplicates(self):
+        existing = self.make_bug(title='Password reset email never arrives')
+        self.login(self.tester)
+
+        response = self.client.post('/api/bugs/', {
+            'title': 'Password reset email never arrived',
+            'description': 'Same as before.',
+            'project': self.project.id,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row['id'] for row in response.data['similar_bugs']], [existing.id])
+
+
+# ----------------------------
+# Outbound Email
+# ----------------------------
+class OutboundEmailTests(TrackerTestCase):
+    def test_password_reset_only_enqueues(self):
+        with CaptureQueriesContext(connection) as known:
+            known_response = self.client.post('/api/password-reset/', {'email': 'dev@example.com'}, format='json')
+        with CaptureQueriesContext(connection) as unknown:
+            unknown_response = self.client.post('/api/password-reset/', {'email': 'nobody@example.com'}, format='json')
+
+        self.assertEqual(known_response.data, unknown_response.data)
+        self.assertEqual(len(known), len(unknown))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.filter(status='pending').count(), 2)
+
+    def test_worker_sends_reset_and_skips_unknown_address(self):
+        enqueue('password_reset', 'dev@example.com')
+        enqueue('password_reset', 'nobody@example.com')
+
+        counts = deliver_batch(10)
+
+        self.assertEqual(counts, {'sent': 1, 'skipped': 1, 'retry': 0, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['dev@example.com'])
+        self.assertIn('/reset-password/', mail.outbox[0].body)
+        self.assertEqual(deliver_batch(10), {'sent': 0, 'skipped': 0, 'retry': 0, 'failed': 0})
+
+    def test_failed_send_backs_off_then_gives_up(self):
+        outbound = enqueue('message', 'dev@example.com', subject='Assigned', body='Bug #1 is yours.')
+
+        with self.settings(OUTBOX_MAX_ATTEMPTS=2), mock.patch(
+            'django.core.mail.EmailMessage.send', side_effect=OSError('connection refused')
+        ):
+            self.assertEqual(deliver_batch(10)['retry'], 1)
+            outbound.refresh_from_db()
+            self.assertGreater(outbound.next_attempt_at, timezone.now() + timedelta(seconds=30))
+            # Not due yet, so the next pass leaves it alone
+            self.assertEqual(deliver_batch(10)['retry'], 0)
+
+            OutboundEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(deliver_batch(10)['failed'], 1)
+
+        outbound.refresh_from_db()
+        self.assertEqual((outbound.status, outbound.attempts), ('failed', 2))
+        self.assertIn('connection refused', outbound.last_error)
+
+    def test_smtp_outage_backs_off_instead_of_raising(self):
+        outbound = enqueue('message', 'dev@example.com', subject='Assigned', body='Bug #1 is yours.')
+        smtp = mock.Mock(**{'open.side_effect': ConnectionRefusedError('smtp down')})
+
+        self.assertEqual(deliver_batch(10, smtp)['retry'], 1)
+
+        outbound.refresh_from_db()
+        self.assertEqual((outbound.status, outbound.attempts), ('pending', 1))
+        self.assertGreater(outbound.next_attempt_at, timezone.now() + timedelta(seconds=30))
+        self.assertIn('smtp down', outbound.last_error)
+
+    def test_sends_after_the_claim_commits(self):
+        outbound = enqueue('message', 'dev@example.com', subject='Assigned', body='Bug #1 is yours.')
+        depth = len(connection.atomic_blocks)
+        seen = []
+
+        def send(message):
+            claimed = OutboundEmail.objects.get(pk=outbound.pk)
+            seen.append((len(connection.atomic_blocks), claimed.next_attempt_at > timezone.now()))
+
+        with mock.patch('django.core.mail.EmailMessage.send', autospec=True, side_effect=send):
+            self.assertEqual(deliver_batch(10)['sent'], 1)
+
+        # No transaction of deliver_batch is open, and other workers skip the leased row
+        self.assertEqual(seen, [(depth, True)])
+
+# ----------------------------
+# Async Views
+# ----------------------------
+class AsyncViewTests(TrackerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.async_client = AsyncClient()
+
+    def bearer(self, user):
+        return {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+    async def test_bug_list_and_detail_on_the_event_loop(self):
+        bug = await Bug.objects.acreate(
+            title='Login fails', description='400 after submit.', reported_by=self.tester,
+            assigned_to=self.dev, project=self.project, team=self.team,
+        )
+
+        listed = await self.async_client.get('/api/bugs/', {'q': 'login'}, headers=self.bearer(self.dev))
+        detail = await self.async_client.get(f'/api/bugs/{bug.id}/', headers=self.bearer(self.dev))
+        missing = await self.async_client.get('/api/bugs/0/', headers=self.bearer(self.dev))
+
+        self.assertEqual([row['id'] for row in listed.json()['results']], [bug.id])
+        self.assertEqual(detail.json()['reported_by'], str(self.tester))
+        self.assertEqual(missing.status_code, 404)
+
+    async def test_head_is_served_like_get(self):
+        bug = await Bug.objects.acreate(
+            title='Login fails', description='400 after submit.', reported_by=self.tester,
+            assigned_to=self.dev, project=self.project, team=self.team,
+        )
+
+        for path in ['/api/bugs/', f'/api/bugs/{bug.id}/']:
+            response = await self.async_client.head(path, headers=self.bearer(self.dev))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b'')
+
+    def test_head_through_a_sync_client(self):
+        bug = self.make_bug()
+        self.login(self.dev)
+
+        self.assertEqual(self.client.head('/api/bugs/').status_code, 200)
+        self.assertEqual(self.client.head(f'/api/bugs/{bug.id}/').status_code, 200)
+
+    async def test_permissions_and_writes_still_apply(self):
+        forbidden = await self.async_client.get('/api/bugs/', headers=self.bearer(self.tester))
+        anonymous = await self.async_client.get('/api/auth/user/')
+        created = await self.async_client.post('/api/bugs/', {
+            'title': 'Export times out', 'description': 'Large projects.', 'project': self.project.id,
+        }, content_type='application/json', headers=self.bearer(self.tester))
+
+        self.assertEqual(forbidden.status_code, 403)
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertEqual(created.status_code, 201)
+
+    async def test_current_user_with_plain_token(self):
+        # Tokens without role/team claims take the database fallback
+        token = AccessToken()
+        token['user_id'] = str(self.dev.id)
+
+        response = await self.async_client.get('/api/auth/user/', headers={'Authorization': f'Bearer {token}'})
+
+        self.assertEqual(response.json()['team']['id'], self.team.id)
+
+
+# ----------------------------
+# Projects
+# ----------------------------
+class ProjectListTests(TrackerTestCase):
+    def test_list_runs_constant_queries_with_counts(self):
+        self.make_bug()
+        self.make_bug(status='closed')
+        for i in range(3):
+            project = Project.objects.create(name=f'Project {i}', manager=self.pm)
+            Team.objects.create(name=f'Team {i}', project=project)
+        self.login(self.eng)
+
+        # Projects, then their teams; the manager is joined and counts are a subquery
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/projects/')
+
+        self.assertEqual(response.status_code, 200)
+        first = response.data[0]
+        self.assertEqual((first['id'], first['teams'], first['bug_count']), (self.project.id, [self.team.name], 2))
+        self.assertNotIn('bugs', first)
+        self.assertEqual([row['bug_count'] for row in response.data[1:]], [0, 0, 0])
+
+    def test_project_bugs_are_paginated_and_visibility_scoped(self):
+        other_team = Team.objects.create(name='Alpha 2', project=self.project)
+        bugs = [self.make_bug(title=f'Bug {i}') for i in range(3)]
+        self.make_bug(team=other_team)
+        self.login(User.objects.create_user('tm', 'tm@example.com', 'pw', role='team_manager', team=self.team))
+
+        response = self.client.get(f'/api/projects/{self.project.id}/bugs/', {'page_size': 2})
+        following = self.client.get(response.data['next'])
+
+        self.assertEqual([row['id'] for row in response.data['results']], [bugs[2].id, bugs[1].id])
+        self.assertEqual([row['id'] for row in following.data['results']], [bugs[0].id])
+
+
+# ----------------------------
+# Teams
+# ----------------------------
+class TeamListTests(TrackerTestCase):
+    def test_members_prefetched_in_constant_queries(self):
+        helper = User.objects.create_user('helper', 'helper@example.com', 'pw', role='developer', first_name='Hal')
+        self.team.members.add(helper, self.dev)
+        for i in range(3):
+            Team.objects.create(name=f'Beta {i}', project=self.project)
+        self.login(self.eng)
+
+        # Teams with their lead, then FK members, M2M members and managers
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/teams/')
+
+        team = response.data[0]
+        self.assertEqual(team['lead'], {'id': self.lead.id, 'name': 'lead', 'role': 'team_lead'})
+        self.assertEqual(
+            [(member['id'], member['name']) for member in team['members']],
+            [(self.lead.id, 'lead'), (self.dev.id, 'dev'), (self.tester.id, 'tester'), (helper.id, 'Hal')],
+        )
+
+    def test_sparse_fieldset_skips_member_queries(self):
+        self.login(self.eng)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/teams/', {'fields': 'id,name'})
+
+        self.assertEqual(response.data, [{'id': self.team.id, 'name': self.team.name}])
+
+    def test_membership_change_invalidates_cached_list(self):
+        self.login(self.eng)
+        etag = self.client.get('/api/teams/')['ETag']
+
+        self.team.members.add(User.objects.create_user('new', 'new@example.com', 'pw', role='developer'))
+
+        response = self.client.get('/api/teams/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+# ----------------------------
+# Sparse Fieldsets
+# ----------------------------
+class DynamicFieldsTests(TrackerTestCase):
+    def test_bug_list_fields_prune_columns(self):
+        self.make_bug()
+        self.login(self.pm)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/bugs/', {'fields': 'id,title,status'})
+
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'status'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0]['sql'])
+        self.assertNotIn('"tracker_user"', queries[0]['sql'])
+
+    def test_bug_expand_joins_relations(self):
+        bug = self.make_bug()
+        self.login(self.pm)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/bugs/{bug.id}/', {'omit': 'description', 'expand': 'assigned_to,project'})
+
+        self.assertNotIn('description', response.data)
+        self.assertEqual(response.data['assigned_to'], {'id': self.dev.id, 'name': 'dev', 'role': 'developer'})
+        self.assertEqual(response.data['project']['name'], self.project.name)
+
+    def test_user_omit_skips_prefetches(self):
+        self.make_bug()
+        self.login(self.pm)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/users/', {'omit': 'related_projects,assigned_bugs,reported_bugs'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('reported_bugs', response.data[0])
+
+    def test_current_user_fieldsets_are_cached_separately(self):
+        self.login(self.dev)
+
+        full = self.client.get('/api/auth/user/')
+        sparse = self.client.get('/api/auth/user/', {'fields': 'id,role'})
+
+        self.assertIn('assigned_bugs', full.data)
+        self.assertEqual(sparse.data, {'id': self.dev.id, 'role': 'developer'})
+        self.assertNotEqual(full['ETag'], sparse['ETag'])
+
+
+# ----------------------------
+# Bug History
+# ----------------------------
+class BugHistoryTests(TrackerTestCase):
+    def test_update_writes_one_insert_per_request(self):
+        bug = self.make_bug()
+        self.login(self.lead)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(f'/api/bugs/{bug.id}/', {'status': 'in_progress', 'priority': 'high'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        inserts = [q['sql'] for q in queries if q['sql'].startswith('INSERT INTO "tracker_bugevent"')]
+        self.assertEqual(len(inserts), 1)
+        events = BugEvent.objects.filter(bug=bug).exclude(field='created').order_by('field')
+        self.assertEqual(
+            [(e.field, e.old, e.new, e.actor_id) for e in events],
+            [('priority', 'medium', 'high', self.lead.id), ('status', 'open', 'in_progress', self.lead.id)],
+        )
+
+    def test_history_endpoint_pages_newest_first(self):
+        self.login(self.tester)
+        bug_id = self.client.post('/api/bugs/', {
+            'title': 'Crash', 'description': 'On save.', 'project': self.project.id,
+        }, format='json').data['id']
+        self.login(self.eng)
+        for status_value in ['in_progress', 'resolved']:
+            self.client.patch(f'/api/bugs/{bug_id}/', {'status': status_value}, format='json')
+
+        response = self.client.get(f'/api/bugs/{bug_id}/history/', {'page_size': 2})
+        rest = self.client.get(response.data['next'])
+
+        self.assertEqual([(e['field'], e['new']) for e in response.data['results']], [('status', 'resolved'), ('status', 'in_progress')])
+        self.assertEqual([e['field'] for e in rest.data['results']], ['created'])
+
+    def test_bulk_paths_log_events(self):
+        self.login(self.pm)
+        self.client.post('/api/bugs/bulk/', [
+            {'title': 'One', 'description': 'x', 'project': self.project.id},
+            {'title': 'Two', 'description': 'y', 'project': self.project.id},
+        ], format='json')
+        ids = list(Bug.objects.values_list('id', flat=True))
+
+        self.client.post('/api/bugs/bulk-update/', {'ids': ids, 'changes': {'priority': 'critical'}}, format='json')
+
+        self.assertEqual(BugEvent.objects.filter(field='created', actor=self.pm).count(), 2)
+        self.assertEqual(
+            sorted(BugEvent.objects.filter(field='priority').values_list('bug_id', 'old', 'new')),
+            [(bug_id, 'medium', 'critical') for bug_id in sorted(ids)],
+        )
+
+    def test_retention_deletes_old_events_without_partitions(self):
+        bug = self.make_bug()
+        BugEvent.objects.filter(bug=bug).update(created_at=timezone.now() - timedelta(days=400))
+
+        call_command('manage_bug_event_partitions', '--retain-months', '12', stdout=StringIO())
+
+        self.assertFalse(BugEvent.objects.exists())
+
+
+# ----------------------------
+# Analytics Rollups
+# ----------------------------
+class BugAnalyticsTests(TrackerTestCase):
+    def sync(self):
+        call_command('rollup_bug_analytics', stdout=StringIO())
+
+    def resolve(self, bug, at):
+        self.login(self.eng)
+        self.client.patch(f'/api/bugs/{bug.id}/', {'status': 'resolved'}, format='json')
+        BugEvent.objects.filter(bug=bug, field='status').update(created_at=at)
+
+    def test_incremental_sync_counts_each_bug_once(self):
+        today = timezone.localdate()
+        bug = self.make_bug()
+        self.make_bug(title='Second')
+        self.sync()
+        self.resolve(bug, timezone.now())
+        self.sync()
+        self.sync()
+
+        self.login(self.eng)
+        response = self.client.get('/api/analytics/burndown/', {'since': str(today - timedelta(days=1))})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(day['open'], day['created'], day['resolved']) for day in response.data['results']],
+            [(0, 0, 0), (1, 2, 1)],
+        )
+
+    def test_mttr_uses_the_resolve_event_time(self):
+        bug = self.make_bug()
+        Bug.objects.filter(pk=bug.pk).update(created_at=timezone.now() - timedelta(hours=30))
+        self.resolve(bug, timezone.now() - timedelta(hours=6))
+        self.sync()
+
+        self.login(self.lead)
+        response = self.client.get('/api/analytics/mttr/')
+
+        self.assertEqual(response.data['results']['resolved'], 1)
+        self.assertEqual(response.data['results']['teams'], [{'team': self.team.id, 'resolved': 1, 'mttr_hours': 24.0}])
+
+    def test_deleted_bugs_leave_the_rollups(self):
+        bug = self.make_bug()
+        self.make_bug(title='Second')
+        self.sync()
+        self.login(self.eng)
+        self.client.delete(f'/api/bugs/{bug.id}/')
+        self.sync()
+
+        response = self.client.get('/api/analytics/throughput/')
+
+        self.assertEqual([(week['created'], week['resolved']) for week in response.data['results']], [(1, 0)])
+
+    def test_access_and_parameter_validation(self):
+        self.login(self.dev)
+        self.assertEqual(self.client.get('/api/analytics/burndown/').status_code, 403)
+
+        self.login(self.pm)
+        self.assertEqual(self.client.get('/api/analytics/burndown/', {'since': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/analytics/burndown/', {'since': '2020-01-01'}).status_code, 400)
+
+
+# ----------------------------
+# Bug Change Feed
+# ----------------------------
+class BugStreamTests(TrackerTestCase):
+    def stream(self, **headers):
+        response = self.client.get('/api/bugs/stream/', HTTP_ACCEPT='text/event-stream', **headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def events(self, body):
+        return [
+            dict(line.split(': ', 1) for line in block.splitlines())
+            for block in body.split('\n\n') if block.startswith('id:')
+        ]
+
+    def test_first_connect_reports_the_resume_point(self):
+        self.make_bug()
+        self.login(self.lead)
+
+        [ready] = self.events(self.stream())
+
+        self.assertEqual(ready['event'], 'ready')
+        self.assertEqual(int(ready['id']), BugEvent.objects.latest('id').id)
+
+    def test_resume_replays_only_visible_changes(self):
+        other_team = Team.objects.create(name='Alpha 2', project=self.project)
+        mine = self.make_bug()
+        self.make_bug(team=other_team, assigned_to=None)
+        last_id = BugEvent.objects.latest('id').id
+        Bug.objects.get(pk=mine.pk).save()  # no audited change, no event
+        self.login(self.eng)
+        self.client.patch(f'/api/bugs/{mine.id}/', {'status': 'in_progress'}, format='json')
+        self.make_bug(team=other_team, assigned_to=None, title='Elsewhere')
+
+        self.login(self.lead)
+        events = self.events(self.stream(HTTP_LAST_EVENT_ID=str(last_id)))
+
+        self.assertEqual([(e['event'], json.loads(e['data'])['bug']) for e in events], [('updated', mine.id)])
+        self.assertEqual(json.loads(events[0]['data'])['changes']['status'], 'in_progress')
+
+    def test_resume_resets_when_a_bug_may_have_left_view(self):
+        bug = self.make_bug()
+        last_id = BugEvent.objects.latest('id').id
+        self.login(self.eng)
+        self.client.delete(f'/api/bugs/{bug.id}/')
+
+        self.login(self.lead)
+        [reset] = self.events(self.stream(HTTP_LAST_EVENT_ID=str(last_id)))
+
+        self.assertEqual(reset['event'], 'reset')
+        self.assertEqual(self.client.get('/api/bugs/stream/', HTTP_LAST_EVENT_ID='x').status_code, 400)
+
+    def test_broker_fans_out_committed_changes_by_visibility(self):
+        other_lead = User.objects.create_user('lead2', 'lead2@example.com', 'pw', role='team_lead')
+        bug = self.make_bug()
+        loop = asyncio.new_event_loop()
+
+        for user in [self.lead, self.tester, other_lead]:
+            visibility.visible_team_ids(user)
+
+        async def subscribe():
+            return [realtime.broker.subscribe(user) for user in [self.lead, self.tester, other_lead]]
+
+        lead, tester, other = subscriptions = loop.run_until_complete(subscribe())
+        try:
+            self.login(self.eng)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(f'/api/bugs/{bug.id}/', {'priority': 'high'}, format='json')
+            loop.run_until_complete(asyncio.sleep(0))
+
+            message = lead.queue.get_nowait()
+            self.assertEqual((message['type'], message['changes']), ('updated', {'priority': 'high'}))
+            self.assertEqual(message['id'], BugEvent.objects.latest('id').id)
+            self.assertEqual(tester.queue.qsize(), 1)
+            self.assertTrue(other.queue.empty())
+        finally:
+            for subscription in subscriptions:
+                realtime.broker.unsubscribe(subscription)
+            loop.close()
+
+
+# ----------------------------
+# Visibility Sets
+# ----------------------------
+class VisibilitySetTests(TrackerTestCase):
+    def fresh(self, user):
+        # A new instance per request, as token authentication gives
+        return User.objects.get(pk=user.pk)
+
+    def test_team_change_is_recomputed_before_the_next_request(self):
+        other_team = Team.objects.create(name='Alpha 2', project=self.project)
+        bug = self.make_bug(team=other_team, assigned_to=None)
+        visibility.warm(self.dev)
+        self.assertEqual(visibility.visible_team_ids(self.fresh(self.dev)), [self.team.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dev.team = other_team
+            self.dev.save()
+
+        # Already recomputed: the request itself evaluates no rules
+        dev = self.fresh(self.dev)
+        with self.assertNumQueries(0):
+            self.assertEqual(visibility.visible_team_ids(dev), [other_team.id])
+        self.client.force_authenticate(user=dev)
+        self.assertEqual([b['id'] for b in self.client.get('/api/bugs/').data['results']], [bug.id])
+
+    def test_sets_expire_when_a_write_skipped_the_signals(self):
+        visibility.warm(self.dev)
+        User.objects.filter(pk=self.dev.pk).update(team=None)
+        self.assertEqual(visibility.visible_team_ids(self.fresh(self.dev)), [self.team.id])
+
+        later = time.time() + settings.VISIBILITY_CACHE_TIMEOUT + 1
+        with mock.patch('time.time', return_value=later):
+            self.assertEqual(visibility.visible_team_ids(self.fresh(self.dev)), [])
+
+    def test_membership_and_management_grant_nothing_extra(self):
+        other_team = Team.objects.create(name='Alpha 2', project=self.project)
+        self.make_bug(team=other_team, assigned_to=None)
+        manager = User.objects.create_user('tm', 'tm@example.com', 'pw', role='team_manager', team=self.team)
+        other_team.members.add(self.dev)
+        other_team.managers.add(manager)
+
+        self.assertEqual(visibility.visible_team_ids(self.fresh(self.dev)), [self.team.id])
+        self.login(self.fresh(self.dev))
+        self.assertEqual(self.client.get('/api/bugs/').data['results'], [])
+
+        # Team managers see their own team's project, but /teams/ only lists teams they lead
+        self.login(self.fresh(manager))
+        self.assertEqual([p['id'] for p in self.client.get('/api/projects/').data], [self.project.id])
+        self.assertEqual(self.client.get('/api/teams/').data, [])
+        self.assertEqual(self.client.patch(f'/api/teams/{other_team.id}/', {'name': 'Mine'}).status_code, 404)
+        self.assertEqual(self.client.delete(f'/api/teams/{self.team.id}/').status_code, 404)
+
+    def test_replacing_a_lead_updates_both_leads(self):
+        new_lead = User.objects.create_user('lead2', 'lead2@example.com', 'pw', role='team_lead')
+        visibility.warm(self.lead)
+        self.assertEqual(visibility.led_team_ids(self.fresh(self.lead)), [self.team.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.lead = new_lead
+            self.team.save()
+
+        self.assertEqual(visibility.led_team_ids(self.fresh(self.lead)), [])
+        self.assertEqual(visibility.led_team_ids(self.fresh(new_lead)), [self.team.id])
+        self.login(self.fresh(new_lead))
+        self.assertEqual([t['id'] for t in self.client.get('/api/teams/').data], [self.team.id])
+
+
+class GeneratedDataTests(TestCase):
+    def generate(self, **options):
+        options = {'users': 60, 'bugs': 300, 'projects': 3, 'seed': 7, **options}
+        call_command('generate_data', stdout=StringIO(), **options)
+
+    def test_generates_every_role_and_consistent_derived_tables(self):
+        self.generate()
+
+        self.assertEqual(Bug.objects.count(), 300)
+        self.assertEqual(
+            set(User.objects.values_list('role', flat=True)), {role for role, _ in User.ROLE_CHOICES}
+        )
+        self.assertFalse(Team.objects.filter(lead__isnull=True).exists())
+        self.assertEqual(BugStats.objects.aggregate(total=Sum('count'))['total'], 300)
+        self.assertEqual(BugDailyRollup.objects.aggregate(total=Sum('created'))['total'], 300)
+        self.assertEqual(BugEvent.objects.filter(field='created').count(), 300)
+        done = Bug.objects.filter(status__in=['resolved', 'closed'])
+        self.assertEqual(BugEvent.objects.filter(field='status', new='resolved').count(), done.count())
+        self.assertTrue(self.client.login(username=User.objects.filter(role='developer').first().username,
+                                          password='cbts1234'))
+
+        # Ids were assigned by the command; the sequence must have moved past them
+        latest = Bug.objects.latest('id').id
+        bug = Bug.objects.create(title='x', description='y', project=Project.objects.first(), reported_by=User.objects.first())
+        self.assertGreater(bug.id, latest)
+
+    def test_same_seed_same_dataset(self):
+        self.generate()
+        first = list(Bug.objects.order_by('id').values_list('title', 'status', 'priority'))
+        self.generate(flush=True)
+        self.assertEqual(list(Bug.objects.order_by('id').values_list('title', 'status', 'priority')), first)
+
+    def test_developer_visibility_benchmark_compares_like_for_like(self):
+        self.generate()
+        out = StringIO()
+
+        call_command('bench_developer_visibility', '--repeat', '1', stdout=out)
+
+        self.assertIn('identical pages', out.getvalue())
+
+    def test_endpoint_benchmark_covers_every_route(self):
+        from .management.commands.bench_endpoints import ENDPOINTS, url_names
+
+        self.assertEqual(set(ENDPOINTS), url_names())
+
+        self.generate()
+        with tempfile.NamedTemporaryFile(mode='r', suffix='.json') as output:
+            call_command('bench_endpoints', '--iterations', '2', '--warmup', '0', '--writes',
+                         '--json', output.name, stdout=StringIO())
+            [run] = json.load(output)
+
+        self.assertEqual({result['endpoint'] for result in run['results']}, set(ENDPOINTS))
+        failed = {result['endpoint']: result['status'] for result in run['results'] if max(result['status']) >= 400}
+        self.assertEqual(failed, {})
+        # Rolled back: the import and bulk update left no trace
+        self.assertEqual(Bug.objects.count(), 300)
+
+    def test_endpoint_benchmark_finishes_live_streams_under_asgi(self):
+        self.generate()
+        out = StringIO()
+
+        with self.settings(SERVER_MODE='asgi'):
+            call_command('bench_endpoints', '--iterations', '2', '--warmup', '0',
+                         '--endpoints', 'bugs-stream', 'bugs-export', stdout=out)
+
+        self.assertRegex(out.getvalue(), r'bugs-stream .* 200\n')
+        self.assertRegex(out.getvalue(), r'bugs-export .* 200\n')
@@ -1,10 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .views import (
-    BugViewSet, ProjectViewSet, TeamViewSet, UserViewSet,
-    CurrentUserView, PasswordResetAPIView, CustomTokenObtainPairView
+    AnalyticsViewSet, BugViewSet, ProjectViewSet, TeamViewSet, UserViewSet,
+    CurrentUserView, PasswordResetAPIView, CustomTokenObtainPairView, CustomTokenRefreshView
 )
 
 # ✅ Router-based ViewSets (REST API endpoints)
@@ -13,6 +12,7 @@ router.register(r'bugs', BugViewSet, basename='bugs')
 router.register(r'projects', ProjectViewSet, basename='projects')
 router.register(r'teams', TeamViewSet, basename='teams')
 router.register(r'users', UserViewSet, basename='users')
+router.register(r'analytics', AnalyticsViewSet, basename='analytics')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -25,5 +25,5 @@ urlpatterns = [
 
     # ✅ JWT authentication endpoints (login & refresh)
     path('token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),  # custom login serializer
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),  # re-stamps role/team claims
 ]
@@ -1,27 +1,46 @@
-from django.contrib.auth import get_user_model
-from django.contrib.auth.tokens import default_token_generator
-from django.utils.http import urlsafe_base64_encode
-from django.utils.encoding import force_bytes
+import types
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.core.mail import send_mail
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 
 from rest_framework import status, viewsets
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import action
-
-from .models import Bug, User, Project, Team
-from .serializers import BugSerializer, UserSerializer, ProjectSerializer, TeamSerializer
-from .permissions import (
-    IsProductManager, IsEngineeringManager, IsTeamLead, IsTeamManager,
-    IsDeveloper, IsTester, IsCustomer, CombinedPermission
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from . import analytics, realtime
+from .async_views import AsyncViewMixin
+from .bulk import BugBulkUpdateSerializer, BugImporter, bulk_update_bugs, permitted_changes
+from .export import CONTENT_TYPES, aiterate, export_stream
+from .fieldsets import DynamicFieldsViewMixin, parse_fieldset
+from .history import acting_as
+from .mail import enqueue
+from .models import Bug, BugEvent, BugStats, User, Project, Team
+from .pagination import KeysetCursorPagination, SearchResultsPagination
+from .parsers import NDJSONParser
+from .response_cache import (
+    ConditionalGetMixin, acached_response, afingerprint, bug_expand_scopes, bug_list_scopes, cached_response,
+    not_modified, user_scopes, validator_headers,
+)
+from .search import search_bugs
+from .similarity import similar_bugs
+from .visibility import aload_visibility, filter_visible, led_team_ids, visible_project_ids, visible_team_ids
+from .stats import summarize
+from .serializers import (
+    BugSerializer, BugEventSerializer, UserSerializer, ProjectSerializer, TeamSerializer, similar_bug_data
 )
-from rest_framework.exceptions import PermissionDenied
+from .permissions import RolePermissionMixin
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.shortcuts import get_object_or_404
 
-from rest_framework_simplejwt.views import TokenObtainPairView
-from .serializers import CustomLoginSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .serializers import CustomLoginSerializer, CustomTokenRefreshSerializer
 from django_filters.rest_framework import DjangoFilterBackend # type: ignore
 
 
@@ -32,23 +51,37 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomLoginSerializer
 
 
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = CustomTokenRefreshSerializer
+
+
 # ----------------------------
 # Current Authenticated User
 # ----------------------------
-class CurrentUserView(APIView):
+class CurrentUserView(AsyncViewMixin, APIView):
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
+    async def get(self, request):
+        fieldset = parse_fieldset(request.query_params)
+        fields = UserSerializer.selected_fields(fieldset['fields'], fieldset['omit'])
+
+        async def build():
+            # request.user only carries token claims; load the full row with its relations
+            queryset = UserSerializer.setup_eager_loading(User.objects.all(), fields, fieldset['expand'])
+            return UserSerializer(await queryset.aget(pk=request.user.pk), **fieldset).data
+
+        key = f'current-user:{request.user.pk}:{request.get_full_path()}'
+        return await acached_response(request, key, user_scopes(request.user), build)
 
 
 # ----------------------------
 # Bug ViewSet
 # ----------------------------
-class BugViewSet(viewsets.ModelViewSet):
+class BugViewSet(AsyncViewMixin, DynamicFieldsViewMixin, RolePermissionMixin, viewsets.ModelViewSet):
+    permission_scope = 'bugs'
     queryset = Bug.objects.all()
     serializer_class = BugSerializer
+    pagination_class = KeysetCursorPagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['assigned_to']
 
@@ -57,41 +90,56 @@ class BugViewSet(viewsets.ModelViewSet):
         if not user.is_authenticated:
             return Bug.objects.none()
 
-        role = getattr(user, 'role', None)
         queryset = Bug.objects.all()
 
         assigned_to = self.request.query_params.get('assigned_to')
         if assigned_to:
             queryset = queryset.filter(assigned_to__id=assigned_to)
 
-        if role in ['product_manager', 'engineering_manager']:
-            return queryset
-        elif role in ['team_manager', 'team_lead']:
-            return queryset.filter(team=user.team)
-        elif role == 'developer':
-            return queryset.filter(assigned_to=user) | queryset.filter(team=user.team)
-        elif role in ['tester', 'customer']:
-            return queryset.filter(reported_by=user)
-
-        return Bug.objects.none()
-
-    def get_permissions(self):
-        if self.action == 'list':
-            return [CombinedPermission(
-                IsProductManager, IsEngineeringManager,
-                IsTeamManager, IsTeamLead, IsDeveloper
-            )]
-        elif self.action in ['retrieve', 'update', 'partial_update']:
-            return [CombinedPermission(
-                IsProductManager, IsEngineeringManager,
-                IsTeamManager, IsTeamLead, IsDeveloper, IsTester
-            )]
-        elif self.action == 'create':
-            return [CombinedPermission(
-                IsProductManager, IsEngineeringManager,
-                IsTeamManager, IsTester, IsCustomer
-            )]
-        return [IsAuthenticated()]
+        queryset = queryset.visible_to(user)
+
+        if self.search_query and self.action == 'list':
+            queryset = search_bugs(queryset, self.search_query)
+        if self.action in self.fieldset_actions:
+            queryset = BugSerializer.setup_eager_loading(queryset, self.selected_fields, self.fieldset['expand'])
+        return queryset
+
+    @property
+    def search_query(self):
+        return self.request.query_params.get('q', '').strip()
+
+    @property
+    def paginator(self):
+        # Search results keep their ts_rank order, so they page by offset instead of cursor
+        if not hasattr(self, '_paginator'):
+            self._paginator = SearchResultsPagination() if self.search_query else KeysetCursorPagination()
+        return self._paginator
+
+    async def list(self, request, *args, **kwargs):
+        await aload_visibility(request.user)
+        key = f'bug-list:{request.user.pk}:{request.get_full_path()}'
+        scopes = bug_list_scopes(request.user) + bug_expand_scopes(self.fieldset['expand'])
+        return await acached_response(request, key, scopes, self.list_payload)
+
+    async def list_payload(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        page = await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data).data
+
+    async def retrieve(self, request, *args, **kwargs):
+        await aload_visibility(request.user)
+        bug = await self.aget_object()
+        # The payload only changes with the row itself, the requested fieldset or the related rows it renders
+        etag, related_changed = await afingerprint(
+            f'bug:{bug.pk}:{bug.updated_at.isoformat()}:{request.GET.urlencode()}',
+            [f'user:{bug.reported_by_id}', *bug_expand_scopes(self.fieldset['expand'], bug)],
+        )
+        last_modified = max(bug.updated_at.timestamp(), related_changed)
+        headers = validator_headers(etag, last_modified)
+        if not_modified(request, etag, last_modified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return Response(self.get_serializer(bug).data, headers=headers)
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -103,10 +151,96 @@ class BugViewSet(viewsets.ModelViewSet):
         if user.role in ['team_lead', 'team_manager'] and assigned_to:
             if assigned_to.role != 'developer':
                 raise PermissionDenied("Can only assign to developers.")
-            if assigned_to.team != user.team:
+            if assigned_to.team_id != user.team_id:
                 raise PermissionDenied("Can only assign within your team.")
 
-        serializer.save(reported_by=user)
+        with acting_as(user):
+            serializer.save(reported_by=user)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        if settings.BUG_DUPLICATE_WARNINGS:
+            candidates = Bug.objects.visible_to(request.user).exclude(pk=response.data['id'])
+            similar = similar_bugs(candidates, response.data['title'])
+            if similar:
+                response.data['similar_bugs'] = similar_bug_data(similar)
+        return response
+
+    @action(detail=False, methods=['get'])
+    def similar(self, request):
+        """
+        Visible bugs whose titles resemble ?title=, best match first.
+        """
+        title = request.query_params.get('title', '')
+        if not title.strip():
+            return Response({"detail": "title is required."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(similar_bug_data(similar_bugs(Bug.objects.visible_to(request.user), title)))
+
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Import many bugs from a JSON array or an NDJSON stream. Valid rows are
+        inserted in batches of ?batch_size=; invalid rows are reported by index.
+        """
+        rows = request.data
+        if not isinstance(rows, (list, types.GeneratorType)):
+            return Response({"detail": "Expected a list of bugs."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            batch_size = int(request.query_params.get('batch_size', settings.BUG_BULK_BATCH_SIZE))
+        except ValueError:
+            return Response({"detail": "batch_size must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        batch_size = max(1, min(batch_size, settings.BUG_BULK_MAX_BATCH_SIZE))
+
+        with acting_as(request.user):
+            result = BugImporter(request.user, batch_size).run(rows)
+        return Response(result, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        """
+        Apply one field delta to many visible bugs, selected by id list or filter.
+        """
+        serializer = BugBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        changes = permitted_changes(request.user, data['changes'])
+        if not changes:
+            return Response({"detail": "None of the requested changes are allowed for your role."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = Bug.objects.visible_to(request.user)
+        if 'ids' in data:
+            queryset = queryset.filter(id__in=data['ids'])
+        else:
+            queryset = queryset.filter(**data['filter'])
+
+        with acting_as(request.user):
+            matched, updated = bulk_update_bugs(queryset, changes)
+        return Response({'matched': matched, 'updated': updated})
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream every visible bug as CSV (default) or NDJSON (?output=ndjson),
+        optionally gzip-compressed (?gzip=1), in constant memory.
+        """
+        output = request.query_params.get('output', 'csv')
+        if output not in CONTENT_TYPES:
+            return Response({"detail": "output must be 'csv' or 'ndjson'."}, status=status.HTTP_400_BAD_REQUEST)
+        compress = request.query_params.get('gzip') in ['1', 'true']
+
+        filename = f'bugs.{output}' + ('.gz' if compress else '')
+        stream = export_stream(self.get_queryset(), output, compress)
+        if settings.SERVER_MODE == 'asgi':
+            stream = aiterate(stream)
+        response = StreamingHttpResponse(
+            stream,
+            content_type='application/gzip' if compress else CONTENT_TYPES[output],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
     def perform_update(self, serializer):
         user = self.request.user
@@ -116,97 +250,195 @@ class BugViewSet(viewsets.ModelViewSet):
             if set(data.keys()) - {'status'}:
                 raise PermissionDenied("Developers can only update bug status.")
 
-        serializer.save()
+        with acting_as(user):
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with acting_as(self.request.user):
+            instance.delete()
+
+    @action(detail=False, methods=['get'], renderer_classes=[JSONRenderer, realtime.EventStreamRenderer])
+    async def stream(self, request):
+        """
+        Server-Sent Events feed of the bugs the requester can see. Reconnects
+        resume from the Last-Event-ID header (or ?last_event_id=). Under WSGI
+        it sends the backlog and closes, so clients fall back to polling at
+        the `retry:` interval instead of tying up a worker.
+        """
+        last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+        if last_event_id is not None:
+            try:
+                last_event_id = int(last_event_id)
+            except ValueError:
+                return Response({'detail': 'Last-Event-ID must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if settings.SERVER_MODE == 'asgi':
+            stream = realtime.event_stream(request.user, last_event_id)
+        else:
+            frames = await sync_to_async(realtime.backlog)(request.user, last_event_id)
+            stream = iter([f'retry: {settings.BUG_STREAM_HEARTBEAT * 1000}\n\n', *frames])
+        return StreamingHttpResponse(
+            stream, content_type='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """
+        The bug's change log, newest first, a page at a time.
+        """
+        bug = self.get_object()
+        paginator = KeysetCursorPagination()
+        page = paginator.paginate_queryset(BugEvent.objects.filter(bug_id=bug.pk), request, view=self)
+        return paginator.get_paginated_response(BugEventSerializer(page, many=True).data)
 
 
 # ----------------------------
 # User ViewSet
 # ----------------------------
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(DynamicFieldsViewMixin, RolePermissionMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    permission_scope = 'users'
+    conditional_scopes = ['table:user', 'table:team', 'table:project', 'table:bug']
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
-    def get_permissions(self):
-        if self.action == 'create':
-            return [CombinedPermission(IsProductManager)]
-
-        if self.action == 'list':
-            return [CombinedPermission(
-                IsProductManager, IsEngineeringManager, IsTeamManager
-            )]
-
-        return [IsAuthenticated()]
-
     def get_queryset(self):
         user = self.request.user
 
         if user.role == 'product_manager' or user.is_superuser:
-            return User.objects.all()
+            queryset = User.objects.all()
         elif user.role == 'engineering_manager':
-            return User.objects.exclude(role__in=['product_manager', 'engineering_manager'])
+            queryset = User.objects.exclude(role__in=['product_manager', 'engineering_manager'])
         elif user.role in ['team_manager', 'team_lead']:
-            return User.objects.filter(team=user.team)
+            queryset = User.objects.filter(team_id__in=visible_team_ids(user))
+        else:
+            queryset = User.objects.filter(id=user.id)
 
-        return User.objects.filter(id=user.id)
+        return UserSerializer.setup_eager_loading(queryset, self.selected_fields, self.fieldset['expand'])
 
 
 # ----------------------------
 # Project ViewSet
 # ----------------------------
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(DynamicFieldsViewMixin, RolePermissionMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    permission_scope = 'projects'
+    conditional_scopes = ['table:project', 'table:team', 'table:bug', 'table:user']
     serializer_class = ProjectSerializer
 
-    def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
-            return [CombinedPermission(IsProductManager, IsEngineeringManager)]
-        elif self.action in ['list', 'retrieve']:
-            return [CombinedPermission(
-                IsProductManager, IsEngineeringManager, IsTeamManager
-            )]
-        return [IsAuthenticated()]
-
     def get_queryset(self):
         user = self.request.user
 
-        if user.role == 'product_manager':
-            return Project.objects.filter(manager=user)
-        elif user.role == 'engineering_manager':
-            return Project.objects.all()
-        elif user.role == 'team_manager':
-            return Project.objects.filter(team=user.team)
+        if user.role in ['product_manager', 'engineering_manager', 'team_manager']:
+            queryset = filter_visible(Project.objects.all(), visible_project_ids(user))
+        else:
+            return Project.objects.none()
 
-        return Project.objects.none()
+        if self.action in self.fieldset_actions:
+            queryset = ProjectSerializer.setup_eager_loading(queryset, self.selected_fields, self.fieldset['expand'])
+        return queryset.order_by('id')
 
     def perform_create(self, serializer):
         serializer.save(manager=self.request.user)
 
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        project = self.get_object()
+        return Response({'project': project.id, **summarize(BugStats.objects.filter(project=project))})
+
+    @action(detail=True, methods=['get'])
+    def bugs(self, request, pk=None):
+        """
+        The project's bugs the requester may see, newest first, a page at a time.
+        """
+        project = self.get_object()
+        fieldset = parse_fieldset(request.query_params)
+        queryset = BugSerializer.setup_eager_loading(
+            Bug.objects.visible_to(request.user).filter(project=project),
+            BugSerializer.selected_fields(fieldset['fields'], fieldset['omit']), fieldset['expand'],
+        )
+        paginator = KeysetCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = BugSerializer(page, many=True, context=self.get_serializer_context(), **fieldset)
+        return paginator.get_paginated_response(serializer.data)
+
 
 # ----------------------------
 # Team ViewSet
 # ----------------------------
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(DynamicFieldsViewMixin, RolePermissionMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    permission_scope = 'teams'
+    conditional_scopes = ['table:team', 'table:user', 'table:project']
     serializer_class = TeamSerializer
 
-    def get_permissions(self):
-        if self.action == 'create':
-            return [CombinedPermission(IsEngineeringManager)]
-        if self.action in ['list', 'retrieve', 'update', 'partial_update', 'destroy']:
-            return [CombinedPermission(IsEngineeringManager, IsTeamManager, IsTeamLead)]
-        return [IsAuthenticated()]
-
     def get_queryset(self):
         user = self.request.user
 
-        if user.role == 'engineering_manager':
-            return Team.objects.all()
-        elif user.role in ['team_manager', 'team_lead']:
-            return Team.objects.filter(lead=user)
+        if user.role in ['engineering_manager', 'team_manager', 'team_lead']:
+            # Only teams they lead: this queryset also decides who may update or delete a team
+            queryset = filter_visible(Team.objects.all(), led_team_ids(user))
+        else:
+            return Team.objects.none()
 
-        return Team.objects.none()
+        if self.action in self.fieldset_actions:
+            queryset = TeamSerializer.setup_eager_loading(queryset, self.selected_fields, self.fieldset['expand'])
+        return queryset.order_by('id')
 
     def perform_create(self, serializer):
         serializer.save(lead=self.request.user)
 
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        team = self.get_object()
+        summary = summarize(BugStats.objects.filter(team=team))
+        del summary['teams']
+        return Response({'team': team.id, **summary})
+
+
+# ----------------------------
+# Analytics (served from the daily rollups)
+# ----------------------------
+class AnalyticsViewSet(RolePermissionMixin, viewsets.ViewSet):
+    """
+    Burndown, throughput and MTTR charts. Filters: ?project=, ?team=,
+    ?since= and ?until= (ISO dates, default the last 90 days).
+    """
+    permission_scope = 'analytics'
+    default_days = 90
+    max_days = 731
+
+    def chart_params(self, request):
+        params = request.query_params
+        try:
+            until = date.fromisoformat(params['until']) if 'until' in params else timezone.localdate()
+            since = date.fromisoformat(params['since']) if 'since' in params else until - timedelta(days=self.default_days - 1)
+            filters = {name: int(params[name]) for name in ['project', 'team'] if name in params}
+        except ValueError:
+            raise ValidationError({'detail': 'since/until must be ISO dates and project/team integer ids.'})
+        if since > until or (until - since).days >= self.max_days:
+            raise ValidationError({'detail': f'since must be on or before until, at most {self.max_days} days apart.'})
+
+        rollups = analytics.rollups_for(request.user).filter(
+            **{f'{name}_id': value for name, value in filters.items()}
+        )
+        return rollups, since, until
+
+    def chart(self, request, compute):
+        rollups, since, until = self.chart_params(request)
+        key = f'analytics:{request.user.pk}:{request.get_full_path()}'
+        build = lambda: {'since': since, 'until': until, 'results': compute(rollups, since, until)}
+        return cached_response(request, key, ['analytics', *user_scopes(request.user)], build)
+
+    @action(detail=False, methods=['get'])
+    def burndown(self, request):
+        return self.chart(request, analytics.burndown)
+
+    @action(detail=False, methods=['get'])
+    def throughput(self, request):
+        return self.chart(request, analytics.throughput)
+
+    @action(detail=False, methods=['get'])
+    def mttr(self, request):
+        return self.chart(request, analytics.mean_time_to_resolve)
+
 
 # ----------------------------
 # User-Specific Bugs Endpoint
@@ -221,7 +453,7 @@ class UserBugsViewSet(viewsets.ViewSet):
         if request.user.role not in ['product_manager', 'engineering_manager'] and request.user != user:
             return Response({"detail": "Permission denied"}, status=403)
 
-        bugs = Bug.objects.filter(assigned_to=user)
+        bugs = BugSerializer.setup_eager_loading(Bug.objects.filter(assigned_to=user))
         serializer = BugSerializer(bugs, many=True)
         return Response(serializer.data)
 
@@ -237,26 +469,8 @@ class PasswordResetAPIView(APIView):
         if not email:
             return Response({"detail": "Email is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        UserModel = get_user_model()
-        try:
-            user = UserModel.objects.get(email=email)
-        except UserModel.DoesNotExist:
-            return Response({
-                "detail": "If an account with that email exists, a reset link has been sent."
-            }, status=status.HTTP_200_OK)
-
-        uid = urlsafe_base64_encode(force_bytes(user.pk))
-        token = default_token_generator.make_token(user)
-        reset_url = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}/"
-
-        subject = "Password Reset Requested"
-        message = (
-            f"Hi {user.get_full_name() or user.email},\n\n"
-            f"Click the link below to reset your password:\n\n{reset_url}\n\n"
-            "If you didn’t request this, just ignore this email."
-        )
-
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [email])
+        # Always one INSERT: the worker resolves the account and sends the link
+        enqueue('password_reset', email)
 
         return Response({
             "detail": "If an account with that email exists, a reset link has been sent."
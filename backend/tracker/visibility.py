@@ -0,0 +1,157 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Project, Team, User
+from .response_cache import bump
+
+VISIBILITY_KEY = 'visibility:{}:{}'
+
+# Roles whose view is unrestricted; their sets are stored as None
+ALL_TEAMS_ROLES = ['product_manager', 'engineering_manager']
+ALL_PROJECTS_ROLES = ['engineering_manager']
+ALL_LED_TEAMS_ROLES = ['engineering_manager']
+
+# Roles whose bugs and people come from their own User.team
+TEAM_ROLES = ['team_manager', 'team_lead', 'developer']
+
+
+# ----------------------------
+# Visibility Sets
+# ----------------------------
+# The rules the viewsets always applied, precomputed: team-bound roles see
+# their own team (User.team) and its project, and may manage through
+# /teams/ only the teams they lead. Product managers see all teams' bugs
+# but only the projects they manage.
+
+def compute_team_ids(user):
+    if user.role in ALL_TEAMS_ROLES:
+        return None
+    elif user.role in TEAM_ROLES and user.team_id is not None:
+        return [user.team_id]
+    return []
+
+
+def compute_led_team_ids(user):
+    if user.role in ALL_LED_TEAMS_ROLES:
+        return None
+    elif user.role in ['team_manager', 'team_lead']:
+        return list(Team.objects.filter(lead_id=user.pk).order_by('id').values_list('id', flat=True))
+    return []
+
+
+def compute_project_ids(user):
+    role = user.role
+    if role in ALL_PROJECTS_ROLES:
+        return None
+    elif role == 'product_manager':
+        return list(Project.objects.filter(manager_id=user.pk).order_by('id').values_list('id', flat=True))
+    elif role in TEAM_ROLES and user.team_id is not None:
+        return list(Team.objects.filter(id=user.team_id).values_list('project_id', flat=True))
+    return []
+
+
+RULES = {
+    'teams': compute_team_ids,
+    'led_teams': compute_led_team_ids,
+    'projects': compute_project_ids,
+}
+KINDS = list(RULES)
+
+
+def visible_ids(user, kind):
+    """
+    The cached id list of `kind` (one of KINDS) `user` may see,
+    None meaning all. Memoized on the instance, so a request reads the
+    cache at most once per kind and only computes what it asks for.
+    Entries expire after VISIBILITY_CACHE_TIMEOUT, which bounds how long
+    a write that skipped the signals (raw SQL, queryset.update) can
+    leave a set stale.
+    """
+    memo = user.__dict__.setdefault('_visibility', {})
+    if kind not in memo:
+        key = VISIBILITY_KEY.format(kind, user.pk)
+        cached = cache.get(key)
+        if cached is None or cached['role'] != user.role:
+            cached = {'role': user.role, 'ids': RULES[kind](user)}
+            cache.set(key, cached, timeout=settings.VISIBILITY_CACHE_TIMEOUT)
+        memo[kind] = cached['ids']
+    return memo[kind]
+
+
+async def aload_visibility(user, *kinds):
+    """
+    Load visible_ids() for async views before anything filters on the
+    event loop; only a cache miss leaves the loop.
+    """
+    memo = user.__dict__.setdefault('_visibility', {})
+    for kind in kinds or ['teams']:
+        if kind in memo:
+            continue
+        cached = await cache.aget(VISIBILITY_KEY.format(kind, user.pk))
+        if cached is not None and cached['role'] == user.role:
+            memo[kind] = cached['ids']
+        else:
+            await sync_to_async(visible_ids)(user, kind)
+
+
+def warm(*users):
+    """
+    Recompute and cache every set for `users`, so their next request
+    finds them ready instead of evaluating the rules itself.
+    """
+    values = {}
+    for user in users:
+        user.__dict__.pop('_visibility', None)
+        for kind, rule in RULES.items():
+            values[VISIBILITY_KEY.format(kind, user.pk)] = {'role': user.role, 'ids': rule(user)}
+    cache.set_many(values, timeout=settings.VISIBILITY_CACHE_TIMEOUT)
+
+
+def visible_team_ids(user):
+    return visible_ids(user, 'teams')
+
+
+def visible_project_ids(user):
+    return visible_ids(user, 'projects')
+
+
+def led_team_ids(user):
+    return visible_ids(user, 'led_teams')
+
+
+def filter_visible(queryset, ids, field='id'):
+    # None is unrestricted; an empty list matches nothing without a query
+    return queryset if ids is None else queryset.filter(**{f'{field}__in': ids})
+
+
+# ----------------------------
+# Invalidation (called from tracker.signals)
+# ----------------------------
+def invalidate(*user_ids):
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    cache.delete_many([VISIBILITY_KEY.format(kind, user_id) for kind in KINDS for user_id in user_ids])
+    # Their cached lists and payloads were filtered with the old sets
+    bump(*(f'user:{user_id}' for user_id in user_ids))
+
+    def refresh():
+        warm(*User.objects.filter(id__in=user_ids).only('id', 'role', 'team_id'))
+
+    if connection.in_atomic_block:
+        # Recompute from committed rows; a request in between may have cached pre-commit ones
+        transaction.on_commit(refresh)
+    else:
+        refresh()
+
+
+def team_user_ids(team_id):
+    """
+    Everyone whose visibility sets can include `team_id`: its members by
+    User.team and its lead.
+    """
+    attached = User.objects.filter(Q(team_id=team_id) | Q(leading_teams=team_id))
+    return set(attached.values_list('id', flat=True))
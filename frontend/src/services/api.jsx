@@ -50,7 +50,20 @@ API.interceptors.response.use(
 );
 
 // ================== ✅ Bug APIs ==================
-export const fetchBugs = () => API.get('bugs/');
+// Bug lists are cursor-paginated; `data` is the current page and `next` the following cursor URL
+export const fetchBugPage = (params) =>
+  API.get('bugs/', { params }).then((res) => ({ ...res, data: res.data.results, next: res.data.next }));
+
+// Every visible bug, following `next` to the end: the dashboards count and table the whole set
+export const fetchBugs = async (params) => {
+  let res = await API.get('bugs/', { params: { page_size: 500, ...params } });
+  const bugs = [...res.data.results];
+  while (res.data.next) {
+    res = await API.get(res.data.next);
+    bugs.push(...res.data.results);
+  }
+  return { ...res, data: bugs };
+};
 export const fetchBug = (id) => API.get(`bugs/${id}/`);
 export const createBug = (bugData) => API.post('bugs/', bugData);
 export const updateBug = (id, bugData) => API.put(`bugs/${id}/`, bugData);